@@ -0,0 +1,223 @@
+#!/usr/bin/python
+'''
+\brief Event queues used by the simulation engine.
+
+Events are [asn,priority,seq,cb,uniqueTag] lists. They are dispatched by
+increasing asn, then by increasing priority, then in the order they were
+scheduled (seq). Cancelled events are tombstoned (cb=None) and dropped
+when they reach the head of the queue.
+'''
+
+#============================ logging =========================================
+
+import logging
+class NullHandler(logging.Handler):
+    def emit(self, record):
+        pass
+log = logging.getLogger('EventQueue')
+log.setLevel(logging.ERROR)
+log.addHandler(NullHandler())
+
+#============================ imports =========================================
+
+import heapq
+import itertools
+
+#============================ defines =========================================
+
+#============================ body ============================================
+
+class EventQueue(object):
+    ''' base class, keeps the uniqueTag index and the cancelled events '''
+
+    CANCELLED_EVENTS_COMPACT_MIN      = 1024 # min. number of cancelled events before compacting the queue
+
+    def __init__(self):
+
+        # local variables
+        self.eventSeq                  = itertools.count() # FIFO order among events with same asn and priority
+        self.eventsByTag               = {} # indexed by uniqueTag, contains the pending events with that tag
+        self.numEvents                 = 0  # events in the queue, including cancelled ones
+        self.numCancelledEvents        = 0  # cancelled events still in the queue
+
+    def __len__(self):
+        return self.numEvents-self.numCancelledEvents
+
+    #======================== public ==========================================
+
+    def push(self,asn,priority,cb,uniqueTag):
+        ''' add an event, after the events already scheduled with the same asn and priority '''
+        event = [asn,priority,next(self.eventSeq),cb,uniqueTag]
+        self._push(event)
+        self.numEvents += 1
+        if uniqueTag:
+            self.eventsByTag.setdefault(uniqueTag,[]).append(event)
+
+    def peek(self):
+        ''' returns the next event without removing it, None if the queue is empty '''
+        while True:
+            event = self._peek()
+            if event is None or event[3] is not None:
+                return event
+            # drop cancelled event
+            self._pop()
+            self.numEvents          -= 1
+            self.numCancelledEvents -= 1
+
+    def pop(self):
+        ''' removes and returns the next event, None if the queue is empty '''
+        event = self.peek()
+        if event is None:
+            return None
+        self._pop()
+        self.numEvents -= 1
+        if event[4]:
+            events = self.eventsByTag[event[4]]
+            if len(events)==1:
+                del self.eventsByTag[event[4]]
+            else:
+                events.remove(event)
+        return event
+
+    def remove(self,uniqueTag,exceptAsn=None):
+        ''' cancel the events with that uniqueTag, except those at exceptAsn '''
+        events = self.eventsByTag.get(uniqueTag)
+        if not events:
+            return
+
+        remaining = []
+        for event in events:
+            if event[0]==exceptAsn:
+                remaining += [event]
+            else:
+                event[3] = None
+                self.numCancelledEvents += 1
+
+        if remaining:
+            self.eventsByTag[uniqueTag] = remaining
+        else:
+            del self.eventsByTag[uniqueTag]
+
+        # rebuild the queue when it is mostly made of cancelled events
+        if self.numCancelledEvents>self.CANCELLED_EVENTS_COMPACT_MIN and 2*self.numCancelledEvents>self.numEvents:
+            self._compact()
+            self.numEvents          -= self.numCancelledEvents
+            self.numCancelledEvents  = 0
+
+    #======================== private =========================================
+
+    def _push(self,event):
+        raise NotImplementedError()
+
+    def _peek(self):
+        raise NotImplementedError()
+
+    def _pop(self):
+        raise NotImplementedError()
+
+    def _compact(self):
+        raise NotImplementedError()
+
+class HeapEventQueue(EventQueue):
+    ''' binary heap, O(log n) insert and pop '''
+
+    def __init__(self):
+
+        # initialize parent class
+        EventQueue.__init__(self)
+
+        # local variables
+        self.heap                      = []
+
+    def _push(self,event):
+        heapq.heappush(self.heap,event)
+
+    def _peek(self):
+        return self.heap[0] if self.heap else None
+
+    def _pop(self):
+        heapq.heappop(self.heap)
+
+    def _compact(self):
+        self.heap = [e for e in self.heap if e[3] is not None]
+        heapq.heapify(self.heap)
+
+class CalendarEventQueue(EventQueue):
+    '''
+    calendar queue with one bucket per ASN over a window of windowSize ASNs,
+    and an overflow heap for the events further in the future. Insert and pop
+    are amortized O(1) when most events fall within the window.
+    '''
+
+    def __init__(self,windowSize):
+
+        # initialize parent class
+        EventQueue.__init__(self)
+
+        # store params
+        self.windowSize                = windowSize
+
+        # local variables
+        self.buckets                   = [[] for _ in range(windowSize)] # indexed by asn%windowSize, heap of the events at that asn
+        self.overflow                  = [] # heap of the events at asn>=base+windowSize
+        self.base                      = 0  # lowest asn which can be in the buckets
+        self.numInBuckets              = 0
+
+    def _push(self,event):
+        asn = event[0]
+        if asn<self.base:
+            # a peek moved the window up to the next event, past this asn
+            self._rewind(asn)
+        if asn<self.base+self.windowSize:
+            heapq.heappush(self.buckets[asn%self.windowSize],event)
+            self.numInBuckets += 1
+        else:
+            heapq.heappush(self.overflow,event)
+
+    def _peek(self):
+        if not self.numInBuckets:
+            if not self.overflow:
+                return None
+            # jump straight to the next event in the future
+            self._advance(self.overflow[0][0])
+
+        # find the next non-empty bucket
+        bucket = self.buckets[self.base%self.windowSize]
+        while not bucket:
+            self._advance(self.base+1)
+            bucket = self.buckets[self.base%self.windowSize]
+        return bucket[0]
+
+    def _pop(self):
+        heapq.heappop(self.buckets[self.base%self.windowSize])
+        self.numInBuckets -= 1
+
+    def _compact(self):
+        for i in range(self.windowSize):
+            bucket = self.buckets[i]
+            if bucket:
+                self.buckets[i] = [e for e in bucket if e[3] is not None]
+                heapq.heapify(self.buckets[i])
+        self.overflow = [e for e in self.overflow if e[3] is not None]
+        heapq.heapify(self.overflow)
+        self.numInBuckets = sum([len(b) for b in self.buckets])
+
+    def _rewind(self,base):
+        ''' move the window back to start at base, moving the events past its end into the overflow heap '''
+        self.base = base
+        for i in range(self.windowSize):
+            bucket = self.buckets[i]
+            # all the events of a bucket have the same asn
+            if bucket and bucket[0][0]>=self.base+self.windowSize:
+                for event in bucket:
+                    heapq.heappush(self.overflow,event)
+                self.numInBuckets -= len(bucket)
+                self.buckets[i]    = []
+
+    def _advance(self,base):
+        ''' move the window to start at base, moving overflow events into the buckets '''
+        self.base = base
+        while self.overflow and self.overflow[0][0]<self.base+self.windowSize:
+            event = heapq.heappop(self.overflow)
+            heapq.heappush(self.buckets[event[0]%self.windowSize],event)
+            self.numInBuckets += 1
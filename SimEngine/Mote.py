@@ -22,14 +22,15 @@ log.addHandler(NullHandler())
 #============================ imports =========================================
 
 import copy
-import random
+import bisect
 import threading
 import math
+import numpy as np
 
 import SimEngine
-import SimSettings
-import Propagation
 import Topology
+import Schedule
+import Packet
 
 #============================ defines =========================================
 
@@ -107,16 +108,19 @@ class Mote(object):
     CHARGE_RxDataTxAck_uC              = 76.90
     CHARGE_RxData_uC                   = 64.65
     
-    def __init__(self,id):
+    def __init__(self,id,context):
          
         # store params
         self.id                        = id
         # local variables
-        self.dataLock                  = threading.RLock()
-        
-        self.engine                    = SimEngine.SimEngine()
-        self.settings                  = SimSettings.SimSettings()
-        self.propagation               = Propagation.Propagation()
+        self.engine                    = context.engine
+        self.settings                  = context.settings
+        self.random                    = context.random
+        if self.settings.gui:
+            self.dataLock              = threading.RLock()
+        else:
+            self.dataLock              = SimEngine.NoLock()
+        self.propagation               = context.propagation
 	
         # app
         self.pkPeriod                  = self.settings.pkPeriod     
@@ -172,11 +176,11 @@ class Mote(object):
         self.sixtopPdrThreshold           = self.settings.sixtopPdrThreshold
         self.sixtopHousekeepingPeriod  = self.settings.sixtopHousekeepingPeriod
         # tsch
-        self.txQueue                   = []
-	self.txSharedQueue             = []
+        self.txQueue                   = Packet.PacketQueue()
+	self.txSharedQueue             = Packet.PacketQueue()
         self.pktToSend                 = []             #list of packets to send in one ts (in different channels)	
 	self.pendingAck		       = [] 		#record the expected ack in a timeslot (for the different channels when num radios > 1)
-        self.schedule                  = {}             # indexed by ts and ch  contains info of the all the channels in each ts 
+        self.schedule                  = Schedule.Schedule(self.engine.cellOccupancy,id) # indexed by ts and ch  contains info of the all the channels in each ts 
         self.scheduleNeigborhood       = {}             # indexed by neighbour contains the cells used in my neighborhood  
 	self.numVisibleNeighbors=0			#tracks the number of PHY neighbors of a more
 
@@ -190,10 +194,11 @@ class Mote(object):
         self.antennaGain               = 0                     # dBi
         self.minRssi                   = self.settings.minRssi # dBm
         self.noisepower                = -105                  # dBm
-        self.drift                     = random.uniform(-self.RADIO_MAXDRIFT, self.RADIO_MAXDRIFT)
+        self.drift                     = self.random.uniform(-self.RADIO_MAXDRIFT, self.RADIO_MAXDRIFT)
         # wireless
-        self.RSSI                      = {}                    # indexed by neighbor
-        self.PDR                       = {}                    # indexed by neighbor
+        self.RSSI                      = self.engine.linkRSSI[id] # indexed by neighbor id
+        self.PDR                       = self.engine.linkPDR[id]  # indexed by neighbor id
+        self.neighborIds               = []                       # ids of the motes with PDR>0, increasing
 
         # location
 
@@ -210,7 +215,7 @@ class Mote(object):
         self.chargeConsumed            = 0
 
 	#phy        
-	self.staticPhys       = {}	#save the initial value form this node with it's neighbours
+	self.staticPhys       = self.engine.linkStaticPhys[id]	#save the initial value form this node with it's neighbours, indexed by neighbor id
 	#PDR taken in account to average numACK when there is still no acks
 	self.firstPDR={}
 
@@ -276,14 +281,14 @@ class Mote(object):
                 if not firstPacket:
 		    if self.settings.trafficType=="constant":
                     	# compute random delay
-                    	delay            = self.pkPeriod*(1+random.uniform(-self.settings.pkPeriodVar,self.settings.pkPeriodVar))
+                    	delay            = self.pkPeriod*(1+self.random.uniform(-self.settings.pkPeriodVar,self.settings.pkPeriodVar))
 
 		    if self.settings.trafficType=="paretovariable":
-			delay = random.paretovariate(self.a) * self.m
+			delay = self.random.paretovariate(self.a) * self.m
                 else:
                     # compute initial time in terms of the id for a secuential start
 		    #(to speed up the process, take in account the num shared cells and the num radios)		    
-                    delay = 1 + 10*random.random()+(2*self.id/(self.settings.numSHAREDCells*self.settings.numRadios))		    
+                    delay = 1 + 10*self.random.random()+(2*self.id/(self.settings.numSHAREDCells*self.settings.numRadios))		    
                 assert delay>0   
 
                 self.engine.scheduleIn(
@@ -297,14 +302,14 @@ class Mote(object):
         ''' create an event that is inserted into the simulator engine to send a data burst'''
 	
 	#burstTimestamp is neglected. Instead used a random value for each mote
-	asndelay=int(random.uniform(1,199))*101+self.engine.asn	#assuming 200 cycles of experiment
+	asndelay=int(self.random.uniform(1,199))*101+self.engine.asn	#assuming 200 cycles of experiment
 	
         # schedule numPacketsBurst packets at burstTimestamp
         for i in xrange(self.settings.numPacketsBurst):
 	    self.engine.scheduleAtAsn(
                 asn         = asndelay,
                 cb          = self._app_action_enqueueData,
-                uniqueTag   = (self.id,'_app_action_enqueueData_burst{0}'.format(asndelay*random.random())),
+                uniqueTag   = (self.id,'_app_action_enqueueData_burst{0}'.format(asndelay*self.random.random())),
                 priority    = 2,
             )
 
@@ -331,7 +336,7 @@ class Mote(object):
 
 	if self.settings.mobilityModel=='RWM': #Random Walk Model (Brownian motion)
 		s=16
-		speed=float(random.uniform(s*0.8,s*1.2))
+		speed=float(self.random.uniform(s*0.8,s*1.2))
 		div=1000/speed
 
 		prevx=self.x
@@ -339,7 +344,7 @@ class Mote(object):
 		correctlyMoved=False
 		while not correctlyMoved:
 
-			rads=2*3.14159*random.random()
+			rads=2*3.14159*self.random.random()
 			xdelta=math.cos(rads)/div
 			ydelta=math.sin(rads)/div
 			if self.x+xdelta<self.settings.squareSide and self.y+ydelta<self.settings.squareSide:
@@ -369,7 +374,7 @@ class Mote(object):
 		prevy=self.y	#remember previous location
 
 		#calculated speed for the mote in this RP movement
-		speed1=float(random.uniform(s*0.9,s*1.1))*5
+		speed1=float(self.random.uniform(s*0.9,s*1.1))*5
 						
 		#next move
 		div=1000/speed1
@@ -388,7 +393,7 @@ class Mote(object):
 		#resulting angle
 		alfatot=math.atan2((xdelta+repX),(ydelta+repY))
 		
-		sran=float(random.uniform(s*0.8,s*1.2))				
+		sran=float(self.random.uniform(s*0.8,s*1.2))				
 		xdelta_mov=math.sin(alfatot)*(sran/1000)	#x, vector result with speed constant: 10 mps 
 		ydelta_mov=math.cos(alfatot)*(sran/1000)	#y, vector result with speed constant: 10 mps
 								
@@ -397,7 +402,7 @@ class Mote(object):
 			self.setLocation(self.x+xdelta_mov,self.y+ydelta_mov)							
 		
 			#RM component
-			rads=2*3.14159*random.random()	#random angle
+			rads=2*3.14159*self.random.random()	#random angle
 
 			#constant speed of s
 			xdelta=math.sin(rads)*(s/1000)	
@@ -520,14 +525,14 @@ class Mote(object):
             self.probePacketsGenerated+=1
 
 	if self.getTxCells():	#cheking if there are tx cells for new packets
-	    newPacket = {
-		'source':	  self,
-		'dest':		  self.preferredParent,
-	        'asn':            self.engine.getAsn(),
-	        'type':           self.APP_TYPE_DATA,
-	        'payload':        [self.id,self.engine.getAsn(),1], # the payload is used for latency and number of hops calculation
-	        'retriesLeft':    self.TSCH_MAXTXRETRIES
-	    }
+	    newPacket = Packet.Packet(
+		source         = self,
+		dest           = self.preferredParent,
+	        asn            = self.engine.getAsn(),
+	        type           = self.APP_TYPE_DATA,
+	        payload        = (self.id,self.engine.getAsn(),1), # the payload is used for latency and number of hops calculation
+	        retriesLeft    = self.TSCH_MAXTXRETRIES
+	    )
 	                  
 	    # enqueue packet in TSCH queue
 	    isEnqueued = self._tsch_enqueue(newPacket,None)
@@ -558,14 +563,14 @@ class Mote(object):
             ts     = asn%self.settings.slotframeLength
             
             if not firstDIO:	
-		delay=int(math.ceil(random.uniform(0.5 * self.settings.dioPeriod*self.moteConnectedDioPeriodIncreaseFactor, 1.5 * self.settings.dioPeriod*self.moteConnectedDioPeriodIncreaseFactor) / (self.settings.slotDuration)))
+		delay=int(math.ceil(self.random.uniform(0.5 * self.settings.dioPeriod*self.moteConnectedDioPeriodIncreaseFactor, 1.5 * self.settings.dioPeriod*self.moteConnectedDioPeriodIncreaseFactor) / (self.settings.slotDuration)))
 		#once the mote has found a parent and has sent his corresponding DIO increase the DIO period to reduce overhead 
 		if self.preferredParent != None or self.id==0:
 			if self.moteConnectedDioPeriodIncreaseFactor<10:
 		            self.moteConnectedDioPeriodIncreaseFactor=self.moteConnectedDioPeriodIncreaseFactor*2.2
             else:
 		if self.id!=0:
-			delay=int(math.ceil(random.uniform(0.5 * self.settings.dioPeriod, 1.5 * self.settings.dioPeriod) / (self.settings.slotDuration)))
+			delay=int(math.ceil(self.random.uniform(0.5 * self.settings.dioPeriod, 1.5 * self.settings.dioPeriod) / (self.settings.slotDuration)))
 	        else:
                 	delay=100
 
@@ -592,10 +597,7 @@ class Mote(object):
 		    if (self.settings.topology!='star') or (self.settings.topology=='star' and self.id==0) :
 
 			    #look for RPL packets in the shared queue (a shared queue is used to increase the performance)
-			    dioAlreadyInQueue=False
-			    for packet in self.txSharedQueue:
-			    	if packet['type']=='RPLTRAFFIC':
-				    dioAlreadyInQueue=True
+			    dioAlreadyInQueue=self.txSharedQueue.countType('RPLTRAFFIC')>0
 			    #if RPL packet already in the queue, do not enqueue			    
 			    if dioAlreadyInQueue==False:
 				self._rpl_action_enqueueDIO(alreadyinqueue=False)
@@ -610,14 +612,14 @@ class Mote(object):
 	if self.getSharedCells():
 	    if not alreadyinqueue:
 
-		    newPacket = {
-			'source':	  self,
-			'dest':		  None,
-			'asn':            self.engine.getAsn(),
-			'type':           self.RPL_TRAFFIC,
-			'payload':        [self.id,self.engine.getAsn(),self.rank], # the payload is the id, the asn and the rpl rank
-			'retriesLeft':    1
-		    }
+		    newPacket = Packet.Packet(
+			source         = self,
+			dest           = None,
+			asn            = self.engine.getAsn(),
+			type           = self.RPL_TRAFFIC,
+			payload        = [self.id,self.engine.getAsn(),self.rank], # the payload is the id, the asn and the rpl rank
+			retriesLeft    = 1
+		    )
 		    
 		    # enqueue packet in TSCH queue
 		    isEnqueued = self._tsch_enqueue(newPacket,None)
@@ -629,8 +631,8 @@ class Mote(object):
 	    else:
 		n=0
 		for packet in self.txSharedQueue:
-		    if packet['type']=='RPLTRAFFIC':
-			packet['payload'][2]=self.rank	#update the rank in the packet to send the most recent one
+		    if packet.type=='RPLTRAFFIC':
+			packet.payload[2]=self.rank	#update the rank in the packet to send the most recent one
 			n+=1	
 		assert n<=1	#it is expected to be only one RPL packet at the same time 
 	else:
@@ -803,7 +805,7 @@ class Mote(object):
 	    
 	    # add TX cells to the new neighbor 
 	    if self.rplParentChangeOperationInCourse:
-		tsList=[(ts,ch) for (ts,ch), cell in self.schedule.iteritems() if cell['neighbor']==self.previousParent and cell['dir']==self.DIR_TX]
+		tsList=[(ts,ch) for (ts,ch), cell in self.schedule.iteritems() if cell.neighbor==self.previousParent and cell.dir==self.DIR_TX]
 		if len(tsList)==0:
 		    self.rplParentChangeOperationInCourse=False
 		else:
@@ -832,7 +834,7 @@ class Mote(object):
         if firstOtf:
 	    delay=0.01	#applying small delay
         else:
-            delay=self.otfHousekeepingPeriod*(0.9+0.2*random.random())
+            delay=self.otfHousekeepingPeriod*(0.9+0.2*self.random.random())
 
         self.engine.scheduleIn(
             delay       = delay,
@@ -851,10 +853,10 @@ class Mote(object):
             
 	    #if there is an RPL operation in course, do not perform SF0 and arrange cell first
 	    if self.rplParentChangeOperationInCourse:
-			cellsToNewParent=[(ts,ch) for (ts,ch), cell in self.schedule.iteritems() if cell['neighbor']==self.preferredParent and cell['dir']==self.DIR_TX]
+			cellsToNewParent=[(ts,ch) for (ts,ch), cell in self.schedule.iteritems() if cell.neighbor==self.preferredParent and cell.dir==self.DIR_TX]
 			#if have cells with the new parent, remove the cells with the old parent
 			if len(cellsToNewParent)>0:
-				tsList=[(ts,ch) for (ts,ch), cell in self.schedule.iteritems() if cell['neighbor']==self.previousParent and cell['dir']==self.DIR_TX]
+				tsList=[(ts,ch) for (ts,ch), cell in self.schedule.iteritems() if cell.neighbor==self.previousParent and cell.dir==self.DIR_TX]
 				if len(tsList)>0:
 				    self._sixtop_removeCells_request_action(self.previousParent,len(tsList),tsList)
 				else:
@@ -862,7 +864,7 @@ class Mote(object):
 			#if I dont have cells with the new parent, first get cells to the new parent
 			else:
 			    if self.sixtopState==self.IDLE:
-				tsList=[(ts,ch) for (ts,ch), cell in self.schedule.iteritems() if cell['neighbor']==self.previousParent and cell['dir']==self.DIR_TX]
+				tsList=[(ts,ch) for (ts,ch), cell in self.schedule.iteritems() if cell.neighbor==self.previousParent and cell.dir==self.DIR_TX]
 				self._sixtop_cell_reservation_request_action(self.preferredParent,len(tsList))
 		
 	    #perform SF0 normally	    
@@ -871,7 +873,7 @@ class Mote(object):
 		    # calculate the "moving average" incoming traffic, in pkts since last cycle, per neighbor
 
 		    # collect all neighbors I have RX cells to
-		    rxNeighbors = [cell['neighbor'] for ((ts,ch),cell) in self.schedule.items() if cell['dir']==self.DIR_RX]
+		    rxNeighbors = [cell.neighbor for ((ts,ch),cell) in self.schedule.items() if cell.dir==self.DIR_RX]
 
 		    # remove duplicates
 		    rxNeighbors = list(set(rxNeighbors))
@@ -1006,7 +1008,7 @@ class Mote(object):
     def _sixtop_schedule_housekeeping(self):
         
         self.engine.scheduleIn(
-            delay       = self.sixtopHousekeepingPeriod*(0.9+0.2*random.random()),
+            delay       = self.sixtopHousekeepingPeriod*(0.9+0.2*self.random.random()),
             cb          = self._sixtop_action_housekeeping,
             uniqueTag   = (self.id,'_sixtop_action_housekeeping'),
             priority    = 5,
@@ -1020,7 +1022,7 @@ class Mote(object):
 	        #=== tx-triggered housekeeping 
 		
 		# collect all neighbors I have TX cells to
-		txNeighbors = [cell['neighbor'] for ((ts,ch),cell) in self.schedule.items() if cell['dir']==self.DIR_TX]
+		txNeighbors = [cell.neighbor for ((ts,ch),cell) in self.schedule.items() if cell.dir==self.DIR_TX]
 		
 		# remove duplicates
 		txNeighbors = list(set(txNeighbors))
@@ -1028,7 +1030,7 @@ class Mote(object):
 		for neighbor in txNeighbors:
 		    nowCells = self.numCellsToNeighbors.get(neighbor,0)
 
-		    assert nowCells == len([t for ((t,ch),c) in self.schedule.items() if c['dir']==self.DIR_TX and c['neighbor']==neighbor])
+		    assert nowCells == len(self.schedule.getCellsByNeighbor(self.DIR_TX,neighbor))
 		
 		# do some housekeeping for each neighbor
 		if self.sendingPacketsTriggered==True:
@@ -1039,14 +1041,14 @@ class Mote(object):
 	        #=== rx-triggered housekeeping 
 	        
 	        # collect neighbors from which I have RX cells that is detected as collision cell
-	        rxNeighbors = [cell['neighbor'] for ((ts,ch),cell) in self.schedule.items() if cell['dir']==self.DIR_RX and cell['rxDetectedCollision']]
+	        rxNeighbors = [cell.neighbor for ((ts,ch),cell) in self.schedule.items() if cell.dir==self.DIR_RX and cell.rxDetectedCollision]
 	        
 	        # remove duplicates
 	        rxNeighbors = list(set(rxNeighbors))
 
 	        for neighbor in rxNeighbors:
 	            nowCells = self.numCellsFromNeighbors.get(neighbor,0)
-	            assert nowCells == len([t for ((t,ch),c) in self.schedule.items() if c['dir']==self.DIR_RX and c['neighbor']==neighbor])
+	            assert nowCells == len(self.schedule.getCellsByNeighbor(self.DIR_RX,neighbor))
 	            
 	        # do some housekeeping for each neighbor
 		#disable rx-triggered housekeeping for the moment
@@ -1066,22 +1068,22 @@ class Mote(object):
         # pdr for each cell
         cell_pdr = []
         for ((ts,ch),cell) in self.schedule.items():
-            if cell['neighbor']==neighbor and cell['dir']==self.DIR_TX:
+            if cell.neighbor==neighbor and cell.dir==self.DIR_TX:
                 # this is a TX cell to that neighbor
                 # abort if not enough TX to calculate meaningful PDR
-                if cell['numTx']<self.NUM_SUFFICIENT_TX:
+                if cell.numTx<self.NUM_SUFFICIENT_TX:
                     continue
                 
                 # calculate pdr for that cell
-                recentHistory = cell['history'][-self.NUM_MAX_HISTORY:]
+                recentHistory = cell.history
                 pdr = float(sum(recentHistory)) / float(len(recentHistory))
 
                 # store result
                 cell_pdr += [((ts,ch),pdr)]
 
         # pdr for the bundle as a whole
-        bundleNumTx     = sum([len(cell['history'][-self.NUM_MAX_HISTORY:]) for cell in self.schedule.values() if cell['neighbor']==neighbor and cell['dir']==self.DIR_TX])
-        bundleNumTxAck  = sum([sum(cell['history'][-self.NUM_MAX_HISTORY:]) for cell in self.schedule.values() if cell['neighbor']==neighbor and cell['dir']==self.DIR_TX])
+        bundleNumTx     = sum([len(cell.history) for cell in self.schedule.getCellsByNeighbor(self.DIR_TX,neighbor).values()])
+        bundleNumTxAck  = sum([sum(cell.history) for cell in self.schedule.getCellsByNeighbor(self.DIR_TX,neighbor).values()])
         if bundleNumTx<self.NUM_SUFFICIENT_TX:
             bundlePdr   = None
         else:
@@ -1117,8 +1119,8 @@ class Mote(object):
             assert worst_pdr!=None
             
             # ave pdr for other cells
-            othersNumTx      = sum([len(cell['history'][-self.NUM_MAX_HISTORY:]) for ((ts,ch),cell) in self.schedule.items() if cell['neighbor']==neighbor and cell['dir']==self.DIR_TX and ts != worst_tsch])
-            othersNumTxAck   = sum([sum(cell['history'][-self.NUM_MAX_HISTORY:]) for ((ts,ch),cell) in self.schedule.items() if cell['neighbor']==neighbor and cell['dir']==self.DIR_TX and ts != worst_tsch])           
+            othersNumTx      = sum([len(cell.history) for ((ts,ch),cell) in self.schedule.getCellsByNeighbor(self.DIR_TX,neighbor).items() if ts != worst_tsch])
+            othersNumTxAck   = sum([sum(cell.history) for ((ts,ch),cell) in self.schedule.getCellsByNeighbor(self.DIR_TX,neighbor).items() if ts != worst_tsch])           
             if othersNumTx<self.NUM_SUFFICIENT_TX:
                 ave_pdr      = None
             else:
@@ -1192,7 +1194,7 @@ class Mote(object):
         from a neighbor it did not expect ('rxDetectedCollision')
         '''     
         
-        rxCells = [((ts,ch),cell) for ((ts,ch),cell) in self.schedule.items() if cell['dir']==self.DIR_RX and cell['rxDetectedCollision'] and cell['neighbor']==neighbor]
+        rxCells = [((ts,ch),cell) for ((ts,ch),cell) in self.schedule.items() if cell.dir==self.DIR_RX and cell.rxDetectedCollision and cell.neighbor==neighbor]
    
         relocation = False
         for (ts,ch),cell in rxCells:
@@ -1228,7 +1230,7 @@ class Mote(object):
 		else:
 		    if self.sixtopState==self.SIX_STATE_WAIT_ADDRESPONSE:
 			self.timeoutAdd+=1
-		        if self.timeoutAdd>max( random.randint(0,4)+math.ceil(self.settings.numMotes*(math.floor(self.maxWinShared/2))/(self.settings.numSHAREDCells*self.settings.numRadios*self.settings.otfHousekeepingPeriod)),self.TSCH_MAXTXRETRIES ): 
+		        if self.timeoutAdd>max( self.random.randint(0,4)+math.ceil(self.settings.numMotes*(math.floor(self.maxWinShared/2))/(self.settings.numSHAREDCells*self.settings.numRadios*self.settings.otfHousekeepingPeriod)),self.TSCH_MAXTXRETRIES ): 
 				self.timeoutAdd=0
 				self.sixtopState=self.IDLE
 				self.cellsPendingOperationType=None
@@ -1268,48 +1270,21 @@ class Mote(object):
 
 	    if self.settings.scheduler=='none':
 
-		availableCells = []
-		allCells = []
-		
-		#generate all cells: numChans X slotframe
-		for x in range(0,self.settings.slotframeLength):
-                    for y in range(0,self.settings.numChans):
-		            cell=['0','0']
-		            cell[0]=x
-		            cell[1]=y
-		            allCells.append(cell)
-
-	
-		availableCells=list(allCells)
-	
-		#get available cells
-		for cell in allCells:
-		    if cell in availableCells: #just in case the cells has been already removed
-			#remove cells that are in my schedule
-		        if (cell[0],cell[1]) in self.schedule.keys():
-			    availableCells.remove([cell[0],cell[1]])
-
-			    #check the radio capabilities				
-			    cellsAtThatTs=[c for c in availableCells if c[0]==cell[0]]
-			    myCellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
-			    if (len(cellsAtThatTs)+len(myCellsAtThatTs)-1)>(self.settings.numRadios-1):
-				removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
-				#if not enough radios, remove also these cells to avoid the neighbor choosing them
-				for celltoremove in removeCandidates:
-				    availableCells.remove([celltoremove[0],celltoremove[1]])
+		#get available cells, among all cells: numChans X slotframe
+		availableCells = self._sixtop_getAvailableCells(self._sixtop_getAllCells())
 
 		#enqueue packet first round
 		self.sixtopState=self.SIX_STATE_SENDING_REQUEST
 		trafficType=self.SIXTOP_CMD_TRAFFIC	
 		sixtopcmd=self.IANA_6TOP_CMD_ADD
-	    	newPacket = {
-			'source':	  self,
-			'dest':		  neighbor,
-			'asn':            self.engine.getAsn(),
-			'type':           trafficType,
-			'payload':        [self.id,self.engine.getAsn(),sixtopcmd,0,numCells,direction,availableCells,self.settings.scheduler, neighbor],
-			'retriesLeft':    self.TSCH_MAXTXRETRIES
-	   	 }# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction, the candidate list in the sender the scheduler and the neighbor, usally the preferred parent
+	    	newPacket = Packet.Packet(
+			source         = self,
+			dest           = neighbor,
+			asn            = self.engine.getAsn(),
+			type           = trafficType,
+			payload        = [self.id,self.engine.getAsn(),sixtopcmd,0,numCells,direction,availableCells,self.settings.scheduler, neighbor],
+			retriesLeft    = self.TSCH_MAXTXRETRIES
+	   	 )# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction, the candidate list in the sender the scheduler and the neighbor, usally the preferred parent
 
 		#set states
 		assert self.cellsPendingOperation==None
@@ -1338,11 +1313,11 @@ class Mote(object):
                     # 1) look for all reception timeslots
                     if neighbor == self.preferredParent:
                         for (ts, ch), cell in self.schedule.iteritems():
-                            if cell['dir'] == self.DIR_RX:
-                                if cell['neighbor'] in rxNeighborsTimeslots:
-                                    rxNeighborsTimeslots[cell['neighbor']].append(ts)
+                            if cell.dir == self.DIR_RX:
+                                if cell.neighbor in rxNeighborsTimeslots:
+                                    rxNeighborsTimeslots[cell.neighbor].append(ts)
                                 else:
-                                    rxNeighborsTimeslots[cell['neighbor']] = [ts]
+                                    rxNeighborsTimeslots[cell.neighbor] = [ts]
 
                     # 2) look for largest gap
                     for rxNeighbor, tsList in rxNeighborsTimeslots.iteritems():
@@ -1361,7 +1336,7 @@ class Mote(object):
                             rxNbs = [rxNb for rxNb in handledrxNbs]
                             handledrxNbs = []
                         # find random neighbor
-                        index = random.randint(0, len(rxNbs)-1)
+                        index = self.random.randint(0, len(rxNbs)-1)
                         if rxNbs[index] not in reservationTimeslots:
                             reservationTimeslots[rxNbs[index]] = 0
                         reservationTimeslots[rxNbs[index]] += 1 # give this neighbor a cell
@@ -1374,7 +1349,7 @@ class Mote(object):
                     # 4) now finally search for the actual cells for each neighbor
                     for rxNeighbor, timeslotsToReserve in reservationTimeslots.iteritems():
                         nextToGapTimeslot = rxNeighborsLargestGapTimeslot[rxNeighbor] + 1 # + 1, b/c the cell next to the gap
-                        channel = random.randint(0,self.settings.numChans-1)
+                        channel = self.random.randint(0,self.settings.numChans-1)
                         while timeslotsToReserve > 0:
                             # find an available timeslot
                             availableTimeslot = self.getAvailableTimeslot(nextToGapTimeslot, availableTimeslots, cellsListNoDir)
@@ -1393,14 +1368,14 @@ class Mote(object):
                             toReserveRandomly = numCellsExtra - len(cellsListNoDir)
                         while toReserveRandomly > 0:
                             allTSs = range(0, self.settings.slotframeLength)
-                            random.shuffle(allTSs)
-                            # availableTimeslot = self.getAvailableTimeslot(random.randint(0, self.settings.slotframeLength-1), availableTimeslots, None)
+                            self.random.shuffle(allTSs)
+                            # availableTimeslot = self.getAvailableTimeslot(self.random.randint(0, self.settings.slotframeLength-1), availableTimeslots, None)
                             availableTimeslot = None
                             while availableTimeslot is None and len(allTSs) > 0:
                                 # you have to pass cellListNoDir, because in a second iteration of the available cells could be reserved in the previous iteration
                                 randomTS = allTSs.pop()
                                 availableTimeslot = self.getAvailableTimeslot(randomTS, availableTimeslots, cellsListNoDir)
-                                channel = random.randint(0,self.settings.numChans-1)
+                                channel = self.random.randint(0,self.settings.numChans-1)
                                 if availableTimeslot is not None:
                                     if cellsListNoDir == None:
                                         cellsListNoDir = []
@@ -1410,14 +1385,14 @@ class Mote(object):
 		    self.sixtopState=self.SIX_STATE_SENDING_REQUEST
 		    trafficType=self.SIXTOP_CMD_TRAFFIC	
 		    sixtopcmd=self.IANA_6TOP_CMD_ADD
-		    newPacket = {
-			'source':	  self,
-			'dest':		  neighbor,
-			'asn':            self.engine.getAsn(),
-			'type':           trafficType,
-			'payload':        [self.id,self.engine.getAsn(),sixtopcmd,0,numCells,direction,cellsListNoDir,self.settings.scheduler, neighbor], #randomly chosen
-			'retriesLeft':    self.TSCH_MAXTXRETRIES
-		     }# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction, the candidate list in the sender the scheduler and the neighbor, usally the preferred parent
+		    newPacket = Packet.Packet(
+			source         = self,
+			dest           = neighbor,
+			asn            = self.engine.getAsn(),
+			type           = trafficType,
+			payload        = [self.id,self.engine.getAsn(),sixtopcmd,0,numCells,direction,cellsListNoDir,self.settings.scheduler, neighbor], #randomly chosen
+			retriesLeft    = self.TSCH_MAXTXRETRIES
+		     )# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction, the candidate list in the sender the scheduler and the neighbor, usally the preferred parent
 
 		    assert self.cellsPendingOperation==None
 		    assert self.cellsPendingOperationType==None
@@ -1438,48 +1413,22 @@ class Mote(object):
 		assert False
 	    elif self.settings.scheduler=='opt2':	#p-centralized with overlapping when saturation
 
-		availableCells = []
-		allCells = []
-		
-		#generate all cells: numChans X slotframe
-		for x in range(0,self.settings.slotframeLength):
-                    for y in range(0,self.settings.numChans):
-		            cell=['0','0']
-		            cell[0]=x
-		            cell[1]=y
-		            allCells.append(cell)
-
-		availableCells=list(allCells)
-
-		#get available cells
-		for cell in allCells:
-		    if cell in availableCells: #just in case the cells has been already removed
-			#remove cells that are in my schedule
-		        if (cell[0],cell[1]) in self.schedule.keys():
-			    availableCells.remove([cell[0],cell[1]])
-
-			    #check the radio capabilities				
-			    cellsAtThatTs=[c for c in availableCells if c[0]==cell[0]]
-			    myCellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
-			    if (len(cellsAtThatTs)+len(myCellsAtThatTs)-1)>(self.settings.numRadios-1):
-				removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
-				#if not enough radios, remove also these cells to avoid the neighbor choosing them
-				for celltoremove in removeCandidates:
-				    availableCells.remove([celltoremove[0],celltoremove[1]])
+		#get available cells, among all cells: numChans X slotframe
+		availableCells = self._sixtop_getAvailableCells(self._sixtop_getAllCells())
 
 
 		#enqueue packet first round
 		self.sixtopState=self.SIX_STATE_SENDING_REQUEST
 		trafficType=self.SIXTOP_CMD_TRAFFIC	
 		sixtopcmd=self.IANA_6TOP_CMD_ADD
-	    	newPacket = {
-			'source':	  self,
-			'dest':		  neighbor,
-			'asn':            self.engine.getAsn(),
-			'type':           trafficType,
-			'payload':        [self.id,self.engine.getAsn(),sixtopcmd,0,numCells,direction,availableCells,self.settings.scheduler, neighbor],
-			'retriesLeft':    self.TSCH_MAXTXRETRIES
-	   	 }# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction, the candidate list in the sender the scheduler and the neighbor, usally the preferred parent
+	    	newPacket = Packet.Packet(
+			source         = self,
+			dest           = neighbor,
+			asn            = self.engine.getAsn(),
+			type           = trafficType,
+			payload        = [self.id,self.engine.getAsn(),sixtopcmd,0,numCells,direction,availableCells,self.settings.scheduler, neighbor],
+			retriesLeft    = self.TSCH_MAXTXRETRIES
+	   	 )# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction, the candidate list in the sender the scheduler and the neighbor, usally the preferred parent
 
 		#set states
 		assert self.cellsPendingOperation==None
@@ -1497,60 +1446,30 @@ class Mote(object):
 		    assert False	#usually the Shared queue is never full since RPL and 6top packages are enqueued smartly	
           
 	    elif self.settings.scheduler=='deBras':
-		availableCells = []
-		allCells = []
-
-		#generate all cells: numChans X slotframe
-		for x in range(0,self.settings.slotframeLength):
-		    for y in range(0,self.settings.numChans):
-			    cell=['0','0']
-			    cell[0]=x
-			    cell[1]=y
-			    allCells.append(cell)
-
-		availableCells=list(allCells)
+		freeCells = self._sixtop_getAllCells()
 
 		#remove the busy cells in my neighborhood
-		for neigh in self.scheduleNeigborhood.keys():
+		for (neigh,neighSchedule) in self.scheduleNeigborhood.items():
 		    if neigh != neighbor:
-			for cell in self.scheduleNeigborhood[neigh].keys():
-			    #avoid unnecessary checks 
-			    if self.scheduleNeigborhood[neigh][(cell[0],cell[1])]['dir']!='SHARED':
-				if [cell[0],cell[1]] in availableCells:		    
-				    if self.scheduleNeigborhood[neigh][(cell[0],cell[1])]['dir']=='RX':
-			    		availableCells.remove([cell[0],cell[1]])
-				    else:
-					if neighbor.getRSSI(neigh)+(-97-(-105)) >= self.minRssi:
-						availableCells.remove([cell[0],cell[1]])
+			freeCells &= ~neighSchedule.rx
+			if neighbor.getRSSI(neigh)+(-97-(-105)) >= self.minRssi:
+			    freeCells &= ~neighSchedule.tx
 
 		#get available cells
-		for cell in allCells:
-		    if cell in availableCells: #just in case the cells has been already removed
-			#remove cells that are in my schedule
-		        if (cell[0],cell[1]) in self.schedule.keys():
-			    availableCells.remove([cell[0],cell[1]])
-
-			    #check the radio capabilities				
-			    cellsAtThatTs=[c for c in availableCells if c[0]==cell[0]]
-			    myCellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
-			    if (len(cellsAtThatTs)+len(myCellsAtThatTs)-1)>(self.settings.numRadios-1):
-				removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
-				#if not enough radios, remove also these cells to avoid the neighbor choosing them
-				for celltoremove in removeCandidates:
-				    availableCells.remove([celltoremove[0],celltoremove[1]])
+		availableCells = self._sixtop_getAvailableCells(freeCells)
 
 		#enqueue packet first round
 		self.sixtopState=self.SIX_STATE_SENDING_REQUEST
 		trafficType=self.SIXTOP_CMD_TRAFFIC
 		sixtopcmd=self.IANA_6TOP_CMD_ADD
-	    	newPacket = {
-			'source':	  self,
-			'dest':		  neighbor,
-			'asn':            self.engine.getAsn(),
-			'type':           trafficType,
-			'payload':        [self.id,self.engine.getAsn(),sixtopcmd,0,numCells,direction,availableCells,self.settings.scheduler, neighbor], 
-			'retriesLeft':    self.TSCH_MAXTXRETRIES
-	   	 }# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction,the candidate list in the sender and the scheduler
+	    	newPacket = Packet.Packet(
+			source         = self,
+			dest           = neighbor,
+			asn            = self.engine.getAsn(),
+			type           = trafficType,
+			payload        = [self.id,self.engine.getAsn(),sixtopcmd,0,numCells,direction,availableCells,self.settings.scheduler, neighbor], 
+			retriesLeft    = self.TSCH_MAXTXRETRIES
+	   	 )# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction,the candidate list in the sender and the scheduler
 		
 		assert self.cellsPendingOperation==None
 		assert self.cellsPendingOperationType==None
@@ -1569,6 +1488,34 @@ class Mote(object):
 		assert False
 
 
+    def _sixtop_getAllCells(self):
+        ''' all cells (slotframeLength x numChans), marked as free '''
+        return np.ones((self.settings.slotframeLength,self.settings.numChans),dtype=bool)
+    
+    def _sixtop_getAvailableCells(self,freeCells):
+        '''
+        candidate cells of an ADD request, as a list of [ts,ch] by increasing
+        ts then ch: the free cells (boolean array indexed by [ts,ch]), except
+        mine and, at the timeslots where I use radios, random cells so I have
+        a radio left for each remaining one. freeCells is modified.
+        '''
+        for ts in self.schedule.getTimeslots():
+            freeAtThatTs   = freeCells[ts]
+            myChsAtThatTs  = [ch for (ch,_) in self.schedule.getCellsAtTs(ts)]
+            for ch in myChsAtThatTs:
+                if freeAtThatTs[ch]: #just in case the cells has been already removed
+                    #remove cells that are in my schedule
+                    freeAtThatTs[ch] = False
+                    
+                    #check the radio capabilities
+                    chsAtThatTs = np.flatnonzero(freeAtThatTs).tolist()
+                    if (len(chsAtThatTs)+len(myChsAtThatTs)-1)>(self.settings.numRadios-1):
+                        #if not enough radios, remove also these cells to avoid the neighbor choosing them
+                        for chToRemove in self.random.sample(chsAtThatTs, len(chsAtThatTs)+len(myChsAtThatTs)-1-(self.settings.numRadios-1)):
+                            freeAtThatTs[chToRemove] = False
+        
+        return np.argwhere(freeCells).tolist()
+    
     def _sixtop_enqueueCMD_DELETE(self,neighbor,numCells,tsList):
 	''' enqueue 6top DELETE packet into stack to be transmitted in a shared or dedicated cell '''
 	with self.dataLock:
@@ -1578,12 +1525,12 @@ class Mote(object):
 		        
 			# worst cell removing initialized by theoretical pdr
 			for ((ts,ch),cell) in self.schedule.iteritems():
-			    if cell['neighbor']==neighbor and cell['dir']==self.DIR_TX:
-				cellPDR = (float(cell['numTxAck'])+(self.getPDR(neighbor)*self.NUM_SUFFICIENT_TX))/(cell['numTx']+self.NUM_SUFFICIENT_TX)
-				scheduleList += [(ts,ch,cell['numTxAck'],cell['numTx'],cellPDR)]
+			    if cell.neighbor==neighbor and cell.dir==self.DIR_TX:
+				cellPDR = (float(cell.numTxAck)+(self.getPDR(neighbor)*self.NUM_SUFFICIENT_TX))/(cell.numTx+self.NUM_SUFFICIENT_TX)
+				scheduleList += [(ts,ch,cell.numTxAck,cell.numTx,cellPDR)]
 
 			# introduce randomness in the cell list order
-			random.shuffle(scheduleList)
+			self.random.shuffle(scheduleList)
 
 			#use always worst cell
 			# triggered only when worst cell selection is due
@@ -1611,14 +1558,14 @@ class Mote(object):
 		self.sixtopState=self.SIX_STATE_SENDING_REQUEST
 		trafficType=self.SIXTOP_CMD_TRAFFIC
 		sixtopcmd=self.IANA_6TOP_CMD_DELETE
-	    	newPacket = {
-			'source':	  self,
-			'dest':		  neighbor,
-			'asn':            self.engine.getAsn(),
-			'type':           trafficType,
-			'payload':        [self.id,self.engine.getAsn(),sixtopcmd,0,tsList,neighbor], 
-			'retriesLeft':    self.TSCH_MAXTXRETRIES
-	   	 }# the payload is the id, the asn, the command and the auxiliar command
+	    	newPacket = Packet.Packet(
+			source         = self,
+			dest           = neighbor,
+			asn            = self.engine.getAsn(),
+			type           = trafficType,
+			payload        = [self.id,self.engine.getAsn(),sixtopcmd,0,tsList,neighbor], 
+			retriesLeft    = self.TSCH_MAXTXRETRIES
+	   	 )# the payload is the id, the asn, the command and the auxiliar command
 		
 		assert self.cellsPendingOperation==None
 		assert self.cellsPendingOperationType==None
@@ -1658,14 +1605,14 @@ class Mote(object):
 		else:
 		    sixtopcmd=self.IANA_6TOP_RC_ERR
 		    self.responseType='ADDERR'
-	    	newPacket = {
-			'source':	  self,
-			'dest':		  neighbor,
-			'asn':            self.engine.getAsn(),
-			'type':           trafficType,
-			'payload':        [self.id,self.engine.getAsn(),sixtopcmd,self.IANA_6TOP_CMD_ADD,len(selectedCells),direction,selectedCells,neighbor], 
-			'retriesLeft':    self.TSCH_MAXTXRETRIES
-	   	 }# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction and the candidate list in the sender
+	    	newPacket = Packet.Packet(
+			source         = self,
+			dest           = neighbor,
+			asn            = self.engine.getAsn(),
+			type           = trafficType,
+			payload        = [self.id,self.engine.getAsn(),sixtopcmd,self.IANA_6TOP_CMD_ADD,len(selectedCells),direction,selectedCells,neighbor], 
+			retriesLeft    = self.TSCH_MAXTXRETRIES
+	   	 )# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction and the candidate list in the sender
 		 #now the auxiliar command is used for refer the RC SUCCESS to CMD_ADD
 	
 		assert self.cellsPendingOperation==None
@@ -1695,14 +1642,14 @@ class Mote(object):
 		else:
 		    sixtopcmd=self.IANA_6TOP_RC_ERR
 		    self.responseType='DELETEERR'
-	    	newPacket = {
-			'source':	  self,
-			'dest':		  neighbor,
-			'asn':            self.engine.getAsn(),
-			'type':           trafficType,
-			'payload':        [self.id,self.engine.getAsn(),sixtopcmd,self.IANA_6TOP_CMD_DELETE,cellsForDeletion,neighbor], 
-			'retriesLeft':    self.TSCH_MAXTXRETRIES
-	   	}# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction and the candidate list in the sender
+	    	newPacket = Packet.Packet(
+			source         = self,
+			dest           = neighbor,
+			asn            = self.engine.getAsn(),
+			type           = trafficType,
+			payload        = [self.id,self.engine.getAsn(),sixtopcmd,self.IANA_6TOP_CMD_DELETE,cellsForDeletion,neighbor], 
+			retriesLeft    = self.TSCH_MAXTXRETRIES
+	   	)# the payload is the id, the asn, the command, the auxiliar command, the number of cells and the direction and the candidate list in the sender
 		#now the auxiliar command is used for refer the RC SUCCESS to CMD_DELETE
 
 		assert self.cellsPendingOperation==None
@@ -1748,22 +1695,22 @@ class Mote(object):
 	    		#remove my busy cells
 	    		for cell in candidatesNeigh:
 			    if cell in candidates: #just in case the cells has been already removed
-				if (cell[0],cell[1]) in self.schedule.keys():
+				if (cell[0],cell[1]) in self.schedule:
 				    candidates.remove([cell[0],cell[1]])
 				    cellsAtThatTs=[c for c in candidates if c[0]==cell[0]]
 				    myCellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
 				    if (len(cellsAtThatTs)+len(myCellsAtThatTs)-1)>(self.settings.numRadios-1):
-					removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
+					removeCandidates=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
 					for celltoremove in removeCandidates:
 					    candidates.remove([celltoremove[0],celltoremove[1]])
 
 				else:#check if there are other cells in the same ts but different channel
 				    for i in range(0,self.settings.numChans):								
-				        if (cell[0],i) in self.schedule.keys():
+				        if (cell[0],i) in self.schedule:
 					    cellsAtThatTs=[c for c in candidates if c[0]==cell[0]]
 				    	    myCellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
 					    if (len(cellsAtThatTs)+len(myCellsAtThatTs)-1)>(self.settings.numRadios-1):
-						removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
+						removeCandidates=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
 						for celltoremove in removeCandidates:
 						    candidates.remove([celltoremove[0],celltoremove[1]])
 
@@ -1779,7 +1726,7 @@ class Mote(object):
 				if len(candidates)>0:
 
 					#select from candidates, a random one and remove it from the candidates
-					selcel=random.sample(candidates, 1)[0]
+					selcel=self.random.sample(candidates, 1)[0]
 					candidates.remove([selcel[0],selcel[1]])
 
 					selectedCells[n]=selcel
@@ -1787,7 +1734,7 @@ class Mote(object):
 					
 					#remove also the cells asociated with this cell according to the radios
 					if len(cellsAtThatTs)>(self.settings.numRadios-1):
-						removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+						removeCandidates=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 						for celltoremove in removeCandidates:
 						    candidates.remove([celltoremove[0],celltoremove[1]])	                       	
 					n+=1
@@ -1815,47 +1762,39 @@ class Mote(object):
 	    		#remove my busy cells
 	    		for cell in candidatesNeigh:
 			    if cell in candidates: #just in case the cells has been already removed
-				if (cell[0],cell[1]) in self.schedule.keys():
+				if (cell[0],cell[1]) in self.schedule:
 				    candidates.remove([cell[0],cell[1]])
 				    cellsAtThatTs=[c for c in candidates if c[0]==cell[0]]
 				    myCellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
 				    if (len(cellsAtThatTs)+len(myCellsAtThatTs)-1)>(self.settings.numRadios-1):
 
-					removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
+					removeCandidates=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
 					for celltoremove in removeCandidates:
 						candidates.remove([celltoremove[0],celltoremove[1]])
 				else:#check if there are other cells in the same ts but different channel
 				    for i in range(0,self.settings.numChans):
 									
-				            if (cell[0],i) in self.schedule.keys():
+				            if (cell[0],i) in self.schedule:
 						cellsAtThatTs=[c for c in candidates if c[0]==cell[0]]
 				    		myCellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
 						if (len(cellsAtThatTs)+len(myCellsAtThatTs)-1)>(self.settings.numRadios-1):
-							removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
+							removeCandidates=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
 							for celltoremove in removeCandidates:
 								candidates.remove([celltoremove[0],celltoremove[1]])
 			
-		        #removing colliding cells using total knowledge
-		        for mote in self.engine.motes:    
-		            if mote != self and mote != neighbor:
-				    if self.getRSSI(mote)+(-97-(-105)) >= mote.minRssi:		#avoid a mote interferes with me
-					for cell in mote.schedule.keys():
-					    if mote.schedule[(cell[0],cell[1])]['dir']!='SHARED':
-						if [cell[0],cell[1]] in candidates:
-						    if mote.schedule[(cell[0],cell[1])]['dir']=='TX':
-							candidates.remove([cell[0],cell[1]])
-						    else:					#avoid my nieghbor interferes with a mote
-							if mote.getRSSI(neighbor)+(-97-(-105)) >= self.minRssi:
-							    candidates.remove([cell[0],cell[1]])
-				    if neighbor.getRSSI(mote)+(-97-(-105)) >= mote.minRssi:   #avoid my nieghbor interferes with a mote
-		    		        for cell in mote.schedule.keys():
-					    if mote.schedule[(cell[0],cell[1])]['dir']!='SHARED':
-						if [cell[0],cell[1]] in candidates:
-						    if mote.schedule[(cell[0],cell[1])]['dir']=='RX':
-					    		candidates.remove([cell[0],cell[1]])
-						    else:
-							if self.getRSSI(mote)+(-97-(-105)) >= self.minRssi:
-							    candidates.remove([cell[0],cell[1]])
+		        #removing colliding cells using total knowledge: the TX and RX cells of the
+		        #motes (other than me and my neighbor) which interfere with us, or we with them
+		        rssi         = self.engine.linkRSSI
+		        minRssi      = np.array([mote.minRssi for mote in self.engine.motes])
+		        with np.errstate(invalid='ignore'): # NaN on the diagonal
+		            interfMe     = rssi[self.id]+(-97-(-105)) >= minRssi         #avoid a mote interferes with me
+		            interfNeigh  = rssi[neighbor.id]+(-97-(-105)) >= minRssi     #avoid my nieghbor interferes with a mote
+		            txMotes      = interfMe | (interfNeigh & (rssi[self.id]+(-97-(-105)) >= self.minRssi))
+		            rxMotes      = (interfMe & (rssi[:,neighbor.id]+(-97-(-105)) >= self.minRssi)) | interfNeigh
+		        txMotes[[self.id,neighbor.id]] = False
+		        rxMotes[[self.id,neighbor.id]] = False
+		        busyCells    = self.engine.cellOccupancy.getBusyCells(txMotes,rxMotes)
+		        candidates   = [c for c in candidates if not busyCells[c[0],c[1]]]
 
 		        #if I have cells, I try to assign them
 		        selectedCells={}
@@ -1866,14 +1805,14 @@ class Mote(object):
 			    while n<numCells:
 				if len(candidates)>0:
 					#select from candidates, a random one and remove it from the candidates
-					selcel=random.sample(candidates, 1)[0]
+					selcel=self.random.sample(candidates, 1)[0]
 					candidates.remove([selcel[0],selcel[1]])
 
 					#remove also the cells asociated with this cell according to the radios
 					selectedCells[n]=selcel			
 					cellsAtThatTs=[c for c in candidates if c[0]==selcel[0]]
 					if len(cellsAtThatTs)>(self.settings.numRadios-1):
-						removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+						removeCandidates=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 						for celltoremove in removeCandidates:
 							candidates.remove([celltoremove[0],celltoremove[1]])	                       	
 					n+=1
@@ -1890,16 +1829,16 @@ class Mote(object):
 		    		#remove my busy cells
 		    		for cell in candidatesNeigh:
 				    if cell in candidates2: #just in case the cells has been already removed
-					if (cell[0],cell[1]) in self.schedule.keys():
+					if (cell[0],cell[1]) in self.schedule:
 					    candidates2.remove([cell[0],cell[1]])
 					    cellsAtThatTs=[c for c in candidates2 if c[0]==cell[0]]
 					    if len(cellsAtThatTs)>(self.settings.numRadios-1):
-						removeCandidates2=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+						removeCandidates2=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 						for celltoremove in removeCandidates2:
 							candidates2.remove([celltoremove[0],celltoremove[1]])
 					else:#check if there are other cells in the same ts but different channel
 					    for i in range(0,self.settings.numChans):					
-						    if (cell[0],i) in self.schedule.keys():	
+						    if (cell[0],i) in self.schedule:	
 							cellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
 							if len(cellsAtThatTs)>(self.settings.numRadios-1):
 							    if cell in candidates2: #just in case the cells has been already removed
@@ -1912,7 +1851,7 @@ class Mote(object):
 					candidates2.remove([c[0],c[1]])
 					cellsAtThatTs=[ce for ce in candidates2 if ce[0]==c[0]]
 					if len(cellsAtThatTs)>(self.settings.numRadios-1):
-						removeCandidates2=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+						removeCandidates2=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 						for celltoremove in removeCandidates2:
 							candidates2.remove([celltoremove[0],celltoremove[1]])
 
@@ -1923,7 +1862,7 @@ class Mote(object):
 				    while n<numCells:
 					if len(candidates2)>0:
 						#select from candidates, a random one and remove it from the candidates
-						selcel=random.sample(candidates2, 1)[0]
+						selcel=self.random.sample(candidates2, 1)[0]
 						candidates2.remove([selcel[0],selcel[1]])
 
 						#remove also the cells asociated with this cell according to the radios
@@ -1932,7 +1871,7 @@ class Mote(object):
 						cellsAtThatTs=[c for c in candidates2 if c[0]==selcel[0]]
 						if len(cellsAtThatTs)>(self.settings.numRadios-1):
 							#num To Remove is len(cellsAtThatTs)-(self.settings.numRadios-1)
-							removeCandidates2=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+							removeCandidates2=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 							for celltoremove in removeCandidates2:
 								candidates2.remove([celltoremove[0],celltoremove[1]])	                       	
 						n+=1
@@ -1968,16 +1907,16 @@ class Mote(object):
 		    		#remove my busy cells
 		    		for cell in candidatesNeigh:
 				    if cell in candidates2: #just in case the cells has been already removed
-					if (cell[0],cell[1]) in self.schedule.keys():
+					if (cell[0],cell[1]) in self.schedule:
 					    candidates2.remove([cell[0],cell[1]])
 					    cellsAtThatTs=[c for c in candidates2 if c[0]==cell[0]]
 					    if len(cellsAtThatTs)>(self.settings.numRadios-1):
-						removeCandidates2=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+						removeCandidates2=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 						for celltoremove in removeCandidates2:
 							candidates2.remove([celltoremove[0],celltoremove[1]])
 					else:#check if there are other cells in the same ts but different channel
 					    for i in range(0,self.settings.numChans):					
-						    if (cell[0],i) in self.schedule.keys():	
+						    if (cell[0],i) in self.schedule:	
 							cellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
 							if len(cellsAtThatTs)>(self.settings.numRadios-1):
 							    if cell in candidates2: #just in case the cells has been already removed
@@ -1990,7 +1929,7 @@ class Mote(object):
 				    while n<numCells:
 					if len(candidates2)>0:
 						#select from candidates, a random one and remove it from the candidates
-						selcel=random.sample(candidates2, 1)[0]
+						selcel=self.random.sample(candidates2, 1)[0]
 						candidates2.remove([selcel[0],selcel[1]])
 
 						#remove also the cells asociated with this cell according to the radios
@@ -1998,7 +1937,7 @@ class Mote(object):
 						self.numRandomSelections+=1
 						cellsAtThatTs=[c for c in candidates2 if c[0]==selcel[0]]
 						if len(cellsAtThatTs)>(self.settings.numRadios-1):
-						    removeCandidates2=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+						    removeCandidates2=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 						    for celltoremove in removeCandidates2:
 							candidates2.remove([celltoremove[0],celltoremove[1]])	                       	
 						n+=1
@@ -2054,39 +1993,36 @@ class Mote(object):
 	    		#remove my busy cells
 	    		for cell in candidatesNeigh:
 			    if cell in candidates: #just in case the cells has been already removed
-				if (cell[0],cell[1]) in self.schedule.keys():
+				if (cell[0],cell[1]) in self.schedule:
 				    candidates.remove([cell[0],cell[1]])
 				    cellsAtThatTs=[c for c in candidates if c[0]==cell[0]]
 				    myCellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
 
 				    if (len(cellsAtThatTs)+len(myCellsAtThatTs)-1)>(self.settings.numRadios-1):
 
-					removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
+					removeCandidates=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
 					for celltoremove in removeCandidates:
 						candidates.remove([celltoremove[0],celltoremove[1]])
 
 				else:#check if there are other cells in the same ts but different channel
 				    for i in range(0,self.settings.numChans):								
-					if (cell[0],i) in self.schedule.keys():
+					if (cell[0],i) in self.schedule:
 					    cellsAtThatTs=[c for c in candidates if c[0]==cell[0]]
 				    	    myCellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
 					    if (len(cellsAtThatTs)+len(myCellsAtThatTs)-1)>(self.settings.numRadios-1):
-						removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
+						removeCandidates=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)+len(myCellsAtThatTs)-1-(self.settings.numRadios-1))
 						for celltoremove in removeCandidates:
 						    candidates.remove([celltoremove[0],celltoremove[1]])
 
 
-			#remove the cells learned from the neighborhood  
-		        for neigh in self.scheduleNeigborhood.keys():
+			#remove the cells learned from the neighborhood: TX cells, and RX cells whose transmitter interferes with me
+		        busyCells = np.zeros((self.settings.slotframeLength,self.settings.numChans),dtype=bool)
+		        for (neigh,neighSchedule) in self.scheduleNeigborhood.items():
 			    if neigh != neighbor:
-			        for cell in self.scheduleNeigborhood[neigh].keys():
-				    if self.scheduleNeigborhood[neigh][(cell[0],cell[1])]['dir']!='SHARED':
-				        if [cell[0],cell[1]] in candidates:
-					    if self.scheduleNeigborhood[neigh][(cell[0],cell[1])]['dir']=='TX':
-				    		candidates.remove([cell[0],cell[1]])
-					    else:
-						if self.scheduleNeigborhood[neigh][(cell[0],cell[1])]['neighbor'].getRSSI(self)+(-97-(-105)) >= self.minRssi:
-						    candidates.remove([cell[0],cell[1]])
+				with np.errstate(invalid='ignore'): # NaN on the diagonal
+				    interfMe = (neighSchedule.peers==self.id) | (self.engine.linkRSSI[neighSchedule.peers,self.id]+(-97-(-105)) >= self.minRssi)
+				busyCells |= neighSchedule.tx | (neighSchedule.rx & interfMe)
+		        candidates = [c for c in candidates if not busyCells[c[0],c[1]]]
 
 
 
@@ -2099,14 +2035,14 @@ class Mote(object):
 			    while n<numCells:
 				if len(candidates)>0:
 					#select from candidates, a random one and remove it from the candidates
-					selcel=random.sample(candidates, 1)[0]
+					selcel=self.random.sample(candidates, 1)[0]
 					candidates.remove([selcel[0],selcel[1]])
 
 					#remove also the cells asociated with this cell according to the radios
 					selectedCells[n]=selcel
 					cellsAtThatTs=[c for c in candidates if c[0]==selcel[0]]
 					if len(cellsAtThatTs)>(self.settings.numRadios-1):
-					    removeCandidates=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+					    removeCandidates=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 					    for celltoremove in removeCandidates:
 						candidates.remove([celltoremove[0],celltoremove[1]])	                       	
 					n+=1
@@ -2122,16 +2058,16 @@ class Mote(object):
 		    		#remove my busy cells
 		    		for cell in candidatesNeigh:
 				    if cell in candidates2: #just in case the cells has been already removed
-					if (cell[0],cell[1]) in self.schedule.keys():
+					if (cell[0],cell[1]) in self.schedule:
 					    candidates2.remove([cell[0],cell[1]])
 					    cellsAtThatTs=[c for c in candidates2 if c[0]==cell[0]]
 					    if len(cellsAtThatTs)>(self.settings.numRadios-1):
-						removeCandidates2=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+						removeCandidates2=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 						for celltoremove in removeCandidates2:
 							candidates2.remove([celltoremove[0],celltoremove[1]])
 					else:#check if there are other cells in the same ts but different channel
 					    for i in range(0,self.settings.numChans):					
-						if (cell[0],i) in self.schedule.keys():	
+						if (cell[0],i) in self.schedule:	
 						    cellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
 						    if len(cellsAtThatTs)>(self.settings.numRadios-1):
 							if cell in candidates2: #just in case the cells has been already removed
@@ -2142,7 +2078,7 @@ class Mote(object):
 					candidates2.remove([c[0],c[1]])
 					cellsAtThatTs=[ce for ce in candidates2 if ce[0]==c[0]]
 					if len(cellsAtThatTs)>(self.settings.numRadios-1):
-						removeCandidates2=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+						removeCandidates2=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 						for celltoremove in removeCandidates2:
 
 							candidates2.remove([celltoremove[0],celltoremove[1]])
@@ -2150,12 +2086,11 @@ class Mote(object):
 
 				#check which cells from my neighbors have been less updated and I will select them 
 				#(maybe they are not in their schedule any more)
+				lastHeard=self._debras_getLastHeard()
 				lessUpdatedCells={}
 				for c in candidates2:
-				    for ne in self.scheduleNeigborhood.keys():
-					for nc in self.scheduleNeigborhood[ne].keys():
-					    if (c[0],c[1]) == (nc[0],nc[1]):
-						lessUpdatedCells[c[0],c[1]]=self.scheduleNeigborhood[ne][(c[0],c[1])]['debrasFreshness']
+				    if lastHeard[c[0],c[1]]>=0:
+					lessUpdatedCells[c[0],c[1]]=lastHeard.item(c[0],c[1])
 
 				#if I have cells, I try to assign them
 				if len(candidates2) > 0:	                    
@@ -2167,14 +2102,14 @@ class Mote(object):
 							selcel=min(lessUpdatedCells, key=lessUpdatedCells.get)
 							del lessUpdatedCells[(selcel[0],selcel[1])]
 						else:
-							selcel=random.sample(candidates2, 1)[0]
+							selcel=self.random.sample(candidates2, 1)[0]
 						candidates2.remove([selcel[0],selcel[1]])
 
 						#remove also the cells asociated with this cell according to the radios
 						selectedCells[n]=selcel
 						cellsAtThatTs=[c for c in candidates2 if c[0]==selcel[0]]
 						if len(cellsAtThatTs)>(self.settings.numRadios-1):
-							removeCandidates2=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+							removeCandidates2=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 							for celltoremove in removeCandidates2:
 								candidates2.remove([celltoremove[0],celltoremove[1]])	                       	
 						n+=1
@@ -2204,16 +2139,16 @@ class Mote(object):
 		    		#remove my busy cells
 		    		for cell in candidatesNeigh:
 				    if cell in candidates2: #just in case the cells has been already removed
-					if (cell[0],cell[1]) in self.schedule.keys():
+					if (cell[0],cell[1]) in self.schedule:
 					    candidates2.remove([cell[0],cell[1]])
 					    cellsAtThatTs=[c for c in candidates2 if c[0]==cell[0]]
 					    if len(cellsAtThatTs)>(self.settings.numRadios-1):
-						removeCandidates2=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+						removeCandidates2=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 						for celltoremove in removeCandidates2:
 							candidates2.remove([celltoremove[0],celltoremove[1]])
 					else:#check if there are other cells in the same ts but different channel
 					    for i in range(0,self.settings.numChans):					
-						    if (cell[0],i) in self.schedule.keys():	
+						    if (cell[0],i) in self.schedule:	
 							cellsAtThatTs=[c for c in self.schedule.keys() if c[0]==cell[0]]
 							if len(cellsAtThatTs)>(self.settings.numRadios-1):
 							    if cell in candidates2: #just in case the cells has been already removed
@@ -2223,12 +2158,11 @@ class Mote(object):
 
 				#check which cells from my neighbors have been less updated and I will select them 
 				#(maybe they are not in their schedule any more)
+				lastHeard=self._debras_getLastHeard()
 				lessUpdatedCells={}
 				for c in candidates2:
-				    for ne in self.scheduleNeigborhood.keys():
-					for nc in self.scheduleNeigborhood[ne].keys():
-					    if (c[0],c[1]) == (nc[0],nc[1]):
-						lessUpdatedCells[c[0],c[1]]=self.scheduleNeigborhood[ne][(c[0],c[1])]['debrasFreshness']
+				    if lastHeard[c[0],c[1]]>=0:
+					lessUpdatedCells[c[0],c[1]]=lastHeard.item(c[0],c[1])
 
 				#if I have cells, I try to assign them
 				if len(candidates2) > 0:	                    
@@ -2240,7 +2174,7 @@ class Mote(object):
 							selcel=min(lessUpdatedCells, key=lessUpdatedCells.get)
 							del lessUpdatedCells[(selcel[0],selcel[1])]
 						else:
-							selcel=random.sample(candidates2, 1)[0]
+							selcel=self.random.sample(candidates2, 1)[0]
 
 						#remove also the cells asociated with this cell according to the radios
 						candidates2.remove([selcel[0],selcel[1]])
@@ -2249,7 +2183,7 @@ class Mote(object):
 						cellsAtThatTs=[c for c in candidates2 if c[0]==selcel[0]]
 						if len(cellsAtThatTs)>(self.settings.numRadios-1):
 							#num To Remove is len(cellsAtThatTs)-(self.settings.numRadios-1)
-							removeCandidates2=random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
+							removeCandidates2=self.random.sample(cellsAtThatTs, len(cellsAtThatTs)-(self.settings.numRadios-1))
 							for celltoremove in removeCandidates2:
 								candidates2.remove([celltoremove[0],celltoremove[1]])	                       	
 						n+=1
@@ -2368,7 +2302,7 @@ class Mote(object):
 
 	    for cell in payload[4]:
 
-		    assert cell in self.schedule.keys()
+		    assert cell in self.schedule
 	    self._sixtop_enqueueCMD_DELETE_Response(smac,payload[4],err=False)	
 	    #there should not be errors when deleting
 	
@@ -2497,7 +2431,7 @@ class Mote(object):
     
     def _tsch_enqueue(self,packet,neigh):
 		    
-	    if packet['type']=='DATA':
+	    if packet.type=='DATA':
 		if not self.preferredParent:
 		    # I don't have a route
 
@@ -2524,41 +2458,38 @@ class Mote(object):
 		else:
 		    # all is good, enqueue packet	    
 
-		    self.txQueue    += [packet]
+		    self.txQueue.append(packet)
 		    return True
 
 
-	    elif packet['type']=='RPLTRAFFIC':	#use always shared queue, there is always one shared cell
+	    elif packet.type=='RPLTRAFFIC':	#use always shared queue, there is always one shared cell
 		if self.getSharedCells():
 	    	    if len(self.txSharedQueue)==self.TSCH_QUEUE_SIZE:	#usually this queue should be never full
 		        return False
 	    	    else:
-	    	    	self.txSharedQueue   += [packet]
+	    	    	self.txSharedQueue.append(packet)
 	    	    	return True
 		else:
 		    print "No shared cells! Imposible!"
 		    assert False 		   
 
-	    elif packet['type']=='SIXTOP_CMD':
+	    elif packet.type=='SIXTOP_CMD':
 		assert neigh!=None
 		
 		if len(self.getTxCellsToNeighbor(neigh))<1:	
 			if len(self.txSharedQueue)==self.TSCH_QUEUE_SIZE: #usually this queue should be never full
 			    return False
 		    	else:
-		    	    self.txSharedQueue    += [packet]
+		    	    self.txSharedQueue.append(packet)
 		    	    return True
 		else:# I have some dedicated cells, I will use them for 6top commands
 			    #increasing incomming traffic to take in account the 6top message to the parent			    
-			    sixtopPktAlreadyInQueue=False
-			    for pkt in self.txQueue:
-				if pkt['type'] =='SIXTOP_CMD':#do not enqueue
-				    sixtopPktAlreadyInQueue=True
-				    self._stats_incrementMoteStats('zixtopFailNeglectedEnqueue')
-				    return True
+			    if self.txQueue.countType('SIXTOP_CMD')>0:#do not enqueue
+				self._stats_incrementMoteStats('zixtopFailNeglectedEnqueue')
+				return True
 
 			    #insert at the end
-			    self.txSharedQueue    += [packet]
+			    self.txSharedQueue.append(packet)
 
 			    self._otf_incrementIncomingTraffic(self)
 		    	    return True
@@ -2578,19 +2509,9 @@ class Mote(object):
                 self.engine.removeEvent(uniqueTag=(self.id,'_tsch_action_activeCell'))
                 return
             
-            tsDiffMin             = None
-            for ((ts,ch),cell) in self.schedule.items():
-                if   ts==tsCurrent:
-                    tsDiff        = self.settings.slotframeLength
-                elif ts>tsCurrent:
-                    tsDiff        = ts-tsCurrent
-                elif ts<tsCurrent:
-                    tsDiff        = (ts+self.settings.slotframeLength)-tsCurrent
-                else:
-                    raise SystemError()
-                
-                if (not tsDiffMin) or (tsDiffMin>tsDiff):
-                    tsDiffMin     = tsDiff
+            # a whole slotframe if the current slot is the only active one
+            tsNext                = self.schedule.getNextTimeslot(tsCurrent)
+            tsDiffMin             = (tsNext-tsCurrent-1)%self.settings.slotframeLength+1
                     
         # schedule at that ASN
         self.engine.scheduleAtAsn(
@@ -2614,64 +2535,57 @@ class Mote(object):
             
             self.pktToSend = []
          
-            tss=[teses[0] for teses in self.schedule.keys()]
-
-	    n=0
-	    for (t1,c1) in self.schedule.keys():
-	        if ts==t1:
-		    n+=1
+	    n=len(self.schedule.getCellsAtTs(ts))
 		
 	    #important to avoid more simulatenous TX/RX than radios available 			
 	    assert n<=self.settings.numRadios
-            assert ts in tss
+            assert n>0
 	                
             numberPacketSentInThisTs=0
 
-            for i_ch in range(0,self.settings.numChans):
-                if (ts,i_ch) in self.schedule.keys():
+            for (i_ch,_) in list(self.schedule.getCellsAtTs(ts)):
+                if (ts,i_ch) in self.schedule:
                     cell = self.schedule[(ts,i_ch)]
 		   
-                    if (cell['dir']==self.DIR_SHARED):
+                    if (cell.dir==self.DIR_SHARED):
                         if asn > ((2*self.settings.slotframeLength)-1):	#avoid first 2 asn's
                                                  
-			    if cell['isDebras']:	#this is DEBRAS cell
+			    if cell.isDebras:	#this is DEBRAS cell
 			    	if self.DEBRASALOHA==True:	#aloha mode
 				    if self.numberOfWaitingsDeBras==0:
-				    	assert cell['dir']==self.DIR_SHARED
-				        self.numberOfWaitingsDeBras=random.randint(0,self.maxWin)
+				    	assert cell.dir==self.DIR_SHARED
+				        self.numberOfWaitingsDeBras=self.random.randint(0,self.maxWin)
 				        cell = self.schedule[(ts,i_ch)]
 
-				        debras_payload={}
-				        celdas=[(celda['ts'],celda['ch']) for celda in self.schedule.values() if celda['dir']!='SHARED']
+				        celdas=[(celda.ts,celda.ch) for celda in self.schedule.values() if celda.dir!='SHARED']
 
-				        random.shuffle(celdas)
+				        self.random.shuffle(celdas)
 				        payloadkeys=celdas[0:self.MAXCELLSDEBRASPAYLOAD]	#choose up to 36 cells
 
-				        for c in payloadkeys:
-					    debras_payload[(c[0],c[1])]=self.schedule[(c[0],c[1])]
+				        debras_payload=Schedule.packDebrasCells([(c[0],c[1],self.schedule[c].dir,self.schedule[c].neighbor.id) for c in payloadkeys])
 
-				        if len(debras_payload.keys())>0:
-				            packetToSend = {
-							'source':	  self,
-							'dest':		  None,
-				                        'asn':            self.engine.getAsn(),
-				                        'type':           self.SIXP_TYPE_MYSCHEDULE,
-				                        'payload':        [self.id,self.engine.getAsn(),debras_payload], 	
-				                        'retriesLeft':    1
-				            }
+				        if len(debras_payload)>0:
+				            packetToSend = Packet.Packet(
+							source         = self,
+							dest           = None,
+				                        asn            = self.engine.getAsn(),
+				                        type           = self.SIXP_TYPE_MYSCHEDULE,
+				                        payload        = [self.id,self.engine.getAsn(),debras_payload], 	
+				                        retriesLeft    = 1
+				            )
 
-				            self.schedule[(ts,i_ch)]['waitingfor']=self.DIR_SHARED
+				            self.schedule[(ts,i_ch)].waitingfor=self.DIR_SHARED
 
 					    #debras stats
 				            self.deBrasTransmitted+=1                                
 				            self.engine.deBrasTransmitted+=1  
 
 				            self.propagation.startTx(
-				                            channel   = cell['ch'],
-				                            type      = packetToSend['type'],
+				                            channel   = cell.ch,
+				                            type      = packetToSend.type,
 				                            smac      = self,
 				                            dmac      = self._myNeigbors(),
-				                            payload   = packetToSend['payload'],
+				                            payload   = packetToSend.payload,
 				                        )
 				              
 				            # log charge usage
@@ -2680,18 +2594,18 @@ class Mote(object):
 
 				    else:
 					self.numberOfWaitingsDeBras=self.numberOfWaitingsDeBras-1
-		                        self.schedule[(ts,i_ch)]['waitingfor']=self.DIR_SHARED
+		                        self.schedule[(ts,i_ch)].waitingfor=self.DIR_SHARED
 		                        self.propagation.startRx(
 		                                mote          = self,
-						ts       = cell['ts'],
-		                                channel       = cell['ch'],
+						ts       = cell.ts,
+		                                channel       = cell.ch,
 		                        )
 			        #DEBRAS TDMA mode
 				else:
 
 		                    if i_ch == (self.myBrCh) and ts==(self.myBrTs):    
 
-		                        assert cell['dir']==self.DIR_SHARED
+		                        assert cell.dir==self.DIR_SHARED
 		                        
 		                        if self.numberOfWaitingsDeBras==0:	#it's time to transmit something in this debras cell!
   
@@ -2702,37 +2616,35 @@ class Mote(object):
 		                            cell = self.schedule[(ts,i_ch)]
 		                            
 
-					    debras_payload={}
-					    celdas=[(celda['ts'],celda['ch']) for celda in self.schedule.values() if celda['dir']!='SHARED']
+					    celdas=[(celda.ts,celda.ch) for celda in self.schedule.values() if celda.dir!='SHARED']
 
-					    random.shuffle(celdas)
+					    self.random.shuffle(celdas)
 					    payloadkeys=celdas[0:self.MAXCELLSDEBRASPAYLOAD]	#36 cell limitation
 					   
-					    for c in payloadkeys:
-						debras_payload[(c[0],c[1])]=self.schedule[(c[0],c[1])]
+					    debras_payload=Schedule.packDebrasCells([(c[0],c[1],self.schedule[c].dir,self.schedule[c].neighbor.id) for c in payloadkeys])
 
-					    if len(debras_payload.keys())>0:
-					            packetToSend = {
-								'source':	  self,
-								'dest':		  None,
-					                        'asn':            self.engine.getAsn(),
-					                        'type':           self.SIXP_TYPE_MYSCHEDULE,
-					                        'payload':        [self.id,self.engine.getAsn(),debras_payload], 	
-					                        'retriesLeft':    1
-					            }
+					    if len(debras_payload)>0:
+					            packetToSend = Packet.Packet(
+								source         = self,
+								dest           = None,
+					                        asn            = self.engine.getAsn(),
+					                        type           = self.SIXP_TYPE_MYSCHEDULE,
+					                        payload        = [self.id,self.engine.getAsn(),debras_payload], 	
+					                        retriesLeft    = 1
+					            )
 
-					            self.schedule[(ts,i_ch)]['waitingfor']=self.DIR_SHARED
+					            self.schedule[(ts,i_ch)].waitingfor=self.DIR_SHARED
 
 						    #debras stats
 					            self.deBrasTransmitted+=1                                
 					            self.engine.deBrasTransmitted+=1  
 
 					            self.propagation.startTx(
-					                            channel   = cell['ch'],
-					                            type      = packetToSend['type'],
+					                            channel   = cell.ch,
+					                            type      = packetToSend.type,
 					                            smac      = self,
 					                            dmac      = self._myNeigbors(),
-					                            payload   = packetToSend['payload'],
+					                            payload   = packetToSend.payload,
 					                        ) 
 					            # log charge usage
 					            self._logChargeConsumed(self.CHARGE_TxData_uC)   
@@ -2740,25 +2652,25 @@ class Mote(object):
 		                        else:
 		                            #if it is not my turn to transmit broadcast, I try to receive                                    
 		                            self.numberOfWaitingsDeBras=self.numberOfWaitingsDeBras-1
-		                            self.schedule[(ts,i_ch)]['waitingfor']=self.DIR_SHARED
+		                            self.schedule[(ts,i_ch)].waitingfor=self.DIR_SHARED
 		                            self.propagation.startRx(
 		                                mote          = self,
-						ts       = cell['ts'],
-		                                channel       = cell['ch'],
+						ts       = cell.ts,
+		                                channel       = cell.ch,
 		                            )
 		                        
 		                    else:	#if it is not my turn neither my channel to transmit broadcast, I try to receive 
-					self.schedule[(ts,i_ch)]['waitingfor']=self.DIR_SHARED
+					self.schedule[(ts,i_ch)].waitingfor=self.DIR_SHARED
 		                        self.propagation.startRx(					    
 		                            mote          = self,
-					    ts       = cell['ts'],
-		                            channel       = cell['ch'],
+					    ts       = cell.ts,
+		                            channel       = cell.ch,
 		                        )
 
                     	    else: 
 				    #check if I have a rank and if I can use the SHARED cell, transmit
 				    if self.numberOfWaitings==0 and self.rank!=None:		
-				        self.numberOfWaitings=random.randint(0,self.maxWinShared)
+				        self.numberOfWaitings=self.random.randint(0,self.maxWinShared)
 				     
 					#prepare the packet for sending
 			                if self.txSharedQueue:
@@ -2767,43 +2679,43 @@ class Mote(object):
 
 					#in this ts I could theoreticall send packets in different channels
                                         if len(self.pktToSend) >= (numberPacketSentInThisTs+1):
-					    	self.schedule[(ts,i_ch)]['waitingfor']=self.DIR_SHARED
+					    	self.schedule[(ts,i_ch)].waitingfor=self.DIR_SHARED
 
 						#prepare 6P message
-						if self.pktToSend[numberPacketSentInThisTs]['type']=='SIXTOP_CMD':
+						if self.pktToSend[numberPacketSentInThisTs].type=='SIXTOP_CMD':
 						    
 						    #unicast
 						    self.pendingAck.append((ts,i_ch))
 						    self._logChargeConsumed(self.CHARGE_TxDataRxAck_uC)	#ack is expected
-						    if self.pktToSend[numberPacketSentInThisTs]['payload'][2]==self.IANA_6TOP_CMD_ADD:
-						    	dest=self.pktToSend[numberPacketSentInThisTs]['payload'][8]
+						    if self.pktToSend[numberPacketSentInThisTs].payload[2]==self.IANA_6TOP_CMD_ADD:
+						    	dest=self.pktToSend[numberPacketSentInThisTs].payload[8]
 							self.sixtopState=self.SIX_STATE_WAIT_ADDREQUEST_SENDDONE
 							self._stats_incrementMoteStats('zixtopTxCMDADD')
-						    elif self.pktToSend[numberPacketSentInThisTs]['payload'][2]==self.IANA_6TOP_CMD_DELETE:
-							dest=self.pktToSend[numberPacketSentInThisTs]['payload'][5]
+						    elif self.pktToSend[numberPacketSentInThisTs].payload[2]==self.IANA_6TOP_CMD_DELETE:
+							dest=self.pktToSend[numberPacketSentInThisTs].payload[5]
 							self.sixtopState=self.SIX_STATE_WAIT_DELETEREQUEST_SENDDONE
 							self._stats_incrementMoteStats('zixtopTxCMDDELETE')
-						    elif self.pktToSend[numberPacketSentInThisTs]['payload'][2]==self.IANA_6TOP_RC_SUCCESS:
+						    elif self.pktToSend[numberPacketSentInThisTs].payload[2]==self.IANA_6TOP_RC_SUCCESS:
 							
-							if self.pktToSend[numberPacketSentInThisTs]['payload'][3]==self.IANA_6TOP_CMD_ADD:
-							    dest=self.pktToSend[numberPacketSentInThisTs]['payload'][7]
+							if self.pktToSend[numberPacketSentInThisTs].payload[3]==self.IANA_6TOP_CMD_ADD:
+							    dest=self.pktToSend[numberPacketSentInThisTs].payload[7]
 							    self.sixtopState=self.SIX_STATE_WAIT_RESPONSE_SENDDONE
 							    self._stats_incrementMoteStats('zixtopTxCMDADDResp')
-							elif self.pktToSend[numberPacketSentInThisTs]['payload'][3]==self.IANA_6TOP_CMD_DELETE:
-							    dest=self.pktToSend[numberPacketSentInThisTs]['payload'][5]
+							elif self.pktToSend[numberPacketSentInThisTs].payload[3]==self.IANA_6TOP_CMD_DELETE:
+							    dest=self.pktToSend[numberPacketSentInThisTs].payload[5]
 							    self.sixtopState=self.SIX_STATE_WAIT_RESPONSE_SENDDONE
 							    self._stats_incrementMoteStats('zixtopTxCMDDELETEResp')
 							else:
 							    print "Unkown Auxiliar field. Unkown RC"
 							    assert False
-						    elif self.pktToSend[numberPacketSentInThisTs]['payload'][2]==self.IANA_6TOP_RC_ERR:
+						    elif self.pktToSend[numberPacketSentInThisTs].payload[2]==self.IANA_6TOP_RC_ERR:
 							
-							if self.pktToSend[numberPacketSentInThisTs]['payload'][3]==self.IANA_6TOP_CMD_ADD:
-							    dest=self.pktToSend[numberPacketSentInThisTs]['payload'][7]
+							if self.pktToSend[numberPacketSentInThisTs].payload[3]==self.IANA_6TOP_CMD_ADD:
+							    dest=self.pktToSend[numberPacketSentInThisTs].payload[7]
 							    self.sixtopState=self.SIX_STATE_WAIT_RESPONSE_SENDDONE
 							    self._stats_incrementMoteStats('zixtopTxCMDADDResp')
-							elif self.pktToSend[numberPacketSentInThisTs]['payload'][3]==self.IANA_6TOP_CMD_DELETE:
-							    dest=self.pktToSend[numberPacketSentInThisTs]['payload'][5]
+							elif self.pktToSend[numberPacketSentInThisTs].payload[3]==self.IANA_6TOP_CMD_DELETE:
+							    dest=self.pktToSend[numberPacketSentInThisTs].payload[5]
 							    self.sixtopState=self.SIX_STATE_WAIT_RESPONSE_SENDDONE
 							    self._stats_incrementMoteStats('zixtopTxCMDDELETEResp')
 							else:
@@ -2814,7 +2726,7 @@ class Mote(object):
 							assert False
 
 						#prepare RPL DIO
-						elif self.pktToSend[numberPacketSentInThisTs]['type']=='RPLTRAFFIC':
+						elif self.pktToSend[numberPacketSentInThisTs].type=='RPLTRAFFIC':
 						    #broadcast
 						    dest=self._myNeigbors()
 						    self._stats_incrementMoteStats('rplTxDIO')
@@ -2824,16 +2736,16 @@ class Mote(object):
 							print "Unkown traffic type. Not propagating"
 							assert False
 
-					        assert cell['isDebras'] == False
+					        assert cell.isDebras == False
 						self.propagation.startTx(
-					                            channel   = cell['ch'],
-					                            type      = self.pktToSend[numberPacketSentInThisTs]['type'],
+					                            channel   = cell.ch,
+					                            type      = self.pktToSend[numberPacketSentInThisTs].type,
 					                            smac      = self,
 					                            dmac      = dest,
-					                            payload   = self.pktToSend[numberPacketSentInThisTs]['payload'],
+					                            payload   = self.pktToSend[numberPacketSentInThisTs].payload,
 					        )
 
-						if self.pktToSend[numberPacketSentInThisTs]['type']!='SIXTOP_CMD':
+						if self.pktToSend[numberPacketSentInThisTs].type!='SIXTOP_CMD':
 						    #not expecting ack for a DIO
 						    self.txSharedQueue.remove(self.pktToSend[numberPacketSentInThisTs])
 						    self.pktToSend.remove(self.pktToSend[0])
@@ -2842,21 +2754,21 @@ class Mote(object):
 					#if there are not packets, just receive
 				        else:
 
-	                                    self.schedule[(ts,i_ch)]['waitingfor']=self.DIR_SHARED
+	                                    self.schedule[(ts,i_ch)].waitingfor=self.DIR_SHARED
 	                                    self.propagation.startRx(
 	                                         mote          = self,
-						 ts       = cell['ts'],
-	                                         channel       = cell['ch'],
+						 ts       = cell.ts,
+	                                         channel       = cell.ch,
 	                                    )  
 				    else:
 					#receive in the shared cell
 				        if self.numberOfWaitings!=0:
 			    	            self.numberOfWaitings=self.numberOfWaitings-1
-	                                self.schedule[(ts,i_ch)]['waitingfor']=self.DIR_SHARED
+	                                self.schedule[(ts,i_ch)].waitingfor=self.DIR_SHARED
 	                                self.propagation.startRx(
 	                                 	mote          = self,
-						ts       = cell['ts'],
-	                                 	channel       = cell['ch'],
+						ts       = cell.ts,
+	                                 	channel       = cell.ch,
 	                                )
 
 				
@@ -2865,61 +2777,59 @@ class Mote(object):
                         
                         assert self.schedule[(ts,i_ch)]
   
-                        if  cell['dir']==self.DIR_RX:	#just receive
-                            self.schedule[(ts,i_ch)]['waitingfor']=self.DIR_RX
+                        if  cell.dir==self.DIR_RX:	#just receive
+                            self.schedule[(ts,i_ch)].waitingfor=self.DIR_RX
                             self.propagation.startRx(
                                 mote          = self,
-				ts       = cell['ts'],
-                                channel       = cell['ch'],
+				ts       = cell.ts,
+                                channel       = cell.ch,
                             ) 
-                        elif cell['dir']==self.DIR_TX:
+                        elif cell.dir==self.DIR_TX:
 
 			    #get a packet from the queue
                             if len(self.txQueue) > (numberPacketSentInThisTs):
-				for p in self.txQueue:	
-				    #dmac will be the dest of the cell			    
-				    if cell['neighbor']==p['dest']:
-					if p not in self.pktToSend:
-						self.pktToSend.append(p)
-					break
+				#dmac will be the dest of the cell
+				packetsToNeighbor=self.txQueue.getPacketsTo(cell.neighbor)
+				if packetsToNeighbor and packetsToNeighbor[0] not in self.pktToSend:
+				    self.pktToSend.append(packetsToNeighbor[0])
 
                             # send packet
                             if bool(self.pktToSend) == True:
                                 if len(self.pktToSend) > (numberPacketSentInThisTs):
-                                        cell['numTx'] += 1
-                                        self.schedule[(ts,i_ch)]['waitingfor']=self.DIR_TX                                    
+                                        self.schedule.logTx((ts,i_ch))
+                                        self.schedule[(ts,i_ch)].waitingfor=self.DIR_TX                                    
                                         self.pendingAck.append((ts,i_ch))
 					
-					if self.pktToSend[numberPacketSentInThisTs]['type']=='SIXTOP_CMD':
+					if self.pktToSend[numberPacketSentInThisTs].type=='SIXTOP_CMD':
 	
-						    dest=self.pktToSend[numberPacketSentInThisTs]['dest']
-						    if self.pktToSend[numberPacketSentInThisTs]['payload'][2]==self.IANA_6TOP_CMD_ADD:
+						    dest=self.pktToSend[numberPacketSentInThisTs].dest
+						    if self.pktToSend[numberPacketSentInThisTs].payload[2]==self.IANA_6TOP_CMD_ADD:
 						    	
 							self.sixtopState=self.SIX_STATE_WAIT_ADDREQUEST_SENDDONE
 							self._stats_incrementMoteStats('zixtopTxCMDADD')
-						    elif self.pktToSend[numberPacketSentInThisTs]['payload'][2]==self.IANA_6TOP_CMD_DELETE:
+						    elif self.pktToSend[numberPacketSentInThisTs].payload[2]==self.IANA_6TOP_CMD_DELETE:
 							
 							self.sixtopState=self.SIX_STATE_WAIT_DELETEREQUEST_SENDDONE
 							self._stats_incrementMoteStats('zixtopTxCMDDELETE')
-						    elif self.pktToSend[numberPacketSentInThisTs]['payload'][2]==self.IANA_6TOP_RC_SUCCESS:
+						    elif self.pktToSend[numberPacketSentInThisTs].payload[2]==self.IANA_6TOP_RC_SUCCESS:
 							
-							if self.pktToSend[numberPacketSentInThisTs]['payload'][3]==self.IANA_6TOP_CMD_ADD:
+							if self.pktToSend[numberPacketSentInThisTs].payload[3]==self.IANA_6TOP_CMD_ADD:
 							   
 							    self.sixtopState=self.SIX_STATE_WAIT_RESPONSE_SENDDONE
 							    self._stats_incrementMoteStats('zixtopTxCMDADDResp')
-							elif self.pktToSend[numberPacketSentInThisTs]['payload'][3]==self.IANA_6TOP_CMD_DELETE:
+							elif self.pktToSend[numberPacketSentInThisTs].payload[3]==self.IANA_6TOP_CMD_DELETE:
 							    
 							    self.sixtopState=self.SIX_STATE_WAIT_RESPONSE_SENDDONE
 							    self._stats_incrementMoteStats('zixtopTxCMDDELETEResp')
 							else:
 							    print "Unkown Auxiliar field. Unkown RC"
 							    assert False
-						    elif self.pktToSend[numberPacketSentInThisTs]['payload'][2]==self.IANA_6TOP_RC_ERR:
-							if self.pktToSend[numberPacketSentInThisTs]['payload'][3]==self.IANA_6TOP_CMD_ADD:
+						    elif self.pktToSend[numberPacketSentInThisTs].payload[2]==self.IANA_6TOP_RC_ERR:
+							if self.pktToSend[numberPacketSentInThisTs].payload[3]==self.IANA_6TOP_CMD_ADD:
 							    
 							    self.sixtopState=self.SIX_STATE_WAIT_RESPONSE_SENDDONE
 							    self._stats_incrementMoteStats('zixtopTxCMDADDResp')
-							elif self.pktToSend[numberPacketSentInThisTs]['payload'][3]==self.IANA_6TOP_CMD_DELETE:
+							elif self.pktToSend[numberPacketSentInThisTs].payload[3]==self.IANA_6TOP_CMD_DELETE:
 							    
 							    self.sixtopState=self.SIX_STATE_WAIT_RESPONSE_SENDDONE
 							    self._stats_incrementMoteStats('zixtopTxCMDDELETEResp')
@@ -2930,10 +2840,10 @@ class Mote(object):
 							print "Unkown 6top command. Not propagating"
 							assert False
 					else:	
-						assert self.pktToSend[numberPacketSentInThisTs]['type']=='DATA'
+						assert self.pktToSend[numberPacketSentInThisTs].type=='DATA'
 						self.numTransmissions += 1
 
-						dest=self.schedule[(ts,i_ch)]['neighbor']
+						dest=self.schedule[(ts,i_ch)].neighbor
 
 						avoidTX=False
 						if self.sixtopState==self.SIX_STATE_WAIT_DELETERESPONSE:
@@ -2942,18 +2852,18 @@ class Mote(object):
 							for c in self.schedule.keys():
 							    
 							    if c[0]==ts:								
-								if self.schedule[(c[0],c[1])]['dir']==self.DIR_SHARED:
+								if self.schedule[(c[0],c[1])].dir==self.DIR_SHARED:
 
 									avoidTX=True
 					        if avoidTX:
 					            continue
 					#transmit!
                                         self.propagation.startTx(
-                                            channel   = cell['ch'],
-                                            type      = self.pktToSend[numberPacketSentInThisTs]['type'],
+                                            channel   = cell.ch,
+                                            type      = self.pktToSend[numberPacketSentInThisTs].type,
                                             smac      = self,
                                             dmac      = dest,
-                                            payload   = self.pktToSend[numberPacketSentInThisTs]['payload'],
+                                            payload   = self.pktToSend[numberPacketSentInThisTs].payload,
                                         )
                                                                     
                                         # log charge usage
@@ -2968,26 +2878,17 @@ class Mote(object):
         with self.dataLock:
             for cell in cellList:
                 
-                self.schedule[(cell[0],cell[1])] = {
-                    'ts':                        cell[0],
-                    'ch':                        cell[1],
-                    'dir':                       cell[2],
-                    'neighbor':                  neighbor,
-		    'isDebras':                  False,
-		    'debrasFreshness':           0,
-                    'numTx':                     0,
-                    'busy':                      0,
-                    'numTxAck':                  0,
-                    'sharedCell_id':             None,
-                    'numRx':                     0,
-                    'history':                   [],
-                    'waitingfor':                None,
-                    'rxDetectedCollision':       False,
-                    'debug_canbeInterfered':     [],                      # [debug] shows schedule collision that can be interfered with minRssi or larger level 
-                    'debug_interference':        [],                      # [debug] shows an interference packet with minRssi or larger level 
-                    'debug_lockInterference':    [],                      # [debug] shows locking on the interference packet
-                    'debug_cellCreatedAsn':      self.engine.getAsn(),    # [debug]
-                }
+                self.schedule[(cell[0],cell[1])] = Schedule.Cell(
+                    ts               = cell[0],
+                    ch               = cell[1],
+                    dir              = cell[2],
+                    neighbor         = neighbor,
+                    isDebras         = False,
+                    sharedCell_id    = None,
+                    createdAsn       = self.engine.getAsn(),
+                    historyLength    = self.NUM_MAX_HISTORY,
+                    debugHistory     = self.settings.debugCellHistory,
+                )
 
             self._tsch_schedule_activeCell()
             
@@ -3003,8 +2904,8 @@ class Mote(object):
                 (tsList,neighbor.id),
             )
             for ts,ch in tsList:
-                assert (ts,ch) in self.schedule.keys()
-               	assert self.schedule[(ts,ch)]['dir']!=self.DIR_SHARED
+                assert (ts,ch) in self.schedule
+               	assert self.schedule[(ts,ch)].dir!=self.DIR_SHARED
                 del self.schedule[(ts,ch)]
             self._tsch_schedule_activeCell()
     
@@ -3018,32 +2919,29 @@ class Mote(object):
         ts    = asn%self.settings.slotframeLength
         
         with self.dataLock:
-            tss=[row[0] for row in self.schedule.keys()]
-            assert ts in tss
+            assert self.schedule.getCellsAtTs(ts)
     
             i_ch=0
-            for i_ch in range(self.settings.numChans):
-                if (ts,i_ch) in self.schedule.keys():        
+            # the cells may be added or removed while handling the ACKs
+            for (i_ch,_) in list(self.schedule.getCellsAtTs(ts)):
+                if (ts,i_ch) in self.schedule:        
 
 		    if (ts,i_ch) in self.pendingAck:
-                    	assert self.schedule[(ts,i_ch)]['waitingfor']==self.DIR_TX or txtype=='SIXTOP_CMD'
+                    	assert self.schedule[(ts,i_ch)].waitingfor==self.DIR_TX or txtype=='SIXTOP_CMD'
 		        #shared cells are not expected to receive an ack unless is a sixtop packet
 
 			if txtype!='SIXTOP_CMD':
-                            assert self.schedule[(ts,i_ch)]['dir']==self.DIR_TX
+                            assert self.schedule[(ts,i_ch)].dir==self.DIR_TX
                         
 
                         if isACKed:
                             # ACK received
 
-                            # update schedule stats
-                            self.schedule[(ts,i_ch)]['numTxAck'] += 1
-                            
-                            # update history
-                            self.schedule[(ts,i_ch)]['history'] += [1]
+                            # update schedule stats and history
+                            self.schedule.logTxResult((ts,i_ch),True)
                             
                             # time correction
-                            if self.schedule[(ts,i_ch)]['neighbor'] == self.preferredParent:
+                            if self.schedule[(ts,i_ch)].neighbor == self.preferredParent:
                                 self.timeCorrectedSlot = asn
                             
                             #update the 6p states and perform the CMD 
@@ -3067,7 +2965,7 @@ class Mote(object):
 					assert False
 
 			    # remove packet from queue			    
-			    if self.schedule[(ts,i_ch)]['dir']==self.DIR_SHARED:	#shared queue
+			    if self.schedule[(ts,i_ch)].dir==self.DIR_SHARED:	#shared queue
 				self.txSharedQueue.remove(self.txSharedQueue[0]) 
 				self.pktToSend.remove(self.pktToSend[0])
 
@@ -3076,49 +2974,46 @@ class Mote(object):
 					assert False
 			    	self.txQueue.remove(self.pktToSend[0])
 				if txtype!='SIXTOP_CMD': 
-					self._stats_logQueueDelay(asn-self.pktToSend[0]['asn'])
+					self._stats_logQueueDelay(asn-self.pktToSend[0].asn)
 				self.pktToSend.remove(self.pktToSend[0])
 
 			    #mote is not expecting this ack anymore
                             self.pendingAck.remove((ts,i_ch))
 
 			    
-			    self.schedule[(ts,i_ch)]['waitingfor']=None
+			    self.schedule[(ts,i_ch)].waitingfor=None
 			    return #these return are necessary in case we have to receive acks in several channels
 
                         elif isNACKed:  #i.e. when fails in enqueue packet  or when 6top CMD is received when busy     
                             # NACK received
 
-                            # update schedule stats as if it were successfully transmitted
-                            self.schedule[(ts,i_ch)]['numTxAck'] += 1
-
-                            # update history
-                            self.schedule[(ts,i_ch)]['history'] += [1]
+                            # update schedule stats and history as if it were successfully transmitted
+                            self.schedule.logTxResult((ts,i_ch),True)
                             
                             # time correction
-                            if self.schedule[(ts,i_ch)]['neighbor'] == self.preferredParent:
+                            if self.schedule[(ts,i_ch)].neighbor == self.preferredParent:
                                 self.timeCorrectedSlot = asn
 
-                            if self.schedule[(ts,i_ch)]['dir']==self.DIR_SHARED:
+                            if self.schedule[(ts,i_ch)].dir==self.DIR_SHARED:
 	   			    if txtype=='SIXTOP_CMD':
-					if self.txSharedQueue[0]['payload'][2]==self.IANA_6TOP_CMD_ADD:
+					if self.txSharedQueue[0].payload[2]==self.IANA_6TOP_CMD_ADD:
 						self._stats_incrementMoteStats('zixtopTxCMDADDNacked') 
-					elif self.txSharedQueue[0]['payload'][2]==self.IANA_6TOP_CMD_DELETE:
+					elif self.txSharedQueue[0].payload[2]==self.IANA_6TOP_CMD_DELETE:
 						self._stats_incrementMoteStats('zixtopTxCMDDELETENacked') 
 					else:
 						print "Unkown 6top command"
 						assert False
 			    else:
 				    if txtype=='SIXTOP_CMD':
-					if self.txQueue[0]['payload'][2]==self.IANA_6TOP_CMD_ADD:
+					if self.txQueue[0].payload[2]==self.IANA_6TOP_CMD_ADD:
 						self._stats_incrementMoteStats('zixtopTxCMDADDNacked') 
-					elif self.txQueue[0]['payload'][2]==self.IANA_6TOP_CMD_DELETE:
+					elif self.txQueue[0].payload[2]==self.IANA_6TOP_CMD_DELETE:
 						self._stats_incrementMoteStats('zixtopTxCMDDELETENacked') 
 					else:
 						print "Unkown 6top command"
 						assert False
                
-			    if self.schedule[(ts,i_ch)]['dir']==self.DIR_SHARED:                                                           
+			    if self.schedule[(ts,i_ch)].dir==self.DIR_SHARED:                                                           
 	                            # remove packet from queue
 	                            self.txSharedQueue.remove(self.txSharedQueue[0])
 
@@ -3143,29 +3038,29 @@ class Mote(object):
 			    self.pendingAck.remove((ts,i_ch))
 
                             # end of radio activity, not waiting for anything
-                            self.schedule[(ts,i_ch)]['waitingfor']=None
+                            self.schedule[(ts,i_ch)].waitingfor=None
 			    return
 
                         else:
                             # neither ACK nor NACK received
                             
                             # update history
-                            self.schedule[(ts,i_ch)]['history'] += [0]
+                            self.schedule.logTxResult((ts,i_ch),False)
 
 			    #decrease counters
-			    if self.schedule[(ts,i_ch)]['dir']==self.DIR_SHARED:
-				if self.txSharedQueue[0]['retriesLeft'] > 0:
-                                    self.txSharedQueue[0]['retriesLeft'] -= 1
+			    if self.schedule[(ts,i_ch)].dir==self.DIR_SHARED:
+				if self.txSharedQueue[0].retriesLeft > 0:
+                                    self.txSharedQueue[0].retriesLeft -= 1
 			    else:
                             	i = self.txQueue.index(self.pktToSend[0])
 
-				if self.txQueue[i]['retriesLeft'] > 0:
-                                    self.txQueue[i]['retriesLeft'] -= 1			    
+				if self.txQueue[i].retriesLeft > 0:
+                                    self.txQueue[i].retriesLeft -= 1			    
 
                     
-                            if self.schedule[(ts,i_ch)]['dir']==self.DIR_SHARED:
+                            if self.schedule[(ts,i_ch)].dir==self.DIR_SHARED:
 		                    # drop packet if retried too many times
-		                    if self.txSharedQueue[0]['retriesLeft'] == 0:
+		                    if self.txSharedQueue[0].retriesLeft == 0:
 					    if txtype=='SIXTOP_CMD':
 						#have not recived an ACK/NACK for 5 times. Dropping 6top packet
 						#reset 6p states
@@ -3174,13 +3069,13 @@ class Mote(object):
 			    			self.cellsPendingOperation=None
 						self.responseType=None
 						self.cellsPendingOperationNeigh=None
-						if self.txSharedQueue[0]['payload'][2]==self.IANA_6TOP_CMD_ADD:
+						if self.txSharedQueue[0].payload[2]==self.IANA_6TOP_CMD_ADD:
 							self._stats_incrementMoteStats('zixtopTxCMDADDDropped') 
-						elif self.txSharedQueue[0]['payload'][2]==self.IANA_6TOP_CMD_DELETE:
+						elif self.txSharedQueue[0].payload[2]==self.IANA_6TOP_CMD_DELETE:
 							self._stats_incrementMoteStats('zixtopTxCMDDELETEDropped') 
-						elif self.txSharedQueue[0]['payload'][2]==self.IANA_6TOP_RC_SUCCESS:
+						elif self.txSharedQueue[0].payload[2]==self.IANA_6TOP_RC_SUCCESS:
 							self._stats_incrementMoteStats('zixtopTxCMDRCSUCCESSDropped')
-						elif self.txSharedQueue[0]['payload'][2]==self.IANA_6TOP_RC_ERR:
+						elif self.txSharedQueue[0].payload[2]==self.IANA_6TOP_RC_ERR:
 							self._stats_incrementMoteStats('zixtopTxCMDRCERRDropped')
 						else:
 							print "Unkown 6top command"
@@ -3193,7 +3088,7 @@ class Mote(object):
 					    
 			    else:
 		                    # drop packet if retried too many times
-		                    if self.txQueue[i]['retriesLeft'] == 0: 
+		                    if self.txQueue[i].retriesLeft == 0: 
 					if txtype!='SIXTOP_CMD':                                             
 		                            self._stats_incrementMoteStats('droppedMacRetries')
 					else:
@@ -3203,13 +3098,13 @@ class Mote(object):
 			    			self.cellsPendingOperation=None
 						self.responseType=None
 						self.cellsPendingOperationNeigh=None
-						if self.txQueue[i]['payload'][2]==self.IANA_6TOP_CMD_ADD:
+						if self.txQueue[i].payload[2]==self.IANA_6TOP_CMD_ADD:
 							self._stats_incrementMoteStats('zixtopTxCMDADDDropped') 
-						elif self.txQueue[i]['payload'][2]==self.IANA_6TOP_CMD_DELETE:
+						elif self.txQueue[i].payload[2]==self.IANA_6TOP_CMD_DELETE:
 							self._stats_incrementMoteStats('zixtopTxCMDDELETEDropped') 
-						elif self.txQueue[i]['payload'][2]==self.IANA_6TOP_RC_SUCCESS:
+						elif self.txQueue[i].payload[2]==self.IANA_6TOP_RC_SUCCESS:
 							self._stats_incrementMoteStats('zixtopTxCMDRCSUCCESSDropped')
-						elif self.txQueue[i]['payload'][2]==self.IANA_6TOP_RC_ERR:
+						elif self.txQueue[i].payload[2]==self.IANA_6TOP_RC_ERR:
 							self._stats_incrementMoteStats('zixtopTxCMDRCERRDropped')
 						else:
 							print "Unkown 6top command"
@@ -3224,7 +3119,7 @@ class Mote(object):
 					
 			    self.pendingAck.remove((ts,i_ch))
                             # end of radio activity, not waiting for anything
-                            self.schedule[(ts,i_ch)]['waitingfor']=None
+                            self.schedule[(ts,i_ch)].waitingfor=None
 			    return
 		       
     def radio_rxDone(self,type=None,smac=None,dmac=None,payload=None,channel=None):
@@ -3237,7 +3132,7 @@ class Mote(object):
 
             if type=='DEBRAS' or type=='RPLTRAFFIC' or type=='SIXTOP_CMD':
 
-                if self.schedule.has_key((ts,channel)) and self.schedule[(ts,channel)]['waitingfor']==self.DIR_SHARED and self.schedule[(ts,channel)]['dir']==self.DIR_SHARED:
+                if self.schedule.has_key((ts,channel)) and self.schedule[(ts,channel)].waitingfor==self.DIR_SHARED and self.schedule[(ts,channel)].dir==self.DIR_SHARED:
 
                     if smac:
                         # I received a packet
@@ -3248,7 +3143,7 @@ class Mote(object):
 					self._rpl_action_receiveDIO(type, smac, payload)		        
                     		(isACKed, isNACKed) = (False, False)
 
-                   		self.schedule[(ts,channel)]['waitingfor']=None
+                   		self.schedule[(ts,channel)].waitingfor=None
 
                     		return isACKed, isNACKed
 			elif type=='DEBRAS':
@@ -3263,7 +3158,7 @@ class Mote(object):
 		                self.engine.deBrasReceived+=1
 
 		                (isACKed, isNACKed) = (False, False) # it is not acked, however it is not important since in txdone is not checked
-		                self.schedule[(ts,channel)]['waitingfor']=None
+		                self.schedule[(ts,channel)].waitingfor=None
 		                return isACKed, isNACKed
 			elif type=='SIXTOP_CMD':
 			    #request comands
@@ -3278,7 +3173,7 @@ class Mote(object):
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_ADD(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 
 						return isACKed, isNACKed
 					else:
@@ -3287,7 +3182,7 @@ class Mote(object):
 
 						self._stats_incrementMoteStats('zixtopdroppedBusy') 
 						(isACKed, isNACKed) = (False, True)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 
 				elif payload[2]==self.IANA_6TOP_CMD_DELETE:
@@ -3297,14 +3192,14 @@ class Mote(object):
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_DELETE(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					else:
 						#mote is busy, send NACK
 						self._stats_incrementMoteStats('zixtopdroppedBusy') 
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						(isACKed, isNACKed) = (False, True)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 
 				#response comands
@@ -3316,7 +3211,7 @@ class Mote(object):
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_ADD_response(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					if payload[3]==self.IANA_6TOP_CMD_DELETE:
 
@@ -3324,7 +3219,7 @@ class Mote(object):
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_DELETE_response(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					else:
 						print "Unknown Auxiliar code. Wrong Return Code"
@@ -3337,14 +3232,14 @@ class Mote(object):
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_ADD_response(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					if payload[3]==self.IANA_6TOP_CMD_DELETE:
 						assert self.sixtopState==self.SIX_STATE_WAIT_DELETERESPONSE
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_DELETE_response(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					else:
 						print "Unknown Auxiliar code. Wrong Return Code"
@@ -3364,17 +3259,17 @@ class Mote(object):
                         (isACKed, isNACKed) = (False, False)
 
 
-                        self.schedule[(ts,channel)]['waitingfor']=None
+                        self.schedule[(ts,channel)].waitingfor=None
                         return isACKed, isNACKed
 
 	    #this is a dedicated cell
             if type=='DATA' or type=='SIXTOP_CMD':               
-                for i_ch in range(0,self.settings.numChans):                
-                    if (ts,i_ch) in self.schedule.keys() and self.schedule[(ts,channel)]['dir']!=self.DIR_SHARED:           
-                        assert self.schedule[(ts,channel)]['dir']!=self.DIR_SHARED 
-                        if self.schedule[(ts,i_ch)]['waitingfor']==self.DIR_RX:
-                            assert self.schedule[(ts,i_ch)]['dir']==self.DIR_RX
-                            assert self.schedule[(ts,i_ch)]['waitingfor']==self.DIR_RX
+                for (i_ch,_) in list(self.schedule.getCellsAtTs(ts)):
+                    if (ts,i_ch) in self.schedule and self.schedule[(ts,channel)].dir!=self.DIR_SHARED:           
+                        assert self.schedule[(ts,channel)].dir!=self.DIR_SHARED 
+                        if self.schedule[(ts,i_ch)].waitingfor==self.DIR_RX:
+                            assert self.schedule[(ts,i_ch)].dir==self.DIR_RX
+                            assert self.schedule[(ts,i_ch)].waitingfor==self.DIR_RX
 
                             if smac:	#it is for this mote
 				if type=='SIXTOP_CMD':
@@ -3389,13 +3284,13 @@ class Mote(object):
 						self._sixtop_receiveCMD_ADD(type, smac,dmac, payload)
 						
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					else:
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._stats_incrementMoteStats('zixtopdroppedBusy') 
 						(isACKed, isNACKed) = (False, True)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 				    elif payload[2]==self.IANA_6TOP_CMD_DELETE:
 					if self.sixtopState==self.IDLE:
@@ -3403,13 +3298,13 @@ class Mote(object):
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_DELETE(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					else:
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._stats_incrementMoteStats('zixtopdroppedBusy') 
 						(isACKed, isNACKed) = (False, True)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 
 				    #response comands
@@ -3420,7 +3315,7 @@ class Mote(object):
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_ADD_response(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					if payload[3]==self.IANA_6TOP_CMD_DELETE:
 
@@ -3428,7 +3323,7 @@ class Mote(object):
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_DELETE_response(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					else:
 						print "Unknown Auxiliar code. Wrong Return Code"
@@ -3443,14 +3338,14 @@ class Mote(object):
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_ADD_response(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					if payload[3]==self.IANA_6TOP_CMD_DELETE:
 						assert self.sixtopState==self.SIX_STATE_WAIT_DELETERESPONSE
 						self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)
 						self._sixtop_receiveCMD_DELETE_response(type, smac,dmac, payload)
 						(isACKed, isNACKed) = (True, False)
-						self.schedule[(ts,channel)]['waitingfor']=None
+						self.schedule[(ts,channel)].waitingfor=None
 						return isACKed, isNACKed
 					else:
 						print "Unknown Auxiliar code. Wrong Return Code"
@@ -3465,7 +3360,7 @@ class Mote(object):
 				    self._logChargeConsumed(self.CHARGE_RxDataTxAck_uC)	
 		
 				    # update schedule stats
-				    self.schedule[(ts,i_ch)]['numRx'] += 1
+				    self.schedule[(ts,i_ch)].numRx += 1
 				    self.numReceptions += 1
 
 				    if self.dagRoot:
@@ -3489,25 +3384,24 @@ class Mote(object):
 
 					    (isACKed, isNACKed) = (True, False)
 					    
-					    self.schedule[(ts,i_ch)]['waitingfor']=None
+					    self.schedule[(ts,i_ch)].waitingfor=None
 					    return isACKed, isNACKed
 				    else:
 					    # relaying packet
 					    self._otf_incrementIncomingTraffic(smac)
 					    
 					    # update the number of hops
-					    newPayload     = copy.deepcopy(payload)
-					    newPayload[2] += 1
+					    newPayload     = Packet.getRelayedPayload(payload)
 					    
 					    # create packet
-					    relayPacket = {
-						'source':	  self,
-						'dest':		  self.preferredParent,
-						'asn':         asn,
-						'type':        type,
-						'payload':     newPayload,
-						'retriesLeft': self.TSCH_MAXTXRETRIES
-					    }
+					    relayPacket = Packet.Packet(
+						source         = self,
+						dest           = self.preferredParent,
+						asn            = asn,
+						type           = type,
+						payload        = newPayload,
+						retriesLeft    = self.TSCH_MAXTXRETRIES
+					    )
 					    
 					    # enqueue packet in TSCH queue
 					    isEnqueued = self._tsch_enqueue(relayPacket,None)
@@ -3519,14 +3413,14 @@ class Mote(object):
 					
 						(isACKed, isNACKed) = (True, False)
 					
-						self.schedule[(ts,i_ch)]['waitingfor']=None                                
+						self.schedule[(ts,i_ch)].waitingfor=None                                
 						return isACKed, isNACKed
 					    else:
 						#send nack even if there is no empty space
 						self._stats_incrementMoteStats('droppedAppFailedEnqueue')
 						(isACKed, isNACKed) = (False, True)
 
-						self.schedule[(ts,i_ch)]['waitingfor']=None
+						self.schedule[(ts,i_ch)].waitingfor=None
 						return isACKed, isNACKed
                             else:
                                 # this was an idle listen
@@ -3536,7 +3430,7 @@ class Mote(object):
                                 
                                 (isACKed, isNACKed) = (False, False)
                     
-                                self.schedule[(ts,i_ch)]['waitingfor']=None
+                                self.schedule[(ts,i_ch)].waitingfor=None
                                 return isACKed, isNACKed    
             
             else:#packet illegible I dont know type neither cell 
@@ -3547,37 +3441,44 @@ class Mote(object):
                  (isACKed, isNACKed) = (False, False)  
                  
                  #if the broadcast packet has failed, we still can wait for a correct broadcast in other channel
-                 if (ts,channel) in self.schedule.keys():    
-                     self.schedule[(ts,channel)]['waitingfor']=None
+                 if (ts,channel) in self.schedule:    
+                     self.schedule[(ts,channel)].waitingfor=None
 
                  return isACKed, isNACKed
            
     
     #===== wireless
     
+    # the link tables are rows of the engine's link matrices, reading or
+    # writing a single entry does not need the lock
+    
     def setPDR(self,neighbor,pdr):
         ''' sets the pdr to that neighbor'''
-        with self.dataLock:
-            self.PDR[neighbor] = pdr
+        self.PDR[neighbor.id] = pdr
+        self.updateNeighbors([neighbor.id])
     
     def getPDR(self,neighbor):
         ''' returns the pdr to that neighbor'''
-        with self.dataLock:
-            return self.PDR[neighbor]
+        pdr = self.PDR.item(neighbor.id)
+        if pdr!=pdr:
+            # NaN, never computed
+            raise KeyError(neighbor)
+        return pdr
     
     def setRSSI(self,neighbor,rssi):
         ''' sets the RSSI to that neighbor'''
-        with self.dataLock:
-            self.RSSI[neighbor] = rssi
+        self.RSSI[neighbor.id] = rssi
     
     def getRSSI(self,neighbor):
         ''' returns the RSSI to that neighbor'''
-        with self.dataLock:
-            #emunicio
-            if neighbor==self:
-                return self.minRssi
-            else:
-                return self.RSSI[neighbor]
+        #emunicio
+        if neighbor is self:
+            return self.minRssi
+        rssi = self.RSSI.item(neighbor.id)
+        if rssi!=rssi:
+            # NaN, never computed
+            raise KeyError(neighbor)
+        return rssi
     
     def _estimateETX(self,neighbor):
         
@@ -3593,10 +3494,10 @@ class Mote(object):
             numTx                 = self.NUM_SUFFICIENT_TX
             numTxAck              = math.floor(pdr*numTx)
 
-            for (_,cell) in self.schedule.items():
-                if (cell['neighbor'] == neighbor) and (cell['dir'] == self.DIR_TX):  #ok shared cell broadcast is not taken in account
-                    numTx        += cell['numTx']
-                    numTxAck     += cell['numTxAck']
+            # add the counters of the TX cells to that neighbor, ok shared cell broadcast is not taken in account
+            (cellsNumTx,cellsNumTxAck) = self.schedule.getTxCounts(self.DIR_TX,neighbor)
+            numTx                += cellsNumTx
+            numTxAck             += cellsNumTxAck
             
             # abort if about to divide by 0
             if not numTxAck:
@@ -3607,8 +3508,19 @@ class Mote(object):
 	    
             return etx
     
+    def updateNeighbors(self,ids):
+        ''' the PDR to the motes with these ids was written, update the neighbor ids '''
+        for id in ids:
+            isNeighbor  = self.PDR.item(id)>0 # False for NaN
+            i           = bisect.bisect_left(self.neighborIds,id)
+            wasNeighbor = i<len(self.neighborIds) and self.neighborIds[i]==id
+            if isNeighbor and not wasNeighbor:
+                self.neighborIds.insert(i,id)
+            elif wasNeighbor and not isNeighbor:
+                del self.neighborIds[i]
+    
     def _myNeigbors(self):
-        return [n for n in self.PDR.keys() if self.PDR[n]>0]
+        return [self.engine.motes[id] for id in self.neighborIds]
 
     #===== clock
    
@@ -3701,7 +3613,7 @@ class Mote(object):
 	    self._schedule_setDeBrasInitialCells()
 	
 	self.maxWinShared=5						#set initial win size for shared cells
-	self.numberOfWaitings=random.randint(0,self.maxWinShared)	#set initial delay for use the shared cells
+	self.numberOfWaitings=self.random.randint(0,self.maxWinShared)	#set initial delay for use the shared cells
 
 	#record the visible neighbours at boot
 	self.numVisibleNeighbors=self._myNeigbors()
@@ -3720,24 +3632,24 @@ class Mote(object):
    
     def getTxCells(self):
         with self.dataLock:
-            return [(ts,c['ch'],c['neighbor']) for ((ts,ch),c) in self.schedule.items() if c['dir']==self.DIR_TX]
+            return [(ts,c.ch,c.neighbor) for ((ts,ch),c) in self.schedule.getCellsByDir(self.DIR_TX).items()]
     
     def getRxCells(self):
         with self.dataLock:
-            return [(ts,c['ch'],c['neighbor']) for ((ts,ch),c) in self.schedule.items() if c['dir']==self.DIR_RX]
+            return [(ts,c.ch,c.neighbor) for ((ts,ch),c) in self.schedule.getCellsByDir(self.DIR_RX).items()]
     def getRxCellsToNeighbor(self,neighbor):
         with self.dataLock:
-            return [(ts,c['ch'],c['neighbor']) for ((ts,ch),c) in self.schedule.items() if c['dir']==self.DIR_RX and c['neighbor']==neighbor]
+            return [(ts,c.ch,c.neighbor) for ((ts,ch),c) in self.schedule.getCellsByNeighbor(self.DIR_RX,neighbor).items()]
     def getTxCellsToNeighbor(self,neighbor):
         with self.dataLock:
-            return [(ts,c['ch'],c['neighbor']) for ((ts,ch),c) in self.schedule.items() if c['dir']==self.DIR_TX and c['neighbor']==neighbor]
+            return [(ts,c.ch,c.neighbor) for ((ts,ch),c) in self.schedule.getCellsByNeighbor(self.DIR_TX,neighbor).items()]
 
     def getSharedCells(self):
         with self.dataLock:
-            return [(ts,c['ch'],c['neighbor']) for ((ts,ch),c) in self.schedule.items() if c['dir']==self.DIR_SHARED]
+            return [(ts,c.ch,c.neighbor) for ((ts,ch),c) in self.schedule.getCellsByDir(self.DIR_SHARED).items()]
     def getDeBrasSharedCells(self):
         with self.dataLock:
-            return [(ts,c['ch'],c['neighbor']) for ((ts,ch),c) in self.schedule.items() if c['isDebras']==True]
+            return [(ts,c.ch,c.neighbor) for ((ts,ch),c) in self.schedule.getDebrasCells().items()]
 
     #===== stats
     
@@ -3844,13 +3756,13 @@ class Mote(object):
         returnVal = None
         with self.dataLock:
             for ((ts,ch),cell) in self.schedule.items():
-                if ts==ts_p and cell['ch']==ch_p:
+                if ts==ts_p and cell.ch==ch_p:
                     returnVal = {
-                        'dir':            cell['dir'],
-                        'neighbor':       cell['neighbor'].id,
-                        'numTx':          cell['numTx'],
-                        'numTxAck':       cell['numTxAck'],
-                        'numRx':          cell['numRx'],
+                        'dir':            cell.dir,
+                        'neighbor':       cell.neighbor.id,
+                        'numTx':          cell.numTx,
+                        'numTxAck':       cell.numTxAck,
+                        'numRx':          cell.numRx,
                     }
                     break
         return returnVal
@@ -3973,26 +3885,17 @@ class Mote(object):
 		for n in range(0,self.settings.numSHAREDCells):
                     cell = (ts_b,j_ch)
 
-		    self.schedule[(ts_b,j_ch)] = {
-	                'ts':                        ts_b,
-	                'ch':                        j_ch,
-	                'dir':                       self.DIR_SHARED,
-	                'neighbor':                  None,	#no neighbor predefined since is shared cell
-			'isDebras':		     False,
-			'debrasFreshness':           0,
-	                'numTx':                     0,
-	                'numTxAck':                  0,
-	                'sharedCell_id':             sharedCell_id,
-	                'numRx':                     0,
-	                'busy':                      0,
-	                'history':                   [],
-	                'waitingfor':                None,
-	                'rxDetectedCollision':       False,
-	                'debug_canbeInterfered':     [],                      # [debug] shows schedule collision that can be interfered with minRssi or larger level 
-	                'debug_interference':        [],                      # [debug] shows an interference packet with minRssi or larger level 
-	                'debug_lockInterference':    [],                      # [debug] shows locking on the interference packet
-	                'debug_cellCreatedAsn':      self.engine.getAsn(),    # [debug]
-	            }
+		    self.schedule[(ts_b,j_ch)] = Schedule.Cell(
+	                ts               = ts_b,
+	                ch               = j_ch,
+	                dir              = self.DIR_SHARED,
+	                neighbor         = None, # no neighbor predefined since is shared cell
+	                isDebras         = False,
+	                sharedCell_id    = sharedCell_id,
+	                createdAsn       = self.engine.getAsn(),
+	                historyLength    = self.NUM_MAX_HISTORY,
+	                debugHistory     = self.settings.debugCellHistory,
+	            )
 
 		    ts_b+=int(self.settings.slotframeLength/self.settings.numSHAREDCells)
 		    sharedCell_id+=1
@@ -4014,29 +3917,20 @@ class Mote(object):
 
 		    if sharedCell_id < self.settings.numMotes:
 
-			    if (ts_b,j_ch) in self.schedule.keys():
+			    if (ts_b,j_ch) in self.schedule:
 		    		assert False
 
-			    self.schedule[(ts_b,j_ch)] = {
-		                'ts':                        ts_b,
-		                'ch':                        j_ch,
-		                'dir':                       self.DIR_SHARED,
-		                'neighbor':                  None,	#no neighbor predefined since is shared cell
-				'isDebras':		     True,
-				'debrasFreshness':           0,
-		                'numTx':                     0,
-		                'numTxAck':                  0,
-		                'sharedCell_id':              sharedCell_id,
-		                'numRx':                     0,
-		                'busy':                      0,
-		                'history':                   [],
-		                'waitingfor':                None,
-		                'rxDetectedCollision':       False,
-		                'debug_canbeInterfered':     [],                      # [debug] shows schedule collision that can be interfered with minRssi or larger level 
-		                'debug_interference':        [],                      # [debug] shows an interference packet with minRssi or larger level 
-		                'debug_lockInterference':    [],                      # [debug] shows locking on the interference packet
-		                'debug_cellCreatedAsn':      self.engine.getAsn(),    # [debug]
-		            }
+			    self.schedule[(ts_b,j_ch)] = Schedule.Cell(
+		                ts               = ts_b,
+		                ch               = j_ch,
+		                dir              = self.DIR_SHARED,
+		                neighbor         = None, # no neighbor predefined since is shared cell
+		                isDebras         = True,
+		                sharedCell_id    = sharedCell_id,
+		                createdAsn       = self.engine.getAsn(),
+		                historyLength    = self.NUM_MAX_HISTORY,
+		                debugHistory     = self.settings.debugCellHistory,
+		            )
 
 			    ts_b+=int(self.settings.slotframeLength/self.settings.numDeBraSCells)
 			    sharedCell_id+=1
@@ -4046,35 +3940,39 @@ class Mote(object):
             if self.settings.numDeBraSCells!=0:            
                 self.maxWin=math.ceil((float(self.settings.numMotes)/(sharedCell_id)))
                 self.numberOfWaitingsDeBras= int((self.id/(sharedCell_id)))                    
-                value=[(ts,c['ch']) for ((ts,ch),c) in self.schedule.items() if c['isDebras']==True if c['sharedCell_id']==(self.id % (sharedCell_id))]
+                value=[(ts,c.ch) for ((ts,ch),c) in self.schedule.items() if c.isDebras==True if c.sharedCell_id==(self.id % (sharedCell_id))]
                 self.myBrTs=value[0][0]
                 self.myBrCh=value[0][1]
 		
 		#if aloha version, set random waitings and set the win size
 		if self.DEBRASALOHA==True:
 			self.maxWin=int(((self.settings.numMotes-1)/(sharedCell_id))) *2
-			self.numberOfWaitingsDeBras=random.randint(0,self.maxWin)
+			self.numberOfWaitingsDeBras=self.random.randint(0,self.maxWin)
+
+    def _debras_getLastHeard(self):
+        ''' ASN at which a neighbor last reported a cell, indexed by [ts,ch], -1 if none did '''
+        lastHeard = np.full((self.settings.slotframeLength,self.settings.numChans),-1,dtype=np.int32)
+        for neighSchedule in self.scheduleNeigborhood.values():
+            np.maximum(lastHeard,neighSchedule.lastHeard,out=lastHeard)
+        return lastHeard
 
     def _updateSchedule(self,scheduleOfNeighbor,neighbor):
     	''' Actions when received a DEBRAS message '''
         with self.dataLock:
 
-		if neighbor not in self.scheduleNeigborhood.keys():
-		    self.scheduleNeigborhood[neighbor]={}
-
-		for c in scheduleOfNeighbor.values():
-		    if (c['ts'],c['ch']) not in self.scheduleNeigborhood[neighbor].keys():
+		if neighbor not in self.scheduleNeigborhood:
+		    self.scheduleNeigborhood[neighbor]=Schedule.NeighborSchedule(self.settings.slotframeLength,self.settings.numChans)
 
-			self.scheduleNeigborhood[neighbor][(c['ts'],c['ch'])]=c
-			self.scheduleNeigborhood[neighbor][(c['ts'],c['ch'])]['debrasFreshness']+=1
+		#cells I did not know yet
+		for (ts,ch) in self.scheduleNeigborhood[neighbor].update(scheduleOfNeighbor,self.engine.getAsn()):
 
 			#perform relocation in case of collision detected:
-			if (c['ts'],c['ch']) in self.schedule.keys() and self.schedule[(c['ts'],c['ch'])]['dir']=='TX' and self.schedule[(c['ts'],c['ch'])]['neighbor']!=self.preferredParent:
+			if (ts,ch) in self.schedule and self.schedule[(ts,ch)].dir=='TX' and self.schedule[(ts,ch)].neighbor!=self.preferredParent:
 
 				if len(self.getTxCells())>1 and self.sixtopState==self.IDLE and self.rplParentChangeOperationInCourse==False:
 
 				    if len(self.engine.nodeHasTxCellsTime.keys())==self.settings.numMotes-1:
-		            	        self._sixtop_removeCells_request_action(self.preferredParent,1,[(c['ts'],c['ch'])])
+		            	        self._sixtop_removeCells_request_action(self.preferredParent,1,[(ts,ch)])
 
 		                        # update stats
 		                        self._stats_incrementMoteStats('topTxRelocatedCells')
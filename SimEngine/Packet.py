@@ -0,0 +1,125 @@
+#!/usr/bin/python
+'''
+\brief Packets in the TSCH queues of the motes.
+
+The header of a packet (source, dest, asn, type) and its payload are set
+when it is created and cannot be changed; only retriesLeft counts down as
+the packet is transmitted.
+
+Only the payload goes over the air. The payload of a DATA packet is a
+(source id, generation asn, number of hops) tuple, which a relay does not
+modify: it sends a new packet with a new tuple, the hop counter incremented.
+
+A PacketQueue holds packets in FIFO order. It also counts them by type and
+indexes them by destination, so these lookups do not scan the queue.
+'''
+
+#============================ logging =========================================
+
+import logging
+class NullHandler(logging.Handler):
+    def emit(self, record):
+        pass
+log = logging.getLogger('Packet')
+log.setLevel(logging.ERROR)
+log.addHandler(NullHandler())
+
+#============================ imports =========================================
+
+import collections
+
+#============================ defines =========================================
+
+#============================ helpers =========================================
+
+def getRelayedPayload(payload):
+    ''' payload of a relayed DATA packet, one hop further '''
+    return (payload[0],payload[1],payload[2]+1)
+
+#============================ body ============================================
+
+class Packet(object):
+
+    __slots__ = ['_source','_dest','_asn','_type','_payload','retriesLeft']
+
+    def __init__(self,source,dest,asn,type,payload,retriesLeft):
+        self._source                   = source      # mote which enqueued the packet
+        self._dest                     = dest        # next hop, None for broadcast
+        self._asn                      = asn         # when the packet was enqueued
+        self._type                     = type
+        self._payload                  = payload
+        self.retriesLeft               = retriesLeft
+
+    source  = property(lambda self: self._source)
+    dest    = property(lambda self: self._dest)
+    asn     = property(lambda self: self._asn)
+    type    = property(lambda self: self._type)
+    payload = property(lambda self: self._payload)
+
+    def __repr__(self):
+        return 'Packet(type={0} source={1} dest={2} asn={3} payload={4})'.format(
+            self._type,
+            getattr(self._source,'id',None),
+            getattr(self._dest,'id',None),
+            self._asn,
+            self._payload,
+        )
+
+class PacketQueue(object):
+    ''' packets in FIFO order, compared by identity '''
+
+    def __init__(self):
+
+        # local variables
+        self.packets                   = collections.deque()
+        self.countsByType              = {} # indexed by type, contains the number of packets of that type
+        self.packetsByDest             = {} # indexed by dest, contains the packets to that dest, in order
+
+    def __len__(self):
+        return len(self.packets)
+
+    def __iter__(self):
+        return iter(self.packets)
+
+    def __getitem__(self,i):
+        return self.packets[i]
+
+    def __contains__(self,packet):
+        return packet in self.packetsByDest.get(packet.dest,[])
+
+    #======================== public ==========================================
+
+    def append(self,packet):
+        ''' enqueue packet at the tail '''
+        self.packets.append(packet)
+        self.countsByType[packet.type] = self.countsByType.get(packet.type,0)+1
+        self.packetsByDest.setdefault(packet.dest,[]).append(packet)
+
+    def remove(self,packet):
+        ''' remove packet, usually at the head '''
+        if self.packets and self.packets[0] is packet:
+            self.packets.popleft()
+        else:
+            self.packets.remove(packet)
+        self.countsByType[packet.type] -= 1
+        if not self.countsByType[packet.type]:
+            del self.countsByType[packet.type]
+        packetsToDest = self.packetsByDest[packet.dest]
+        packetsToDest.remove(packet)
+        if not packetsToDest:
+            del self.packetsByDest[packet.dest]
+
+    def index(self,packet):
+        ''' position of packet in the queue, the head is 0 '''
+        for (i,p) in enumerate(self.packets):
+            if p is packet:
+                return i
+        raise ValueError('packet not in queue')
+
+    def countType(self,type):
+        ''' number of packets of that type '''
+        return self.countsByType.get(type,0)
+
+    def getPacketsTo(self,dest):
+        ''' the packets to dest, in order; do not modify '''
+        return self.packetsByDest.get(dest,[])
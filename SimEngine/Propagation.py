@@ -22,12 +22,10 @@ log.addHandler(NullHandler())
 #============================ imports =========================================
 
 import threading
-import random
 import math
 import operator
 
 import Topology
-import SimSettings
 import SimEngine
 
 #============================ defines =========================================
@@ -36,40 +34,24 @@ import SimEngine
 
 class Propagation(object):
     
-    #===== start singleton
-    _instance      = None
-    _init          = False
-    
-    def __new__(cls, *args, **kwargs):
-        if not cls._instance:
-            cls._instance = super(Propagation,cls).__new__(cls, *args, **kwargs)
-        return cls._instance
-    #===== end singleton
-    
-    def __init__(self):
+    def __init__(self,context):
         
-        #===== start singleton
-        # don't re-initialize an instance (needed because singleton)
-        if self._init:
-            return
-        self._init = True
-        #===== end singleton
-
         # store params
-        self.settings                  = SimSettings.SimSettings()
-        self.engine                    = SimEngine.SimEngine()
+        self.settings                  = context.settings
+        self.engine                    = context.engine
+        self.random                    = context.random
         
         # variables
-        self.dataLock                  = threading.Lock()
+        if self.settings.gui:
+            self.dataLock              = threading.Lock()
+        else:
+            self.dataLock              = SimEngine.NoLock()
         self.receivers                 = [] # motes with radios currently listening
         self.transmissions             = [] # ongoing transmissions
-	
-        # schedule propagation task
-        self._schedule_propagate()
-    
-    def destroy(self):
-        self._instance                 = None
-        self._init                     = False
+        self.receiversByCell           = {} # indexed by (ts,channel), receivers listening in that cell
+        self.transmissionsByChannel    = {} # indexed by channel, transmissions on that channel
+        self.propagateAsn              = None # ASN at which propagate is scheduled, None if not scheduled
+        self.rssiPdrTable              = Topology.RSSI_PDR_TABLES[Topology.Topology.BAND]
     
     #======================== public ==========================================
     
@@ -78,22 +60,28 @@ class Propagation(object):
     def startRx(self,mote,ts,channel):
         ''' add a mote as listener on a channel'''
         with self.dataLock:
-            self.receivers += [{
+            receiver = {
                 'mote':                mote,
-		'ts':                ts,
+                'ts':                  ts,
                 'channel':             channel,
-            }]
+            }
+            self.receivers += [receiver]
+            self.receiversByCell.setdefault((ts,channel),[]).append(receiver)
+            self._schedule_propagate()
     
     def startTx(self,channel,type,smac,dmac,payload):
         ''' add a mote as using a channel for tx'''
         with self.dataLock:
-            self.transmissions  += [{
+            transmission = {
                 'channel':             channel,
                 'type':                type,
                 'smac':                smac,
                 'dmac':                dmac,
                 'payload':             payload,
-            }]
+            }
+            self.transmissions  += [transmission]
+            self.transmissionsByChannel.setdefault(channel,[]).append(transmission)
+            self._schedule_propagate()
     
     def propagate(self):
         ''' Simulate the propagation of pkts in a slot. '''
@@ -111,386 +99,338 @@ class Propagation(object):
                     arrivalTime[transmission['smac']] = transmission['smac'].clock_getOffsetToDagRoot()
                 else:
                     arrivalTime[transmission['smac']] = self.engine.getAsn()
-
-            #sor transmissions by channel
-            sortedTransmissionByChannel=[]
-            for i in range(0,self.settings.numChans):
-                for transmission in self.transmissions:
-                    if transmission['channel']==i:
-                        sortedTransmissionByChannel.append(transmission)
-
-
-	    nodesRxAtThisCell=[]
-	    txcell=[None,None]
-            for transmission in sortedTransmissionByChannel:
+            
+            # handle the transmissions channel by channel
+            for channel in range(0,self.settings.numChans):
                 
-                i           = 0 # index of a receiver
-                isACKed     = False
-                isNACKed    = False
-
-		#get nodes receiving at this channel
-		if txcell == [None,None]:
-			txcell[0]=ts
-			txcell[1]=transmission['channel']
-			nodesRxAtThisCell=[]
-			for recv in self.receivers:
-			    if recv['ts']==ts and recv['channel']==transmission['channel']:
-			        nodesRxAtThisCell.append(recv)			
-		else:
-		    if txcell[1]!=transmission['channel']:
-			assert txcell[0]==ts
-			txcell[1]=transmission['channel']
-			nodesRxAtThisCell=[]
-			for recv in self.receivers:
-			    if recv['ts']==ts and recv['channel']==transmission['channel']:
-			        nodesRxAtThisCell.append(recv)
-
-                if 'DEBRAS' == transmission['type'] or 'RPLTRAFFIC' == transmission['type']:
-		    while i<len(self.receivers):
-
-                        if self.receivers[i] in nodesRxAtThisCell:
-
-                            interferers = [t['smac'] for t in self.transmissions if (t!=transmission) and (t['channel']==transmission['channel'])]
+                transmissionsOnChannel = self.transmissionsByChannel.get(channel)
+                if not transmissionsOnChannel:
+                    continue
+                
+                # motes listening in this cell, and how many of their radios can still receive
+                receiversAtThisCell = self.receiversByCell.get((ts,channel),[])
+                nodesRxAtThisCell   = {}
+                for recv in receiversAtThisCell:
+                    nodesRxAtThisCell[recv['mote'].id] = nodesRxAtThisCell.get(recv['mote'].id,0)+1
+                
+                # what each receiver hears on this channel, filled in by _getInterference
+                interferenceAtReceiver = {}
+                
+                for transmission in transmissionsOnChannel:
+                    
+                    isACKed     = False
+                    isNACKed    = False
+                    
+                    # other transmissions on the same channel
+                    interferers = [t['smac'] for t in transmissionsOnChannel if t!=transmission]
+                    
+                    if 'DEBRAS' == transmission['type'] or 'RPLTRAFFIC' == transmission['type']:
+                        
+                        for recv in receiversAtThisCell:
+                            
+                            if not nodesRxAtThisCell[recv['mote'].id]:
+                                continue
+                            
+                            interference     = self._getInterference(recv['mote'],transmissionsOnChannel,interferenceAtReceiver)
+                            interferenceFlag = 1 if interference['audible'].difference([transmission['smac']]) else 0
                             
-                            interferenceFlag = 0
-                            for itfr in interferers:
-                               
-                                if self.receivers[i]['mote'].getRSSI(itfr) +(-97-(-105))>self.receivers[i]['mote'].minRssi:
-                                    interferenceFlag = 1
-
                             if interferenceFlag:
                                 transmission['smac'].stats_incrementRadioStats('probableCollisions') 
-
+                            
                             lockOn = transmission['smac']
                             for itfr in interferers:
-
-                                if arrivalTime[itfr] < arrivalTime[lockOn] and self.receivers[i]['mote'].getRSSI(itfr)+(-97-(-105))>self.receivers[i]['mote'].minRssi:
+                                if arrivalTime[itfr] < arrivalTime[lockOn] and itfr in interference['audible']:
                                     # lock on interference
                                     lockOn = itfr
                             
                             if lockOn == transmission['smac']:
                                 # mote locked in the current signal
-
-                                transmission['smac'].schedule[(ts,transmission['channel'])]['debug_lockInterference'] += [0] # debug only
+                                
+                                if self.settings.debugCellHistory:
+                                    transmission['smac'].schedule[(ts,transmission['channel'])].debug_lockInterference.append(0) # debug only
                                 
                                 # calculate pdr, including interference
-                                sinr  = self._computeSINR(transmission['smac'],self.receivers[i]['mote'],interferers,True)
-                                pdr   = self._computePdrFromSINR(sinr, self.receivers[i]['mote'])
+                                sinr  = self._computeSINR(transmission['smac'],recv['mote'],interference,True)
+                                pdr   = self._computePdrFromSINR(sinr, recv['mote'])
                                 
-				# calculate pdr, without interference to check later if there have been a collision
-				sinr2  = self._computeSINR(transmission['smac'],self.receivers[i]['mote'],[],False)
-				pdr2   = self._computePdrFromSINR(sinr2, self.receivers[i]['mote'])
-                                                                  
                                 # pick a random number
-                                failure = random.random() 
-
+                                failure = self.random.random() 
+                                
                                 if pdr>=failure:
-        
-                                    isACKed, isNACKed = self.receivers[i]['mote'].radio_rxDone(
+                                    
+                                    isACKed, isNACKed = recv['mote'].radio_rxDone(
                                         type       = transmission['type'],
                                         smac       = transmission['smac'],
-                                        dmac       = self.receivers[i]['mote'],
+                                        dmac       = recv['mote'],
                                         payload    = transmission['payload'],
                                         channel    = transmission['channel']
-					
                                     )
-				    #Desired debras/RPL packet is received, this node can not receive more in this cell
-				    nodesRxAtThisCell.remove(self.receivers[i])
-                                    
+                                    #Desired debras/RPL packet is received, this node can not receive more in this cell
+                                    nodesRxAtThisCell[recv['mote'].id] -= 1
+                                
                                 else:
-
+                                    
                                     if interferenceFlag:
-					   if pdr2 > 0.0:
-						#this a collision, this node can not receive more
-						nodesRxAtThisCell.remove(self.receivers[i])
-						#collisions in shared cells are not considered for the stats
-
-			      #only for debug
-##                            else:                                                            
-                                # mote locked in an interfering signal
-
-#                                # for debug
-#                                transmission['smac'].schedule[(ts,transmission['channel'])]['debug_lockInterference'] += [1]
-#                                
-#                                # receive the interference as if it's a desired packet
-#                                interferers.remove(lockOn)
-#                                pseudo_interferers = interferers + [transmission['smac']]
-#                                
-#                                # calculate SINR where locked interference and other signals are considered S and I+N respectively
-#                                pseudo_sinr  = self._computeSINR(lockOn,self.receivers[i]['mote'],pseudo_interferers)
-#                                pseudo_pdr   = self._computePdrFromSINR(pseudo_sinr, self.receivers[i]['mote'])
-                               
-#                                # pick a random number
-#                                failure = random.random()
-                                
-                                #if pseudo_pdr>=failure:
-                                    # success to receive the interference and realize collision
-                                    #self.receivers[i]['mote'].schedule[(ts,transmission['channel'])]['rxDetectedCollision'] = True
-
-
-                        i += 1
-
-		#propagation of a 6P packet
-		elif 'SIXTOP_CMD' == transmission['type']:
-
-                    #for recv in self.receivers:
-		    while i<len(self.receivers):
-
-			if self.receivers[i] in nodesRxAtThisCell:
-
+                                        if self._getNoInterferencePdr(transmission['smac'],recv['mote'],interference) > 0.0:
+                                            #this a collision, this node can not receive more
+                                            nodesRxAtThisCell[recv['mote'].id] -= 1
+                                            #collisions in shared cells are not considered for the stats
+                    
+                    #propagation of a 6P packet
+                    elif 'SIXTOP_CMD' == transmission['type']:
+                        
+                        for recv in receiversAtThisCell:
+                            
+                            if not nodesRxAtThisCell[recv['mote'].id]:
+                                continue
+                            
                             # this packet is destined for this mote
-                            if self.receivers[i]['mote']==transmission['dmac']:
-                         
+                            if recv['mote']==transmission['dmac']:
+                                
                                 if not self.settings.noInterference:
                                     #================ with interference ===========
-                                     
-                                    interferers = [t['smac'] for t in self.transmissions if (t!=transmission) and (t['channel']==transmission['channel'])]
-                                                                        
-                                    interferenceFlag = 0
-                                    for itfr in interferers:
-
-                                        if self.receivers[i]['mote'].getRSSI(itfr)+(-97-(-105))>self.receivers[i]['mote'].minRssi:
-					    #print "node "+str(itfr.id)+"is Interferer with "+str(recv['mote'].id)
-                                            interferenceFlag = 1
-                                            
-                                    transmission['smac'].schedule[(ts,transmission['channel'])]['debug_interference'] += [interferenceFlag] # debug only
-                                                                                                            
+                                    
+                                    interference     = self._getInterference(recv['mote'],transmissionsOnChannel,interferenceAtReceiver)
+                                    interferenceFlag = 1 if interference['audible'].difference([transmission['smac']]) else 0
+                                    
+                                    if self.settings.debugCellHistory:
+                                        transmission['smac'].schedule[(ts,transmission['channel'])].debug_interference.append(interferenceFlag) # debug only
+                                    
                                     if interferenceFlag:
                                         transmission['smac'].stats_incrementRadioStats('probableCollisions') 
                                     
                                     lockOn = transmission['smac']
                                     for itfr in interferers:
-                                        if arrivalTime[itfr] < arrivalTime[lockOn] and self.receivers[i]['mote'].getRSSI(itfr)+(-97-(-105))>self.receivers[i]['mote'].minRssi:
-                                            # lock on interference                  
+                                        if arrivalTime[itfr] < arrivalTime[lockOn] and itfr in interference['audible']:
+                                            # lock on interference
                                             lockOn = itfr
                                     
                                     if lockOn == transmission['smac']:
                                         # mote locked in the current signal
                                         
-                                        transmission['smac'].schedule[(ts,transmission['channel'])]['debug_lockInterference'] += [0] # debug only
+                                        if self.settings.debugCellHistory:
+                                            transmission['smac'].schedule[(ts,transmission['channel'])].debug_lockInterference.append(0) # debug only
                                         
                                         # calculate pdr, including interference
-                                        sinr  = self._computeSINR(transmission['smac'],self.receivers[i]['mote'],interferers,False)
-                                        pdr   = self._computePdrFromSINR(sinr, self.receivers[i]['mote'])
-
-					# calculate pdr, without interference to check later if there have been a collision
-					sinr2  = self._computeSINR(transmission['smac'],self.receivers[i]['mote'],[],False)
-					pdr2   = self._computePdrFromSINR(sinr2, self.receivers[i]['mote'])
-
+                                        sinr  = self._computeSINR(transmission['smac'],recv['mote'],interference,True)
+                                        pdr   = self._computePdrFromSINR(sinr, recv['mote'])
+                                        
                                         # pick a random number
-                                        failure = random.random() 
-   
+                                        failure = self.random.random() 
+                                        
                                         if pdr>=failure:
-
-                                       	    if self.receivers[i]['mote']==transmission['dmac']:
-		                                    isACKed, isNACKed = self.receivers[i]['mote'].radio_rxDone(
-		                                        type       = transmission['type'],
-		                                        smac       = transmission['smac'],
-		                                        dmac       = transmission['dmac'],
-		                                        payload    = transmission['payload'],
-		                                        channel    = transmission['channel']
-		                                    )
-						    #Desired 6TOP packet is received, this node can not receive anything else in this cell
-		                                    nodesRxAtThisCell.remove(self.receivers[i])
-
-                                            
+                                            isACKed, isNACKed = recv['mote'].radio_rxDone(
+                                                type       = transmission['type'],
+                                                smac       = transmission['smac'],
+                                                dmac       = transmission['dmac'],
+                                                payload    = transmission['payload'],
+                                                channel    = transmission['channel']
+                                            )
+                                            #Desired 6TOP packet is received, this node can not receive anything else in this cell
+                                            nodesRxAtThisCell[recv['mote'].id] -= 1
+                                        
                                         else: 
-					    #here does not mean there is a collision. 
-					    #Only means a packet that have a possible interference has failed.
-					    if interferenceFlag:
-						if pdr2 > 0.0:
-
-							nodesRxAtThisCell.remove(self.receivers[i])
-							#collisions in shared cells are not considered for the stats
-				    #only for debug
-                                    #else:
-                                        #mote locked in an interfering signal
-#					if transmission['smac'].schedule[(ts,transmission['channel'])]['dir']!='SHARED':
-#						transmission['smac'].schedule[(ts,transmission['channel'])]['debug_lockInterference'] += [1]
-#						# for debug
-
-#		                                # receive the interference as if it's a desired packet
-#		                                interferers.remove(lockOn)
-#		                                pseudo_interferers = interferers + [transmission['smac']]
-#		                                
-#		                                # calculate SINR where locked interference and other signals are considered S and I+N respectively
-#		                                pseudo_sinr  = self._computeSINR(lockOn,transmission['dmac'],pseudo_interferers,False)
-#		                                pseudo_pdr   = self._computePdrFromSINR(pseudo_sinr, transmission['dmac'])
-#		                                
-#		                                # pick a random number
-#		                                failure = random.random()
-#		                                if pseudo_pdr>=failure:
-#		                                    # success to receive the interference and realize collision
-#		                                    transmission['dmac'].schedule[(ts,transmission['channel'])]['rxDetectedCollision'] = True
+                                            #here does not mean there is a collision. 
+                                            #Only means a packet that have a possible interference has failed.
+                                            if interferenceFlag:
+                                                if self._getNoInterferencePdr(transmission['smac'],recv['mote'],interference) > 0.0:
+                                                    nodesRxAtThisCell[recv['mote'].id] -= 1
+                                                    #collisions in shared cells are not considered for the stats
                                 else:
                                     #================ without interference ========
                                     assert False #only interference model
-
-                        i += 1
-
-		    # desired packet is not received
-                    transmission['smac'].radio_txDone(isACKed, isNACKed, transmission['type'])
-    
-                else:  
-		    assert 'DATA' == transmission['type']  
-
-		    self.engine.incrementStatTRX()
-
-                    while i<len(self.receivers):
-
-			if self.receivers[i] in nodesRxAtThisCell:
-
-                            if self.receivers[i]['mote']==transmission['dmac']:
-                                                     
+                        
+                        # desired packet is not received
+                        transmission['smac'].radio_txDone(isACKed, isNACKed, transmission['type'])
+                    
+                    else:  
+                        assert 'DATA' == transmission['type']  
+                        
+                        self.engine.incrementStatTRX()
+                        
+                        for recv in receiversAtThisCell:
+                            
+                            if not nodesRxAtThisCell[recv['mote'].id]:
+                                continue
+                            
+                            if recv['mote']==transmission['dmac']:
+                                
                                 if not self.settings.noInterference:
-      
+                                    
                                     #================ with interference ===========
-                                     
-                                    # other transmissions on the same channel?
-                                    interferers = [t['smac'] for t in self.transmissions if (t!=transmission) and (t['channel']==transmission['channel'])]
-                                   
-                                    interferenceFlag = 0
-                                    for itfr in interferers:
-                                        #if transmission['dmac'].getRSSI(itfr)>transmission['dmac'].minRssi:
-                                        if self.receivers[i]['mote'].getRSSI(itfr)+(-97-(-105))>self.receivers[i]['mote'].minRssi:
-                                            interferenceFlag = 1
-
-                                    transmission['smac'].schedule[(ts,transmission['channel'])]['debug_interference'] += [interferenceFlag] # debug only
-                                                                                                            
+                                    
+                                    interference     = self._getInterference(recv['mote'],transmissionsOnChannel,interferenceAtReceiver)
+                                    interferenceFlag = 1 if interference['audible'].difference([transmission['smac']]) else 0
+                                    
+                                    if self.settings.debugCellHistory:
+                                        transmission['smac'].schedule[(ts,transmission['channel'])].debug_interference.append(interferenceFlag) # debug only
+                                    
                                     if interferenceFlag:
                                         transmission['smac'].stats_incrementRadioStats('probableCollisions') 
                                     
                                     lockOn = transmission['smac']
                                     for itfr in interferers:
-                                        if arrivalTime[itfr] < arrivalTime[lockOn] and self.receivers[i]['mote'].getRSSI(itfr)+(-97-(-105))>self.receivers[i]['mote'].minRssi:
+                                        if arrivalTime[itfr] < arrivalTime[lockOn] and itfr in interference['audible']:
                                             # lock on interference
                                             lockOn = itfr
                                     
                                     if lockOn == transmission['smac']:
                                         # mote locked in the current signal
                                         
-                                        transmission['smac'].schedule[(ts,transmission['channel'])]['debug_lockInterference'] += [0] # debug only
+                                        if self.settings.debugCellHistory:
+                                            transmission['smac'].schedule[(ts,transmission['channel'])].debug_lockInterference.append(0) # debug only
                                         
                                         # calculate pdr, including interference
-                                        sinr  = self._computeSINR(transmission['smac'],self.receivers[i]['mote'],interferers,False)
-                                        pdr   = self._computePdrFromSINR(sinr, self.receivers[i]['mote'])
-					# calculate pdr, without interference to check later if there have been a collision
-                                        sinr2  = self._computeSINR(transmission['smac'],self.receivers[i]['mote'],[],False)
-                                        pdr2   = self._computePdrFromSINR(sinr2, self.receivers[i]['mote'])
-
+                                        sinr  = self._computeSINR(transmission['smac'],recv['mote'],interference,True)
+                                        pdr   = self._computePdrFromSINR(sinr, recv['mote'])
+                                        
                                         # pick a random number
-                                        failure = random.random()
-
+                                        failure = self.random.random()
+                                        
                                         if pdr>=failure:
-					
-                                       	    if self.receivers[i]['mote']==transmission['dmac']:
-						    self.engine.incrementStatRDX()
-		                                    isACKed, isNACKed = self.receivers[i]['mote'].radio_rxDone(
-		                                        type       = transmission['type'],
-		                                        smac       = transmission['smac'],
-		                                        dmac       = transmission['dmac'],
-		                                        payload    = transmission['payload'],
-		                                        channel    = transmission['channel']
-		                                    )
-						    #Desired DATA packet is received, not expecting more
-		                                    nodesRxAtThisCell.remove(self.receivers[i])
-					    else:
-						assert False	#can not happen
-
+                                            self.engine.incrementStatRDX()
+                                            isACKed, isNACKed = recv['mote'].radio_rxDone(
+                                                type       = transmission['type'],
+                                                smac       = transmission['smac'],
+                                                dmac       = transmission['dmac'],
+                                                payload    = transmission['payload'],
+                                                channel    = transmission['channel']
+                                            )
+                                            #Desired DATA packet is received, not expecting more
+                                            nodesRxAtThisCell[recv['mote'].id] -= 1
+                                        
                                         else: 
-					    #here does not mean there is a collision. 
-					    #Only means a packet that have a possible interference has failed.
-
+                                            #here does not mean there is a collision. 
+                                            #Only means a packet that have a possible interference has failed.
                                             if interferenceFlag:
-						if pdr2 > 0.0:
-							#this is a collision, record it
-                                                	self.engine.incrementStatDropByCollision()
-							#this mote can not receive anything else
-							nodesRxAtThisCell.remove(self.receivers[i])
-						else:
-							#this is a propagation drop
-							self.engine.incrementStatDropByPropagation()
-					    else:
-						#this is a propagation drop
-						self.engine.incrementStatDropByPropagation()                                        
+                                                if self._getNoInterferencePdr(transmission['smac'],recv['mote'],interference) > 0.0:
+                                                    #this is a collision, record it
+                                                    self.engine.incrementStatDropByCollision()
+                                                    #this mote can not receive anything else
+                                                    nodesRxAtThisCell[recv['mote'].id] -= 1
+                                                else:
+                                                    #this is a propagation drop
+                                                    self.engine.incrementStatDropByPropagation()
+                                            else:
+                                                #this is a propagation drop
+                                                self.engine.incrementStatDropByPropagation()
                                     else:
                                         # mote locked in an interfering signal
-					#this TX are considered collisions
-					self.engine.incrementStatDropByCollision()
+                                        #this TX are considered collisions
+                                        self.engine.incrementStatDropByCollision()
                                 else:
                                     
                                     #================ without interference ========
                                     assert False #only interference model
-
-                        i += 1
-
-		    # desired packet is not received
-                    transmission['smac'].radio_txDone(isACKed, isNACKed, transmission['type'])
-            	    
-		    #check for each cell that: TX = RX + collision Drops + propagation drops
-            	    if self.engine.TRX!=(self.engine.RDX+self.engine.dropByCollision+self.engine.dropByPropagation):
-			print "TX "+str(self.engine.TRX)
-			print "RX "+str(self.engine.RDX)
-			print "Col "+str(self.engine.dropByCollision)
-			print "Phy "+str(self.engine.dropByPropagation)
-			assert False
-	    
-
+                        
+                        # desired packet is not received
+                        transmission['smac'].radio_txDone(isACKed, isNACKed, transmission['type'])
+                        
+                        #check for each cell that: TX = RX + collision Drops + propagation drops
+                        if self.engine.TRX!=(self.engine.RDX+self.engine.dropByCollision+self.engine.dropByPropagation):
+                            print "TX "+str(self.engine.TRX)
+                            print "RX "+str(self.engine.RDX)
+                            print "Col "+str(self.engine.dropByCollision)
+                            print "Phy "+str(self.engine.dropByPropagation)
+                            assert False
+            
             # remaining receivers that does not receive a desired packet
             for r in self.receivers:            
                 if not self.settings.noInterference:
-		    r['mote'].radio_rxDone(None,None,None,None,r['channel'])
+                    r['mote'].radio_rxDone(None,None,None,None,r['channel'])
                 else: #only model with interference
                     assert False	
-
+            
             # clear all outstanding transmissions
             self.transmissions              = []
+            self.transmissionsByChannel     = {}
             self.receivers                  = []
-        #assert False
-        self._schedule_propagate()
+            self.receiversByCell            = {}
+            self.propagateAsn               = None
     
     #======================== private =========================================
     
     def _schedule_propagate(self):
-        with self.dataLock:
-            self.engine.scheduleAtAsn(
-                asn         = self.engine.getAsn()+1,# so propagation happens in next slot
-                cb          = self.propagate,
-                uniqueTag   = (None,'propagation'),
-                priority    = 1,
-            )
+        ''' propagate at the end of the current slot, called when a mote starts TX or RX '''
+        
+        asn = self.engine.getAsn()
+        
+        # already scheduled in this slot
+        if self.propagateAsn==asn:
+            return
+        
+        # idle slots are not propagated, the engine jumps to the next slot with an event
+        self.propagateAsn = asn
+        self.engine.scheduleAtAsn(
+            asn         = asn,# after the motes' active cells (priority 0) in this slot
+            cb          = self.propagate,
+            uniqueTag   = (None,'propagation'),
+            priority    = 1,
+        )
     
-    def _computeSINR(self,source,destination,interferers,broadcast):
-        ''' compute SINR  '''
-
-#        #for Ideal PHY
-#        if broadcast==False:
-#            for interferer in interferers:   
-#                if (destination.getRSSI(interferer)+(-97-(-105)) >= destination.minRssi):
-#                    return -10.0
-
-        noise = self._dBmTomW(destination.noisepower)
-
-        # S = RSSI - N
-	signal = self._dBmTomW(source.getRSSI(destination))
-
-	#if signal too low, do not waste time
-	if source.getRSSI(destination) < destination.noisepower:
+    def _getInterference(self,destination,transmissions,interferenceAtReceiver):
+        '''
+        returns what destination hears from the transmissions of a channel:
+        the power received from each transmitter (mW, 0 below the noise floor),
+        its sum, and the transmitters loud enough to interfere. Computed once
+        per receiver and channel in a slot, and cached in interferenceAtReceiver.
+        '''
+        
+        if destination.id in interferenceAtReceiver:
+            return interferenceAtReceiver[destination.id]
+        
+        powerMw      = {}
+        totalMw      = 0.0
+        audible      = set()
+        for transmission in transmissions:
+            smac     = transmission['smac']
+            rssi     = smac.getRSSI(destination)
+            if rssi < destination.noisepower:
+                powerMw[smac] = 0.0
+            else:
+                powerMw[smac] = self._dBmTomW(rssi)
+            totalMw += powerMw[smac]
+            if destination.getRSSI(smac)+(-97-(-105))>destination.minRssi:
+                audible.add(smac)
+        
+        interference = {
+            'powerMw':             powerMw,
+            'totalMw':             totalMw,
+            'noiseMw':             self._dBmTomW(destination.noisepower),
+            'audible':             audible,
+            'pdrNoInterference':   {}, # indexed by transmitter, see _getNoInterferencePdr
+        }
+        interferenceAtReceiver[destination.id] = interference
+        
+        return interference
+    
+    def _getNoInterferencePdr(self,source,destination,interference):
+        ''' PDR from source to destination without interference, to check if a failure is a collision '''
+        
+        if source not in interference['pdrNoInterference']:
+            sinr = self._computeSINR(source,destination,interference,False)
+            interference['pdrNoInterference'][source] = self._computePdrFromSINR(sinr, destination)
+        
+        return interference['pdrNoInterference'][source]
+    
+    def _computeSINR(self,source,destination,interference,withInterference):
+        ''' compute SINR, interference is what destination hears on the channel (see _getInterference) '''
+        
+        #if signal too low, do not waste time
+        if source.getRSSI(destination) < destination.noisepower:
             return -10.0
-
         
-        totalInterference = 0.0
-        for interferer in interferers:
-            # I = RSSI - N
-            
-	    interference = self._dBmTomW(interferer.getRSSI(destination))
-
-	    if interferer.getRSSI(destination) < destination.noisepower:
-                interference = 0.0
-            totalInterference += interference
-
-        sinr = signal/(totalInterference + noise)
-
+        # S = RSSI - N
+        signal = interference['powerMw'][source]
+        
+        # I = sum of the RSSI of the other transmitters - N
+        if withInterference:
+            totalInterference = interference['totalMw']-signal
+        else:
+            totalInterference = 0.0
+        
+        sinr = signal/(totalInterference + interference['noiseMw'])
+        
         return self._mWTodBm(sinr)
     
     def _computePdrFromSINR(self, sinr, destination):
@@ -507,7 +447,7 @@ class Propagation(object):
             self._dBmTomW(sinr+destination.noisepower)##WHY ADDING THE NOISE TWO TIMEs?
         )        
 
-        pdr             = Topology.Topology.rssiToPdr(equivalentRSSI)
+        pdr             = self.rssiPdrTable.toPdr(equivalentRSSI)
 
         return pdr
     
@@ -0,0 +1,327 @@
+#!/usr/bin/python
+'''
+\brief Schedule of a mote, and its cells.
+
+The cells are stored in a dict indexed by (ts,ch), and are also indexed by
+direction, by direction and neighbor, by timeslot, and for the DeBraS cells.
+The queries on a subset of the cells only visit that subset. The number of
+transmissions and ACKs are also summed per direction and neighbor; update
+them through logTx and logTxResult.
+
+The indexes are updated when cells are added or removed; the fields they
+are built from ('dir', 'neighbor' and 'isDebras') must not be changed on a
+cell which is in the schedule.
+
+A CellOccupancy gathers the TX and RX cells of all the motes, for the
+schedulers which assume a total knowledge of the network. The schedules
+given one keep it up to date.
+
+A NeighborSchedule is what a mote knows of the cells of a neighbor, from the
+(ts,ch,dir,neighbor id) entries of the DEBRAS messages of that neighbor.
+These entries are packed on 3 bytes each by packDebrasCells.
+'''
+
+#============================ logging =========================================
+
+import logging
+class NullHandler(logging.Handler):
+    def emit(self, record):
+        pass
+log = logging.getLogger('Schedule')
+log.setLevel(logging.ERROR)
+log.addHandler(NullHandler())
+
+#============================ imports =========================================
+
+import bisect
+import collections
+import struct
+
+import numpy as np
+
+#============================ defines =========================================
+
+# bits of the fields of a DEBRAS entry, 3 bytes in total
+DEBRAS_TS_BITS                 = 9
+DEBRAS_CH_BITS                 = 4
+DEBRAS_DIR_BITS                = 1
+DEBRAS_NEIGHBOR_BITS           = 10
+DEBRAS_ENTRY_SIZE              = 3
+
+#============================ helpers =========================================
+
+def checkDebrasSettings(settings):
+    ''' raises ValueError if the timeslots, channels or motes of the settings do not fit in a DEBRAS entry '''
+    for (name,value,bits) in [
+            ('slotframeLength', settings.slotframeLength, DEBRAS_TS_BITS),
+            ('numChans',        settings.numChans,        DEBRAS_CH_BITS),
+            ('numMotes',        settings.numMotes,        DEBRAS_NEIGHBOR_BITS),
+        ]:
+        if value>(1<<bits):
+            raise ValueError(
+                'the deBras scheduler supports {0}<={1} ({2} bits in the DEBRAS entries), got {3}'.format(
+                    name,
+                    1<<bits,
+                    bits,
+                    value,
+                )
+            )
+
+def packDebrasCells(entries):
+    ''' pack the (ts,ch,dir,neighborId) entries of TX and RX cells into a DEBRAS payload '''
+    payload = []
+    for (ts,ch,dir,neighborId) in entries:
+        assert ts<(1<<DEBRAS_TS_BITS) and ch<(1<<DEBRAS_CH_BITS) and neighborId<(1<<DEBRAS_NEIGHBOR_BITS)
+        assert dir in ['TX','RX']
+        value    = ts
+        value    = (value<<DEBRAS_CH_BITS)       | ch
+        value    = (value<<DEBRAS_DIR_BITS)      | (1 if dir=='TX' else 0)
+        value    = (value<<DEBRAS_NEIGHBOR_BITS) | neighborId
+        payload += [struct.pack('!I',value)[-DEBRAS_ENTRY_SIZE:]]
+    return ''.join(payload)
+
+def unpackDebrasCells(payload):
+    ''' the (ts,ch,dir,neighborId) entries of a DEBRAS payload, in order '''
+    entries = []
+    for i in range(0,len(payload),DEBRAS_ENTRY_SIZE):
+        (value,)    = struct.unpack('!I','\x00'+payload[i:i+DEBRAS_ENTRY_SIZE])
+        neighborId  = value & ((1<<DEBRAS_NEIGHBOR_BITS)-1)
+        value     >>= DEBRAS_NEIGHBOR_BITS
+        dir         = 'TX' if value & ((1<<DEBRAS_DIR_BITS)-1) else 'RX'
+        value     >>= DEBRAS_DIR_BITS
+        ch          = value & ((1<<DEBRAS_CH_BITS)-1)
+        ts          = value >> DEBRAS_CH_BITS
+        entries    += [(ts,ch,dir,neighborId)]
+    return entries
+
+#============================ body ============================================
+
+class Cell(object):
+    '''
+    a cell of a schedule. history holds the outcome (1 if ACKed, 0 otherwise)
+    of the last historyLength transmissions. The debug histories are only
+    kept when debugHistory is not 0, with at most its last debugHistory
+    entries; they are None otherwise.
+    '''
+
+    __slots__ = [
+        'ts','ch','dir','neighbor','isDebras','numTx','busy','numTxAck',
+        'sharedCell_id','numRx','history','waitingfor','rxDetectedCollision',
+        'debug_canbeInterfered','debug_interference','debug_lockInterference','debug_cellCreatedAsn',
+    ]
+
+    def __init__(self,ts,ch,dir,neighbor,isDebras,sharedCell_id,createdAsn,historyLength,debugHistory=0):
+        self.ts                        = ts
+        self.ch                        = ch
+        self.dir                       = dir
+        self.neighbor                  = neighbor
+        self.isDebras                  = isDebras
+        self.numTx                     = 0
+        self.busy                      = 0
+        self.numTxAck                  = 0
+        self.sharedCell_id             = sharedCell_id
+        self.numRx                     = 0
+        self.history                   = collections.deque(maxlen=historyLength)
+        self.waitingfor                = None
+        self.rxDetectedCollision       = False
+        if debugHistory:
+            self.debug_canbeInterfered = collections.deque(maxlen=debugHistory) # [debug] shows schedule collision that can be interfered with minRssi or larger level
+            self.debug_interference    = collections.deque(maxlen=debugHistory) # [debug] shows an interference packet with minRssi or larger level
+            self.debug_lockInterference= collections.deque(maxlen=debugHistory) # [debug] shows locking on the interference packet
+        else:
+            self.debug_canbeInterfered = None
+            self.debug_interference    = None
+            self.debug_lockInterference= None
+        self.debug_cellCreatedAsn      = createdAsn                             # [debug]
+
+class CellOccupancy(object):
+    '''
+    TX and RX cells of all the motes: tx[ts,ch,id] (resp. rx) is True when
+    mote id has a TX (resp. RX) cell at (ts,ch).
+    '''
+
+    def __init__(self,slotframeLength,numChans,numMotes):
+        self.tx                        = np.zeros((slotframeLength,numChans,numMotes),dtype=bool)
+        self.rx                        = np.zeros((slotframeLength,numChans,numMotes),dtype=bool)
+
+    def getBusyCells(self,txMotes,rxMotes):
+        '''
+        boolean array indexed by [ts,ch], True where one of the txMotes has a
+        TX cell or one of the rxMotes has an RX cell. txMotes and rxMotes are
+        boolean arrays indexed by mote id.
+        '''
+        return np.dot(self.tx,txMotes) | np.dot(self.rx,rxMotes)
+
+    def setCell(self,key,dir,moteId,isUsed):
+        ''' mark the cell at key (ts,ch) in that direction as used by that mote, or not '''
+        if dir=='TX':
+            self.tx[key[0],key[1],moteId] = isUsed
+        elif dir=='RX':
+            self.rx[key[0],key[1],moteId] = isUsed
+
+class NeighborSchedule(object):
+    '''
+    cells of a neighbor, as reported by its DEBRAS messages: tx[ts,ch] (resp.
+    rx) is True when it has a TX (resp. RX) cell at (ts,ch), peers[ts,ch] is
+    the id of the mote at the other end of that cell, and lastHeard[ts,ch] the
+    ASN at which that cell was last reported, -1 if never. Cells are kept
+    until reported with another direction.
+    '''
+
+    def __init__(self,slotframeLength,numChans):
+        self.tx                        = np.zeros((slotframeLength,numChans),dtype=bool)
+        self.rx                        = np.zeros((slotframeLength,numChans),dtype=bool)
+        self.peers                     = np.full((slotframeLength,numChans),-1,dtype=np.int16)
+        self.lastHeard                 = np.full((slotframeLength,numChans),-1,dtype=np.int32)
+
+    def update(self,payload,asn):
+        '''
+        record the entries of a DEBRAS payload received at asn, returns the
+        (ts,ch) of the cells which were not known, in order
+        '''
+        newCells = []
+        for (ts,ch,dir,peerId) in unpackDebrasCells(payload):
+            if self.lastHeard[ts,ch]<0:
+                newCells += [(ts,ch)]
+            self.tx[ts,ch]             = (dir=='TX')
+            self.rx[ts,ch]             = (dir=='RX')
+            self.peers[ts,ch]          = peerId
+            self.lastHeard[ts,ch]      = asn
+        return newCells
+
+class Schedule(dict):
+
+    def __init__(self,occupancy=None,moteId=None):
+
+        # initialize parent class
+        dict.__init__(self)
+
+        # store params
+        self.occupancy                 = occupancy # CellOccupancy updated with my cells, as moteId
+        self.moteId                    = moteId
+
+        # local variables
+        self.cellsByDir                = {} # indexed by dir, contains the {(ts,ch): cell} in that direction
+        self.cellsByNeighbor           = {} # indexed by (dir,neighbor), contains the {(ts,ch): cell} to/from that neighbor
+        self.cellsByTs                 = {} # indexed by ts, contains the (ch,cell) scheduled at that ts, by increasing ch
+        self.timeslots                 = [] # the timeslots with at least a cell, increasing
+        self.debrasCells               = {} # {(ts,ch): cell} of the DeBraS cells
+        self.txCounts                  = {} # indexed by (dir,neighbor), contains [numTx,numTxAck] summed over these cells
+
+    def __setitem__(self,key,cell):
+        if key in self:
+            self._unindex(key,self[key])
+        dict.__setitem__(self,key,cell)
+        self._index(key,cell)
+
+    def __delitem__(self,key):
+        self._unindex(key,self[key])
+        dict.__delitem__(self,key)
+
+    def _unsupported(name):
+        def method(self,*args,**kwargs):
+            raise TypeError('Schedule does not support {0}(), it would bypass the indexes; use item assignment and del'.format(name))
+        return method
+
+    pop        = _unsupported('pop')
+    popitem    = _unsupported('popitem')
+    clear      = _unsupported('clear')
+    update     = _unsupported('update')
+    setdefault = _unsupported('setdefault')
+    del _unsupported
+
+    #======================== public ==========================================
+
+    # the returned dicts and lists are the indexes themselves, do not modify them
+
+    def getCellsByDir(self,dir):
+        ''' {(ts,ch): cell} of the cells in that direction '''
+        return self.cellsByDir.get(dir,{})
+
+    def getCellsByNeighbor(self,dir,neighbor):
+        ''' {(ts,ch): cell} of the cells in that direction, to/from that neighbor '''
+        return self.cellsByNeighbor.get((dir,neighbor),{})
+
+    def getCellsAtTs(self,ts):
+        ''' (ch,cell) of the cells at that timeslot, by increasing channel '''
+        return self.cellsByTs.get(ts,[])
+
+    def getTimeslots(self):
+        ''' the timeslots with at least a cell, increasing '''
+        return self.timeslots
+
+    def getNextTimeslot(self,ts):
+        ''' first timeslot with a cell after ts, wrapping around the slotframe; None if the schedule is empty '''
+        if not self.timeslots:
+            return None
+        i = bisect.bisect_right(self.timeslots,ts)
+        if i==len(self.timeslots):
+            i = 0
+        return self.timeslots[i]
+
+    def getDebrasCells(self):
+        ''' {(ts,ch): cell} of the DeBraS cells '''
+        return self.debrasCells
+
+    def getTxCounts(self,dir,neighbor):
+        ''' (numTx,numTxAck) summed over the cells in that direction, to/from that neighbor '''
+        return tuple(self.txCounts.get((dir,neighbor),(0,0)))
+
+    def logTx(self,key):
+        ''' a packet is transmitted in the cell at key '''
+        cell = self[key]
+        cell.numTx += 1
+        self.txCounts[(cell.dir,cell.neighbor)][0] += 1
+
+    def logTxResult(self,key,isACKed):
+        ''' the transmission in the cell at key was ACKed (or NACKed), or not '''
+        cell = self[key]
+        if isACKed:
+            cell.numTxAck += 1
+            self.txCounts[(cell.dir,cell.neighbor)][1] += 1
+            cell.history.append(1)
+        else:
+            cell.history.append(0)
+
+    #======================== private =========================================
+
+    def _index(self,key,cell):
+        self.cellsByDir.setdefault(cell.dir,{})[key] = cell
+        self.cellsByNeighbor.setdefault((cell.dir,cell.neighbor),{})[key] = cell
+        if key[0] not in self.cellsByTs:
+            bisect.insort(self.timeslots,key[0])
+        bisect.insort(self.cellsByTs.setdefault(key[0],[]),(key[1],cell))
+        if cell.isDebras:
+            self.debrasCells[key] = cell
+        counts     = self.txCounts.setdefault((cell.dir,cell.neighbor),[0,0])
+        counts[0] += cell.numTx
+        counts[1] += cell.numTxAck
+        if self.occupancy:
+            self.occupancy.setCell(key,cell.dir,self.moteId,True)
+
+    def _unindex(self,key,cell):
+        self._discard(self.cellsByDir,cell.dir,key)
+        self._discard(self.cellsByNeighbor,(cell.dir,cell.neighbor),key)
+        self._discard(self.cellsByTs,key[0],(key[1],cell))
+        if key[0] not in self.cellsByTs:
+            del self.timeslots[bisect.bisect_left(self.timeslots,key[0])]
+        if cell.isDebras:
+            del self.debrasCells[key]
+        if (cell.dir,cell.neighbor) in self.cellsByNeighbor:
+            counts     = self.txCounts[(cell.dir,cell.neighbor)]
+            counts[0] -= cell.numTx
+            counts[1] -= cell.numTxAck
+        else:
+            del self.txCounts[(cell.dir,cell.neighbor)]
+        if self.occupancy:
+            self.occupancy.setCell(key,cell.dir,self.moteId,False)
+
+    def _discard(self,index,indexKey,item):
+        ''' remove item from index[indexKey], and indexKey once empty '''
+        items = index[indexKey]
+        if isinstance(items,list):
+            items.remove(item)
+        else:
+            del items[item]
+        if not items:
+            del index[indexKey]
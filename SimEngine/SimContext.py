@@ -0,0 +1,47 @@
+#!/usr/bin/python
+'''
+\brief Objects shared by everything taking part in one simulation run.
+
+A context is created per run and passed to the engine, the motes, the
+topology, the propagation model and the statistics, so several runs can
+coexist in the same process.
+
+The context also holds the random generators of the run. A seeded run gets
+its own generators, so it draws the same numbers whatever else runs in the
+process; an unseeded run uses the ones of the random and numpy.random
+modules.
+'''
+
+#============================ logging =========================================
+
+import logging
+class NullHandler(logging.Handler):
+    def emit(self, record):
+        pass
+log = logging.getLogger('SimContext')
+log.setLevel(logging.ERROR)
+log.addHandler(NullHandler())
+
+#============================ imports =========================================
+
+import random
+
+import numpy as np
+
+#============================ defines =========================================
+
+#============================ body ============================================
+
+class SimContext(object):
+
+    def __init__(self,settings):
+
+        # store params
+        self.settings                  = settings
+
+        # local variables, filled in by the objects as they are created
+        self.engine                    = None
+        self.propagation               = None
+        self.stats                     = None
+        self.random                    = random      # replaced by a random.Random by a seeded engine
+        self.npRandom                  = np.random   # replaced by a np.random.RandomState by a seeded engine
@@ -24,11 +24,13 @@ log.addHandler(NullHandler())
 #============================ imports =========================================
 
 import threading
+import numpy as np
 
+import EventQueue
 import Propagation
 import Topology
 import Mote
-import SimSettings
+import Schedule
 import inspect
 import random
 
@@ -36,44 +38,73 @@ import random
 
 #============================ body ============================================
 
-class SimEngine(threading.Thread):
+class NoLock(object):
+    '''
+    drop-in replacement for threading.Lock/RLock, used when running without
+    the GUI: a single thread then touches the simulation state.
+    '''
     
-    #===== start singleton
-    _instance      = None
-    _init          = False
+    def __enter__(self):
+        return self
     
-    def __new__(cls, *args, **kwargs):
-        if not cls._instance:
-            cls._instance = super(SimEngine,cls).__new__(cls, *args, **kwargs)
-        return cls._instance
-    #===== end singleton
+    def __exit__(self,*args):
+        return False
     
-    def __init__(self,runNum=None,failIfNotInit=False):
-        
-        if failIfNotInit and not self._init:
-            raise EnvironmentError('SimEngine singleton not initialized.')
+    def acquire(self,blocking=True):
+        return True
+    
+    def release(self):
+        pass
+
+class SimEngine(threading.Thread):
+    
+    CALENDAR_NUM_SLOTFRAMES           = 4 # window of the calendar event queue, in slotframes
+    
+    def __init__(self,context,runNum=None):
         
-        #===== start singleton
-        if self._init:
-            return
-        self._init = True
-        #===== end singleton
-       
         # store params
+        self.context                        = context
         self.runNum                         = runNum
         
         # local variables
-        self.dataLock                       = threading.RLock()
+        self.context.engine                 = self
+        self.settings                       = context.settings
+        if self.settings.seed is None:
+            self.seed                       = None
+        else:
+            # each run has its own seed, and its own generators
+            self.seed                       = self.settings.seed+(runNum or 0)
+            self.context.random             = random.Random(self.seed)
+            self.context.npRandom           = np.random.RandomState(self.seed)
+        if self.settings.gui:
+            self.dataLock                   = threading.RLock()
+        else:
+            self.dataLock                   = NoLock()
         self.pauseSem                       = threading.Semaphore(0)
         self.simPaused                      = False
         self.goOn                           = True
         self.asn                            = 0
         self.startCb                        = []
         self.endCb                          = []
-        self.events                         = []
-        self.settings                       = SimSettings.SimSettings()
-	self.propagation                    = Propagation.Propagation()
-	self.motes                          = [Mote.Mote(id) for id in range(self.settings.numMotes)]
+        if self.settings.eventQueue=='heap':
+            self.events                     = EventQueue.HeapEventQueue()
+        elif self.settings.eventQueue=='calendar':
+            self.events                     = EventQueue.CalendarEventQueue(self.CALENDAR_NUM_SLOTFRAMES*self.settings.slotframeLength)
+        else:
+            raise ValueError("unknown eventQueue {0}, expected 'heap' or 'calendar'".format(self.settings.eventQueue))
+        if self.settings.scheduler=='deBras':
+            # fail now rather than when the first DEBRAS message is sent
+            Schedule.checkDebrasSettings(self.settings)
+	self.propagation                    = Propagation.Propagation(context)
+	self.context.propagation            = self.propagation
+        # link state, indexed by [mote id, neighbor id], NaN until computed by the topology.
+        # Each mote uses its rows as its RSSI, PDR and staticPhys tables.
+        self.linkRSSI                       = np.full((self.settings.numMotes,self.settings.numMotes),np.nan)
+        self.linkPDR                        = np.full((self.settings.numMotes,self.settings.numMotes),np.nan)
+        self.linkStaticPhys                 = np.full((self.settings.numMotes,self.settings.numMotes),np.nan)
+        # TX and RX cells of all the motes, kept up to date by their schedules
+        self.cellOccupancy                  = Schedule.CellOccupancy(self.settings.slotframeLength,self.settings.numChans,self.settings.numMotes)
+	self.motes                          = [Mote.Mote(id,context) for id in range(self.settings.numMotes)]
 
 	#before create topology, define the obstacles
 	if self.settings.mobilityModel=='RPGM':	
@@ -88,8 +119,10 @@ class SimEngine(threading.Thread):
 	#check maxNumHops
 	if self.settings.maxNumHops!='x':
 		self.settings.maxNumHops=int(self.settings.maxNumHops)
-        self.topology                       = Topology.Topology(self.motes)
-        self.topology.createTopology()
+        self.topology                       = Topology.Topology(self.motes,context)
+        if not self.topology.loadTopology():
+            self.topology.createTopology()
+            self.topology.saveTopology()
        
 	#dictionaries for init the experiment
 	self.joiningTime={}
@@ -267,14 +300,6 @@ class SimEngine(threading.Thread):
 		return False
 	
   
-    def destroy(self):	
-        # destroy the propagation singleton
-        self.propagation.destroy()
-        
-        # destroy my own instance
-        self._instance                      = None
-        self._init                          = False
-  	
     #======================== thread ==========================================
     
     def run(self):
@@ -300,24 +325,26 @@ class SimEngine(threading.Thread):
             with self.dataLock:
                 
                 # abort simulation when no more events
-                if not self.events:
+                event = self.events.peek()
+                if event is None:
                     log.info("end of simulation at ASN={0}".format(self.asn))
                     break
                 
                 #emunicio, to avoid errors when exectuing step by step with large networks
-		(a,b,cb,c)=self.events[0]
-                if c[1]!='_actionPauseSim':   
-			# make sure we are in the future              
-                       assert self.events[0][0] >= self.asn
+                (asn,_,_,_,uniqueTag) = event
+                if uniqueTag[1]!='_actionPauseSim':
+                    # make sure we are in the future
+                    assert asn >= self.asn
 
                 # update the current ASN
-                self.asn = self.events[0][0]
+                self.asn = asn
                 
                 # call callbacks at this ASN
-                while True:                 
-                    if self.events[0][0]!=self.asn:
+                while True:
+                    event = self.events.peek()
+                    if event is None or event[0]!=self.asn:
                         break
-                    (_,_,cb,_) = self.events.pop(0)
+                    (_,_,_,cb,_) = self.events.pop()
                     cb()
         
         # call the end callbacks
@@ -416,8 +443,9 @@ class SimEngine(threading.Thread):
     def scheduleAtAsn(self,asn,cb,uniqueTag=None,priority=0,exceptCurrentASN=True):
         ''' schedule an event at specific ASN '''
         
-        # make sure we are scheduling in the future
-        assert asn>self.asn
+        # make sure we are not scheduling in the past (events at the current ASN
+        # are called after the ones already scheduled, see Propagation)
+        assert asn>=self.asn
         
         # remove all events with same uniqueTag (the event will be rescheduled)
         if uniqueTag:
@@ -425,22 +453,16 @@ class SimEngine(threading.Thread):
         
         with self.dataLock:
             
-            # find correct index in schedule
-            i = 0
-            while i<len(self.events) and (self.events[i][0]<asn or (self.events[i][0]==asn and self.events[i][1]<=priority)):
-                i +=1
-            
-            # add to schedule
-            self.events.insert(i,(asn,priority,cb,uniqueTag))            
+            # add to schedule, after the events already scheduled with the same asn and priority
+            self.events.push(asn,priority,cb,uniqueTag)
     
     def removeEvent(self,uniqueTag,exceptCurrentASN=True):
+        ''' cancel the events with that uniqueTag '''
         with self.dataLock:
-            i = 0
-            while i<len(self.events):
-                if self.events[i][3]==uniqueTag and not (exceptCurrentASN and self.events[i][0]==self.asn):
-                    self.events.pop(i)
-                else:
-                    i += 1
+            if exceptCurrentASN:
+                self.events.remove(uniqueTag,exceptAsn=self.asn)
+            else:
+                self.events.remove(uniqueTag)
     
     def scheduleAtEnd(self,cb):
         with self.dataLock:
@@ -452,6 +474,9 @@ class SimEngine(threading.Thread):
         self._actionResumeSim()
     
     def pauseAtAsn(self,asn):
+        # without GUI, nobody can resume the simulation
+        if not self.settings.gui:
+            return
         if not self.simPaused:
             self.scheduleAtAsn(
                 asn         = asn,
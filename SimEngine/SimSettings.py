@@ -28,26 +28,7 @@ import os
 
 class SimSettings(object):
     
-    #===== start singleton
-    _instance      = None
-    _init          = False
-    
-    def __new__(cls, *args, **kwargs):
-        if not cls._instance:
-            cls._instance = super(SimSettings,cls).__new__(cls, *args, **kwargs)
-        return cls._instance
-    #===== end singleton
-    
-    def __init__(self,failIfNotInit=False,**kwargs):
-        
-        if failIfNotInit and not self._init:
-            raise EnvironmentError('SimSettings singleton not initialized.')
-        
-        #===== start singleton
-        if self._init:
-            return
-        self._init = True
-        #===== end singleton
+    def __init__(self,**kwargs):
         
         self.__dict__.update(kwargs)
     
@@ -74,7 +55,3 @@ class SimSettings(object):
         datafilename         = os.path.join(dirname,tempname)
         
         return datafilename
-    
-    def destroy(self):
-        self._instance       = None
-        self._init           = False
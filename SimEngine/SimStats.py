@@ -21,8 +21,6 @@ log.addHandler(NullHandler())
 
 #============================ imports =========================================
 
-import SimEngine
-import SimSettings
 import json
 
 #============================ defines =========================================
@@ -31,30 +29,15 @@ import json
 
 class SimStats(object):
     
-    #===== start singleton
-    _instance      = None
-    _init          = False
-    
-    def __new__(cls, *args, **kwargs):
-        if not cls._instance:
-            cls._instance = super(SimStats,cls).__new__(cls, *args, **kwargs)
-        return cls._instance
-    #===== end singleton
-    
-    def __init__(self,runNum):
-        
-        #===== start singleton
-        if self._init:
-            return
-        self._init = True
-        #===== end singleton
+    def __init__(self,context,runNum):
         
         # store params
         self.runNum                         = runNum
         
         # local variables
-        self.engine                         = SimEngine.SimEngine()
-        self.settings                       = SimSettings.SimSettings()
+        context.stats                       = self
+        self.engine                         = context.engine
+        self.settings                       = context.settings
         
         # stats
         self.stats                          = {}
@@ -81,11 +64,6 @@ class SimStats(object):
 	#determine if the experiment has been scheduled   
  	self.endScheduled=False       
     
-    def destroy(self):
-        # destroy my own instance
-        self._instance                      = None
-        self._init                          = False
-
 
     #======================== private =========================================
     
@@ -253,8 +231,8 @@ class SimStats(object):
         txCells = []
         for mote in self.engine.motes:
             for ((ts,chan),cell) in mote.schedule.items():
-                (ts,ch) = (ts,cell['ch'])
-                if cell['dir']==mote.DIR_TX:
+                (ts,ch) = (ts,cell.ch)
+                if cell.dir==mote.DIR_TX:
                     if (ts,ch) in txCells:
                         scheduleCollisions += 1
                     else:
@@ -264,9 +242,9 @@ class SimStats(object):
         txLinks = {}
         for mote in self.engine.motes:
             for ((ts,chan),cell) in mote.schedule.items():
-                if cell['dir']==mote.DIR_TX:
-                    (ts,ch) = (ts,cell['ch'])
-                    (tx,rx) = (mote,cell['neighbor'])
+                if cell.dir==mote.DIR_TX:
+                    (ts,ch) = (ts,cell.ch)
+                    (tx,rx) = (mote,cell.neighbor)
                     if (ts,ch) in txLinks:
                         txLinks[(ts,ch)] += [(tx,rx)] 
                     else:
@@ -21,26 +21,135 @@ log.addHandler(NullHandler())
 
 #============================ imports =========================================
 
-import random
+import os
 import math
+import array
+import hashlib
 import numpy as np
-import SimSettings
-import SimEngine
 #============================ defines =========================================
 
+# bands (Hz), RSSI_PDR_TABLES and Topology.BAND are indexed by them
+EIGTH_SIX_EIGTH_GHZ          = 868000000
+TWO_DOT_FOUR_GHZ             = 2400000000
+
 #============================ body ============================================
 
+class RssiPdrTable(object):
+    '''
+    RSSI to PDR mapping, linearly interpolated between PDRs measured every dB.
+    The interpolation coefficients are computed once, when the table is created.
+    '''
+    
+    def __init__(self,pdrByRssi):
+        
+        rssis                = sorted(pdrByRssi.keys())
+        assert rssis==range(rssis[0],rssis[-1]+1)
+        assert min(pdrByRssi.values())>=0.0
+        assert max(pdrByRssi.values())<=1.0
+        
+        # store params
+        self.minRssi         = rssis[0]
+        self.maxRssi         = rssis[-1]
+        
+        # local variables
+        self.pdrLow          = array.array('d',[pdrByRssi[r] for r in rssis])                              # indexed by floor(rssi)-minRssi
+        self.pdrSlope        = array.array('d',[pdrByRssi[r+1]-pdrByRssi[r] for r in rssis[:-1]]+[0.0]) # indexed by floor(rssi)-minRssi
+        self.rssiArray       = np.array(rssis,dtype=float)
+        self.pdrArray        = np.array([pdrByRssi[r] for r in rssis])
+    
+    def toPdr(self,rssi):
+        ''' PDR at that RSSI, 0 below the table, 1 above '''
+        if   rssi<self.minRssi:
+            return 0.0
+        elif rssi>self.maxRssi:
+            return 1.0
+        floorRssi            = int(math.floor(rssi))
+        i                    = floorRssi-self.minRssi
+        return self.pdrSlope[i]*(rssi-float(floorRssi))+self.pdrLow[i] # linear interpolation
+    
+    def toPdrArray(self,rssi):
+        ''' same as toPdr, element-wise on an array of RSSIs '''
+        return np.interp(rssi,self.rssiArray,self.pdrArray,left=0.0,right=1.0)
+
+# RSSI to PDR tables, indexed by band (Hz)
+RSSI_PDR_TABLES = {
+    # rssi and pdr relationship obtained by experiment below
+    # http://wsn.eecs.berkeley.edu/connectivity/?dataset=dust
+    TWO_DOT_FOUR_GHZ: RssiPdrTable({
+        -97:    0.0000, # this value is not from experiment
+        -96:    0.1494,
+        -95:    0.2340,
+        -94:    0.4071,
+        #<-- 50% PDR is here, at RSSI=-93.6
+        -93:    0.6359,
+        -92:    0.6866,
+        -91:    0.7476,
+        -90:    0.8603,
+        -89:    0.8702,
+        -88:    0.9324,
+        -87:    0.9427,
+        -86:    0.9562,
+        -85:    0.9611,
+        -84:    0.9739,
+        -83:    0.9745,
+        -82:    0.9844,
+        -81:    0.9854,
+        -80:    0.9903,
+        -79:    1.0000, # this value is not from experiment
+    }),
+    #TODO set rssiPdrTable for the 868 MHz band -> FSK 500KHz, 500kbps 
+}
+
+class MoteGrid(object):
+    '''
+    uniform grid over the motes' locations, to only look at the motes around
+    a location instead of all of them.
+    '''
+    
+    def __init__(self,cellSize):
+        
+        # store params
+        self.cellSize        = cellSize
+        
+        # local variables
+        self.cells           = {} # indexed by (column,row), contains the indexes of the motes in that cell
+    
+    def add(self,index,mote):
+        ''' add mote, known by its index, at its current location '''
+        self.cells.setdefault(self._getCell(mote.x,mote.y),[]).append(index)
+    
+    def getInRange(self,mote,distance):
+        ''' indexes of the motes which may be within distance (km) of mote, in increasing order '''
+        (col,row)            = self._getCell(mote.x,mote.y)
+        n                    = int(math.ceil(distance/self.cellSize))
+        indexes              = []
+        if (2*n+1)**2>=len(self.cells):
+            # the range covers most of the grid
+            for cellIndexes in self.cells.values():
+                indexes     += cellIndexes
+        else:
+            for c in range(col-n,col+n+1):
+                for r in range(row-n,row+n+1):
+                    indexes += self.cells.get((c,r),[])
+        return sorted(indexes)
+    
+    def _getCell(self,x,y):
+        return (int(math.floor(x/self.cellSize)),int(math.floor(y/self.cellSize)))
+
 class Topology(object):
     
-    EIGTH_SIX_EIGTH_GHZ         = 868000000   # Hz
-    TWO_DOT_FOUR_GHZ         = 2400000000   # Hz
+    EIGTH_SIX_EIGTH_GHZ      = EIGTH_SIX_EIGTH_GHZ # Hz
+    TWO_DOT_FOUR_GHZ         = TWO_DOT_FOUR_GHZ # Hz
     PISTER_HACK_LOWER_SHIFT  = 40           # -40 dB
     SPEED_OF_LIGHT           = 299792458    # m/s
     
-    STABLE_RSSI              =  -89   	     # dBm, corresponds to PDR = 0.8702 (see rssiPdrTable below)
+    STABLE_RSSI              =  -89   	     # dBm, corresponds to PDR = 0.8702 (see RSSI_PDR_TABLES above)
     STABLE_NEIGHBORS         = 1
+    BAND                     = TWO_DOT_FOUR_GHZ # selects the table in RSSI_PDR_TABLES
+    RANGE_MARGIN             = 1            # dB, added to the link budget when bounding the range of a mote
+    CACHE_VERSION            = 1            # change when the cached topologies can no longer be reused
     
-    def __init__(self, motes):
+    def __init__(self, motes, context):
         
         # store params
         self.motes           = motes
@@ -48,8 +157,10 @@ class Topology(object):
 	#random.seed(13)
 	
         # local variables
-        self.settings        = SimSettings.SimSettings()
-	self.engine        = SimEngine.SimEngine()
+        self.settings        = context.settings
+	self.engine        = context.engine
+        self.random          = context.random
+        self.npRandom        = context.npRandom
         
     #======================== public ==========================================
     
@@ -121,6 +232,8 @@ class Topology(object):
 
         # reposition each mote until it is connected
         connectedMotes = [dagRoot]
+        connectedGrid  = MoteGrid(self._computeRange(0.0))
+        connectedGrid.add(0,dagRoot)
         for mote in self.motes:
             if mote in connectedMotes:
                 continue
@@ -135,19 +248,15 @@ class Topology(object):
                 if self.settings.topology=='mesh':
 			# pick a random location
 			mote.setLocation(
-		            x = self.settings.squareSide*random.random(),
-		            y = self.settings.squareSide*random.random()
+		            x = self.settings.squareSide*self.random.random(),
+		            y = self.settings.squareSide*self.random.random()
 		        )
 
-		        # count number of neighbors with sufficient RSSI
-		        for cm in connectedMotes:
-		            
-	            	    if self.settings.mobilityModel=='static' or self.settings.mobilityModel=='staticUNI':
-			    	rssi = self._computeRSSI_static(mote, cm)
-			    else:
-				rssi = self._computeRSSI_staticRay(mote, cm)
-		            mote.setRSSI(cm, rssi)
-		            cm.setRSSI(mote, rssi)
+		        # count number of neighbors with sufficient RSSI, only the motes in range can have it
+		        variations = self._drawRssiVariations(len(connectedMotes))
+		        for i in connectedGrid.getInRange(mote,self._computeStableRange(variations)):
+		            cm   = connectedMotes[i]
+		            rssi = self._computeRSSI_initial(mote, cm, variations[i])
 		            
 		            if rssi>self.STABLE_RSSI:
 		                numStableNeighbors += 1
@@ -163,8 +272,8 @@ class Topology(object):
 		# exactly 1 hop network. All nodes connected to the root
                 elif self.settings.topology=='star':
 			mote.setLocation(
-		            x = self.settings.squareSide*random.random(),
-		            y = self.settings.squareSide*random.random()
+		            x = self.settings.squareSide*self.random.random(),
+		            y = self.settings.squareSide*self.random.random()
 		        )						    
 
 		        if self.settings.mobilityModel=='static' or self.settings.mobilityModel=='staticUNI':
@@ -189,8 +298,8 @@ class Topology(object):
 		#motes are placed forcing a specific avg number of hops
                 elif self.settings.topology=='mesh-struct': 
 		   	    
-		    leftOrRight=random.random()
-		    upOrDown=random.random()
+		    leftOrRight=self.random.random()
+		    upOrDown=self.random.random()
 
 		    #set the min and max values for x and y in the later placement for the different divisions
 		    region=None
@@ -204,7 +313,7 @@ class Topology(object):
 				    ymin=(self.settings.squareSide/2)
 				    ymax=(self.settings.squareSide/2)+alphaDistance
 			else:
-			    supOrInf=random.random()
+			    supOrInf=self.random.random()
 			    if supOrInf >=0.5:						#right down up
 				if subLevelFilling_rdu <= subLevelFilling:
 					axisV=True
@@ -230,7 +339,7 @@ class Topology(object):
 				    ymin=(self.settings.squareSide/2)-alphaDistance
 				    ymax=(self.settings.squareSide/2)
 			else:
-			    supOrInf=random.random()
+			    supOrInf=self.random.random()
 			    if supOrInf >=0.5:						#right up up
 				if subLevelFilling_ruu <= subLevelFilling:
 					axisV=False
@@ -256,7 +365,7 @@ class Topology(object):
 				    ymin=(self.settings.squareSide/2)
 				    ymax=(self.settings.squareSide/2)+alphaDistance
 			else:
-			    supOrInf=random.random()
+			    supOrInf=self.random.random()
 			    if supOrInf >=0.5:						#left down up
 				if subLevelFilling_ldu <= subLevelFilling:
 					region="ldu"
@@ -282,7 +391,7 @@ class Topology(object):
 				    ymin=(self.settings.squareSide/2)-alphaDistance
 				    ymax=(self.settings.squareSide/2)			    
 			else:								
-			    supOrInf=random.random()
+			    supOrInf=self.random.random()
 			    if supOrInf >=0.5:						#left up up
 				if subLevelFilling_luu <= subLevelFilling:
 					region="luu"
@@ -309,37 +418,33 @@ class Topology(object):
 		    if region!=None:
 			    if axisV==None:	#current level 0
 				mote.setLocation(
-				    x = random.uniform(xmin,xmax),		
-				    y = random.gauss(((ymax+ymin)/2),(alphaInitVariance))			
+				    x = self.random.uniform(xmin,xmax),		
+				    y = self.random.gauss(((ymax+ymin)/2),(alphaInitVariance))			
 				)
 			
 			    else:		# level > 0
 				#placing mote vertically uniform, horizontally gaussian
 				if axisV==True:		
 				    mote.setLocation(			
-					x=random.gauss(((xmax+xmin)/2),(alphaInitVariance)),
-					y=random.uniform(ymin,ymax)
+					x=self.random.gauss(((xmax+xmin)/2),(alphaInitVariance)),
+					y=self.random.uniform(ymin,ymax)
 			    	    )
 				#placing mote horizontally uniform, vertically gaussian
 				else:
 				    mote.setLocation(			
-					x=random.uniform(xmin,xmax),
-					y=random.gauss(((ymax+ymin)/2),(alphaInitVariance))
+					x=self.random.uniform(xmin,xmax),
+					y=self.random.gauss(((ymax+ymin)/2),(alphaInitVariance))
 			    	    )
 
-			    for cm in connectedMotes:
-				    if self.settings.mobilityModel=='static' or self.settings.mobilityModel=='staticUNI':
-					rssi = self._computeRSSI_static(mote, cm)	#use pister hack for initial RSSI 
-				    else:
-					rssi = self._computeRSSI_staticRay(mote, cm)	#use rayleigh for initial RSSI 
-
-				    mote.setRSSI(cm, rssi)
-				    cm.setRSSI(mote, rssi)
+			    # only the motes in range can have a sufficient RSSI
+			    variations = self._drawRssiVariations(len(connectedMotes))
+			    for i in connectedGrid.getInRange(mote,self._computeStableRange(variations)):
+				    rssi = self._computeRSSI_initial(mote, connectedMotes[i], variations[i])
 				    
 				    if rssi>self.STABLE_RSSI:
 					connected = True
 					it=0	#reset attempt counter
-					continue
+					break
 			    #increase counters in division and level
 			    if connected==True:
 								
@@ -424,51 +529,209 @@ class Topology(object):
 					subLevelFilling_rdu=0
 					subLevelFilling_rdd=0
 					subLevelFilling_ruu=0
+	    # RSSI to all the connected motes, with the variations drawn for the location it was accepted at
+	    if self.settings.topology in ['mesh','mesh-struct']:
+	        for (cm,variation) in zip(connectedMotes,variations):
+	            rssi = self._computeRSSI_initial(mote, cm, variation)
+	            mote.setRSSI(cm, rssi)
+	            cm.setRSSI(mote, rssi)
+	    
 	    #one mote has been connected 
             connectedMotes += [mote]
+            connectedGrid.add(len(connectedMotes)-1,mote)
 		
-	# for each mote, compute PDR to each neighbors
-	for mote in self.motes:
-	    for m in self.motes:
-	        if mote==m:
-	            continue
-	        if mote.getRSSI(m)>mote.minRssi:
-	            pdr = self._computePDR(mote,m)
-	            mote.setPDR(m,pdr)
-	            m.setPDR(mote,pdr)       
+	# for each mote, compute PDR to the neighbors above its sensitivity
+	minRssi = np.array([mote.minRssi for mote in self.motes])[:,np.newaxis]
+	with np.errstate(invalid='ignore'): # NaN on the diagonal
+	    (rows,cols) = np.nonzero(self.engine.linkRSSI>minRssi)
+	for (i,j) in zip(rows.tolist(),cols.tolist()):
+	    (mote,m) = (self.motes[i],self.motes[j])
+	    pdr = self._computePDR(mote,m)
+	    mote.setPDR(m,pdr)
+	    m.setPDR(mote,pdr)
         
     #@profile	
     def updateTopology(self):
         '''
         update topology: re-calculate RSSI values. For scenarios != static
         '''
-
-	for mote1 in self.motes:
-		for mote2 in self.motes:
-		    if mote1.id != mote2.id:
-			rssi = self._computeRSSI_mobility(mote1, mote2)		#the RSSI is calculated with applying a random variation
-			mote1.setRSSI(mote2, rssi)
-		        mote2.setRSSI(mote1, rssi)
-			if rssi>mote1.minRssi:
-			    	pdr = self.rssiToPdr(rssi)
-			    	mote1.setPDR(mote2,pdr)
-			   	mote2.setPDR(mote1,pdr)
-			else:
-			    	pdr = 0
-			    	mote1.setPDR(mote2,pdr)
-			   	mote2.setPDR(mote1,pdr)
-   
+        
+        numMotes = len(self.motes)
+        
+        # the RSSI varies uniformly by +-6dB around its initial value, the same in both directions
+        (i,j)    = np.triu_indices(numMotes,1)
+        rssi     = np.array(self.engine.linkStaticPhys)
+        rssi[i,j]= rssi[i,j]+self.npRandom.uniform(-6,6,len(i))
+        rssi[j,i]= rssi[i,j]
+        
+        # PDR of the links above the sensitivity of the receiver, 0 for the others
+        minRssi  = np.array([mote.minRssi for mote in self.motes])[:,np.newaxis]
+        with np.errstate(invalid='ignore'): # NaN on the diagonal
+            pdr  = np.where(rssi>minRssi,self.rssiToPdrArray(rssi),0.0)
+        np.fill_diagonal(pdr,np.nan)
+        
+        # links which appeared or disappeared
+        with np.errstate(invalid='ignore'):
+            changed  = (pdr>0)!=(self.engine.linkPDR>0)
+        
+        # update in place, the motes work on views of these matrices
+        self.engine.linkRSSI[:]  = rssi
+        self.engine.linkPDR[:]   = pdr
+        for id in np.flatnonzero(changed.any(axis=1)).tolist():
+            self.motes[id].updateNeighbors(np.flatnonzero(changed[id]).tolist())
+    
+    def loadTopology(self):
+        '''
+        Load the topology created by an earlier run with the same settings and
+        seed from the cache, and restore the random generators to where
+        createTopology left them.
+        Returns False if the topology is not cached.
+        '''
+        
+        filename = self._getCacheFilename()
+        if filename is None or not os.path.exists(filename):
+            return False
+        
+        cache    = np.load(filename)
+        if str(cache['key'])!=self._getCacheKey():
+            return False
+        
+        # motes
+        for mote in self.motes:
+            if mote.id==0:
+                mote.role_setDagRoot()
+            mote.setLocation(
+                x = float(cache['x'][mote.id]),
+                y = float(cache['y'][mote.id]),
+            )
+        
+        # links, the motes work on views of these matrices
+        self.engine.linkRSSI[:]        = cache['linkRSSI']
+        self.engine.linkPDR[:]         = cache['linkPDR']
+        self.engine.linkStaticPhys[:]  = cache['linkStaticPhys']
+        for mote in self.motes:
+            mote.updateNeighbors(range(len(self.motes)))
+        
+        # random generators
+        gaussNext = float(cache['randomGaussNext'])
+        self.random.setstate((
+            int(cache['randomVersion']),
+            tuple(cache['randomState'].tolist()),
+            None if np.isnan(gaussNext) else gaussNext,
+        ))
+        self.npRandom.set_state((
+            'MT19937',
+            cache['npRandomKeys'],
+            int(cache['npRandomPos']),
+            int(cache['npRandomHasGauss']),
+            float(cache['npRandomCachedGaussian']),
+        ))
+        
+        return True
+    
+    def saveTopology(self):
+        ''' Store the topology just created in the cache, see loadTopology. '''
+        
+        filename = self._getCacheFilename()
+        if filename is None:
+            return
+        
+        if not os.path.exists(self.settings.topologyCacheDir):
+            try:
+                os.makedirs(self.settings.topologyCacheDir)
+            except OSError:
+                pass # created by a simulation running in parallel
+        
+        (randomVersion,randomState,randomGaussNext) = self.random.getstate()
+        (_,npKeys,npPos,npHasGauss,npCachedGaussian) = self.npRandom.get_state()
+        
+        # write to a temporary file first, simulations running in parallel may read it
+        tempname = '{0}.{1}.tmp'.format(filename,os.getpid())
+        with open(tempname,'wb') as f:
+            np.savez_compressed(f,
+                key                    = self._getCacheKey(),
+                x                      = np.array([mote.x for mote in self.motes]),
+                y                      = np.array([mote.y for mote in self.motes]),
+                linkRSSI               = self.engine.linkRSSI,
+                linkPDR                = self.engine.linkPDR,
+                linkStaticPhys         = self.engine.linkStaticPhys,
+                randomVersion          = randomVersion,
+                randomState            = np.array(randomState,dtype=np.uint32),
+                randomGaussNext        = np.nan if randomGaussNext is None else randomGaussNext,
+                npRandomKeys           = npKeys,
+                npRandomPos            = npPos,
+                npRandomHasGauss       = npHasGauss,
+                npRandomCachedGaussian = npCachedGaussian,
+            )
+        os.rename(tempname,filename)
+    
     #======================== private =========================================
+    
+    def _getCacheKey(self):
+        ''' the settings and seed the topology depends on '''
+        return 'version={0} numMotes={1} topology={2} squareSide={3} maxNumHops={4} mobilityModel={5} minRssi={6} seed={7}'.format(
+            self.CACHE_VERSION,
+            self.settings.numMotes,
+            self.settings.topology,
+            repr(self.settings.squareSide),
+            self.settings.maxNumHops,
+            self.settings.mobilityModel,
+            self.settings.minRssi,
+            self.engine.seed,
+        )
+    
+    def _getCacheFilename(self):
+        ''' file of the cached topology, None if it cannot be cached '''
+        
+        # an unseeded topology is never created twice
+        if self.engine.seed is None or not self.settings.topologyCacheDir:
+            return None
+        
+        return os.path.join(
+            self.settings.topologyCacheDir,
+            'topology_{0}.npz'.format(hashlib.sha1(self._getCacheKey()).hexdigest()),
+        )
 
-    def _computeRSSI_mobility(self,mote,neighbor):
-        ''' computes RSSI between any two nodes (not only neighbors) for mobility scenarios applying a 12dB uniform variation'''
-       
-	mu=mote.staticPhys[neighbor]
-	rssi=random.uniform(-6, 6)+mu
-	return rssi
-
-    def _computeRSSI_staticRay(self,mote,neighbor):
-        ''' computes RSSI between any two nodes (not only neighbors) according to the rayleigh model for the first time.'''
+    def _drawRssiVariations(self,numNeighbors):
+        '''
+        draws the random part of the initial RSSI to numNeighbors motes, in the
+        order the RSSIs are computed: Pister-hack shift (dB) or Rayleigh fading
+        with unit scale.
+        '''
+        if self.settings.mobilityModel=='static' or self.settings.mobilityModel=='staticUNI':
+            return [self.random.uniform(-self.PISTER_HACK_LOWER_SHIFT/2, self.PISTER_HACK_LOWER_SHIFT/2) for _ in range(numNeighbors)]
+        else:
+            return self.npRandom.rayleigh(1.0, numNeighbors)
+    
+    def _computeRSSI_initial(self,mote,neighbor,variation=None):
+        ''' computes the initial RSSI between two motes with the model of the simulation '''
+        if self.settings.mobilityModel=='static' or self.settings.mobilityModel=='staticUNI':
+            return self._computeRSSI_static(mote,neighbor,variation)    #use pister hack for initial RSSI
+        else:
+            return self._computeRSSI_staticRay(mote,neighbor,variation) #use rayleigh for initial RSSI
+    
+    def _computeStableRange(self,variations):
+        ''' distance (km) beyond which none of these variations gives an RSSI above STABLE_RSSI '''
+        if not len(variations):
+            return 0.0
+        if self.settings.mobilityModel=='static' or self.settings.mobilityModel=='staticUNI':
+            gain = max(variations)-self.PISTER_HACK_LOWER_SHIFT/2
+        else:
+            gain = 10*math.log10(math.sqrt(2/math.pi)*max(variations))
+        return self._computeRange(gain)
+    
+    def _computeRange(self,gain):
+        ''' distance (km) beyond which the friis RSSI plus gain (dB) is below STABLE_RSSI, for any pair of motes '''
+        maxTx = max([m.txPower+m.antennaGain for m in self.motes])
+        maxRx = max([m.antennaGain for m in self.motes])
+        prAt1m = maxTx + maxRx + 20*math.log10(self.SPEED_OF_LIGHT/(4*math.pi*self.TWO_DOT_FOUR_GHZ))
+        return math.pow(10.0,(prAt1m+gain+self.RANGE_MARGIN-self.STABLE_RSSI)/20.0)/1000
+    
+    def _computeRSSI_staticRay(self,mote,neighbor,fading=None):
+        '''
+        computes RSSI between any two nodes (not only neighbors) according to the rayleigh model for the first time.
+        fading is the unit-scale Rayleigh draw to use, drawn here if None.
+        '''
 
 	# distance in m
 	distance = self._computeDistance(mote,neighbor)
@@ -482,17 +745,23 @@ class Topology(object):
 	#using Rayleighmodel instead of pister-hack
 	meanvalue = math.pow(10.0,pr/10.0)
 	modevalue = np.sqrt(2 / np.pi) * meanvalue
-	rssi = np.random.rayleigh(modevalue, 1)
+	if fading is None:
+	    rssi = self.npRandom.rayleigh(modevalue, 1)
+	else:
+	    rssi = modevalue*fading
 
 	#save the first rssi value calculated for future use
-	mote.staticPhys[neighbor]=10*math.log10(rssi)
-	neighbor.staticPhys[mote]=10*math.log10(rssi)
+	mote.staticPhys[neighbor.id]=10*math.log10(rssi)
+	neighbor.staticPhys[mote.id]=10*math.log10(rssi)
 
 	return 10*math.log10(rssi)
     
 
-    def _computeRSSI_static(self,mote,neighbor):
-        ''' computes RSSI between any two nodes (not only neighbors) according to the Pister-hack model for the first time.'''
+    def _computeRSSI_static(self,mote,neighbor,variation=None):
+        '''
+        computes RSSI between any two nodes (not only neighbors) according to the Pister-hack model for the first time.
+        variation is the uniform shift (dB) to use, drawn here if None.
+        '''
 
 	# distance in m
 	distance = self._computeDistance(mote,neighbor)
@@ -507,11 +776,13 @@ class Topology(object):
 	mu = pr-self.PISTER_HACK_LOWER_SHIFT/2 #chosing the "mean" value
 
 	# the receiver will receive the packet with an rssi uniformly distributed between friis and friis -40
-	rssi = mu + random.uniform(-self.PISTER_HACK_LOWER_SHIFT/2, self.PISTER_HACK_LOWER_SHIFT/2)
+	if variation is None:
+	    variation = self.random.uniform(-self.PISTER_HACK_LOWER_SHIFT/2, self.PISTER_HACK_LOWER_SHIFT/2)
+	rssi = mu + variation
 
 	#save the first rssi value calculated for future use
-	mote.staticPhys[neighbor]=rssi
-	neighbor.staticPhys[mote]=rssi
+	mote.staticPhys[neighbor.id]=rssi
+	neighbor.staticPhys[mote.id]=rssi
 
 	return rssi
 
@@ -524,53 +795,13 @@ class Topology(object):
     
     @classmethod
     def rssiToPdr(self,rssi):
-        '''
-        rssi and pdr relationship obtained by experiment below
-        http://wsn.eecs.berkeley.edu/connectivity/?dataset=dust
-        '''
-        
-	#TODO set rssiPdrTable for the 868 MHz band -> FSK 500KHz, 500kbps 
-
-        rssiPdrTable    = {
-            -97:    0.0000, # this value is not from experiment
-            -96:    0.1494,
-            -95:    0.2340,
-            -94:    0.4071,
-            #<-- 50% PDR is here, at RSSI=-93.6
-            -93:    0.6359,
-            -92:    0.6866,
-            -91:    0.7476,
-            -90:    0.8603,
-            -89:    0.8702,
-            -88:    0.9324,
-            -87:    0.9427,
-            -86:    0.9562,
-            -85:    0.9611,
-            -84:    0.9739,
-            -83:    0.9745,
-            -82:    0.9844,
-            -81:    0.9854,
-            -80:    0.9903,
-            -79:    1.0000, # this value is not from experiment
-        }
-        
-        minRssi         = min(rssiPdrTable.keys())
-        maxRssi         = max(rssiPdrTable.keys())
-
-        if   rssi<minRssi:
-            pdr         = 0.0
-        elif rssi>maxRssi:
-            pdr         = 1.0
-        else:
-            floorRssi   = int(math.floor(rssi))
-            pdrLow      = rssiPdrTable[floorRssi]
-            pdrHigh     = rssiPdrTable[floorRssi+1]
-            pdr         = (pdrHigh-pdrLow)*(rssi-float(floorRssi))+pdrLow # linear interpolation
-        
-        assert pdr>=0.0
-        assert pdr<=1.0
-          
-        return pdr
+        ''' PDR at that RSSI, in the band of the simulation '''
+        return RSSI_PDR_TABLES[self.BAND].toPdr(rssi)
+    
+    @classmethod
+    def rssiToPdrArray(self,rssi):
+        ''' same as rssiToPdr, element-wise on an array of RSSIs '''
+        return RSSI_PDR_TABLES[self.BAND].toPdrArray(rssi)
     
     def _computeDistance(self,mote,neighbor):
         '''
@@ -587,6 +818,7 @@ class Topology(object):
 def main():
     import Mote
     import SimSettings
+    import SimContext
     
     NOTVISITED     = 'notVisited'
     MARKED         = 'marked'
@@ -597,6 +829,7 @@ def main():
         print '.',
         # create topology
         settings                           = SimSettings.SimSettings()
+        context                            = SimContext.SimContext(settings)
         settings.numMotes                  = 50
         settings.pkPeriod                  = 1.0
         settings.otfHousekeepingPeriod     = 1.0
@@ -608,8 +841,8 @@ def main():
         settings.slotDuration              = 0.010
         settings.sixtopNoHousekeeping      = 0
         settings.numPacketsBurst           = None
-        motes                              = [Mote.Mote(id) for id in range(settings.numMotes)]
-        topology                           = Topology(motes)
+        motes                              = [Mote.Mote(id,context) for id in range(settings.numMotes)]
+        topology                           = Topology(motes,context)
         topology.createTopology()
         
         # print stats
@@ -46,6 +46,7 @@ class SimGui(Tkinter.Tk):
         self._selectedCell   = None
         self._selectedMote   = None
         self._selectedLink   = None
+        self._context        = None
         
         # initialize parent class
         Tkinter.Tk.__init__(self)
@@ -107,5 +108,18 @@ class SimGui(Tkinter.Tk):
         with self.dataLock:
             self._selectedLink = value
     
+    @property
+    def context(self):
+        with self.dataLock:
+            if not self._context:
+                # this happens between runs
+                raise EnvironmentError('No simulation running.')
+            return self._context
+    
+    @context.setter
+    def context(self, value):
+        with self.dataLock:
+            self._context = value
+    
     #======================== private =========================================
     
@@ -23,9 +23,6 @@ log.addHandler(NullHandler())
 
 import Tkinter
 
-from SimEngine import SimEngine, \
-                      SimSettings
-
 #============================ defines =========================================
 
 #============================ body ============================================
@@ -70,11 +67,11 @@ class TopologyFrame(Tkinter.Frame):
     
     @property
     def engine(self):
-        return SimEngine.SimEngine(failIfNotInit=True)
+        return self.guiParent.context.engine
     
     @property
     def settings(self):
-        return SimSettings.SimSettings(failIfNotInit=True)
+        return self.guiParent.context.settings
     
     #======================== private =========================================
     
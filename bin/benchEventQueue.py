@@ -0,0 +1,185 @@
+#!/usr/bin/python
+'''
+\brief Compare the event queues of the simulation engine.
+
+Replays the event pattern of a simulation run (per-slot propagation, the
+motes' active cells, DIOs, OTF and 6top housekeeping, app packets and the
+end-of-cycle statistics) on each event queue, checks that all queues
+dispatch the events in the same order and prints the time each one takes.
+
+Use '--help' for a list of parameters.
+'''
+
+#============================ adjust path =====================================
+
+import os
+import sys
+if __name__=='__main__':
+    here = sys.path[0]
+    sys.path.insert(0, os.path.join(here, '..'))
+
+#============================ imports =========================================
+
+import time
+import random
+import argparse
+
+from SimEngine     import EventQueue
+
+#============================ defines =========================================
+
+SLOTFRAME_LENGTH   = 101
+SLOT_DURATION      = 0.010
+NUM_SHARED_CELLS   = 5
+CALENDAR_WINDOW    = 4*SLOTFRAME_LENGTH
+
+#============================ helpers =========================================
+
+def parseCliOptions():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument( '--numMotes',
+        dest       = 'numMotes',
+        nargs      = '+',
+        type       = int,
+        default    = [50,100,300],
+        help       = 'Number of simulated motes.',
+    )
+    parser.add_argument( '--numCycles',
+        dest       = 'numCycles',
+        type       = int,
+        default    = 200,
+        help       = 'Duration of a run, in slotframes.',
+    )
+    parser.add_argument( '--numCellsPerMote',
+        dest       = 'numCellsPerMote',
+        type       = int,
+        default    = 4,
+        help       = 'Number of dedicated cells per mote.',
+    )
+    parser.add_argument( '--seed',
+        dest       = 'seed',
+        type       = int,
+        default    = 0,
+        help       = 'Seed of the random generator.',
+    )
+    options        = parser.parse_args()
+
+    return options.__dict__
+
+class BenchEngine(object):
+    ''' minimal engine, schedules and dispatches like SimEngine '''
+
+    def __init__(self,events,numMotes,numCellsPerMote,numCycles,seed):
+
+        # store params
+        self.events          = events
+        self.numCycles       = numCycles
+
+        # local variables
+        self.asn             = 0
+        self.random          = random.Random(seed)
+        self.trace           = 0
+        self.numDispatched   = 0
+        self.schedules       = {}
+        for id in range(numMotes):
+            timeslots = set(range(0,SLOTFRAME_LENGTH,SLOTFRAME_LENGTH/NUM_SHARED_CELLS))
+            timeslots.update(self.random.sample(range(SLOTFRAME_LENGTH),numCellsPerMote))
+            self.schedules[id] = sorted(timeslots)
+
+        # boot
+        self.scheduleAtAsn(1,self._propagate,(None,'propagation'),1)
+        self.scheduleAtAsn(SLOTFRAME_LENGTH-1,self._endCycle,(None,'_actionEndCycle'),10)
+        for id in range(numMotes):
+            self._scheduleActiveCell(id)
+            self._scheduleDIO(id)
+            self._scheduleOtf(id)
+            self._scheduleSixtop(id)
+            self._scheduleApp(id)
+
+    def run(self):
+        while True:
+            event = self.events.peek()
+            if event is None:
+                break
+            self.asn = event[0]
+            while True:
+                event = self.events.peek()
+                if event is None or event[0]!=self.asn:
+                    break
+                (asn,priority,_,cb,_) = self.events.pop()
+                self.trace = hash((self.trace,asn,priority,cb.__name__))
+                self.numDispatched += 1
+                cb()
+
+    def scheduleAtAsn(self,asn,cb,uniqueTag=None,priority=0):
+        assert asn>self.asn
+        if uniqueTag:
+            self.events.remove(uniqueTag,exceptAsn=self.asn)
+        self.events.push(asn,priority,cb,uniqueTag)
+
+    #=== events
+
+    def _propagate(self):
+        self.scheduleAtAsn(self.asn+1,self._propagate,(None,'propagation'),1)
+
+    def _endCycle(self):
+        if self.asn/SLOTFRAME_LENGTH<self.numCycles:
+            self.scheduleAtAsn(self.asn+SLOTFRAME_LENGTH,self._endCycle,(None,'_actionEndCycle'),10)
+        else:
+            # end of the run, cancel all periodic events
+            self.events.remove((None,'propagation'))
+            for id in self.schedules:
+                for name in ['_tsch_action_activeCell','_rpl_action_sendDIO','_otf_action_housekeeping','_sixtop_action_housekeeping','_app_action_sendSinglePacket']:
+                    self.events.remove((id,name))
+
+    def _scheduleActiveCell(self,id):
+        tsCurrent = self.asn%SLOTFRAME_LENGTH
+        tsDiffMin = min([(ts-tsCurrent-1)%SLOTFRAME_LENGTH+1 for ts in self.schedules[id]])
+        self.scheduleAtAsn(self.asn+tsDiffMin,lambda: self._scheduleActiveCell(id),(id,'_tsch_action_activeCell'),0)
+
+    def _scheduleDIO(self,id):
+        delay = int(self.random.uniform(0.5,1.5)/SLOT_DURATION)+1
+        self.scheduleAtAsn(self.asn+delay,lambda: self._scheduleDIO(id),(id,'_rpl_action_sendDIO'),3)
+
+    def _scheduleOtf(self,id):
+        delay = int(5.0*(0.9+0.2*self.random.random())/SLOT_DURATION)
+        self.scheduleAtAsn(self.asn+delay,lambda: self._scheduleOtf(id),(id,'_otf_action_housekeeping'),4)
+
+    def _scheduleSixtop(self,id):
+        delay = int(1.0*(0.9+0.2*self.random.random())/SLOT_DURATION)
+        self.scheduleAtAsn(self.asn+delay,lambda: self._scheduleSixtop(id),(id,'_sixtop_action_housekeeping'),5)
+
+    def _scheduleApp(self,id):
+        delay = int(self.random.paretovariate(1.8)*0.4488/SLOT_DURATION)+1
+        self.scheduleAtAsn(self.asn+delay,lambda: self._scheduleApp(id),(id,'_app_action_sendSinglePacket'),2)
+
+def benchOneQueue(name,events,numMotes,options):
+    engine = BenchEngine(events,numMotes,options['numCellsPerMote'],options['numCycles'],options['seed'])
+    startTime = time.time()
+    engine.run()
+    duration = time.time()-startTime
+    print '{0:>5} motes {1:>9}: {2:>8} events in {3:>7.3f}s ({4:>7.2f} us/event)'.format(
+        numMotes,
+        name,
+        engine.numDispatched,
+        duration,
+        1e6*duration/engine.numDispatched,
+    )
+    return engine.trace
+
+#============================ main ============================================
+
+def main():
+
+    # parse CLI options
+    options        = parseCliOptions()
+
+    for numMotes in options['numMotes']:
+        traces = set()
+        traces.add(benchOneQueue('heap',EventQueue.HeapEventQueue(),numMotes,options))
+        traces.add(benchOneQueue('calendar',EventQueue.CalendarEventQueue(CALENDAR_WINDOW),numMotes,options))
+        assert len(traces)==1, 'event queues dispatched events in a different order'
+
+if __name__=="__main__":
+    main()
@@ -40,7 +40,8 @@ import threading
 
 from SimEngine     import SimEngine,   \
                           SimSettings, \
-                          SimStats
+                          SimStats,    \
+                          SimContext
 from SimGui        import SimGui
 
 #============================ defines =========================================
@@ -57,6 +58,11 @@ def parseCliOptions():
         default    = True,
         help       = '[sim] Display the GUI.',
     )
+    parser.add_argument('--nogui',
+        dest       = 'gui',
+        action     = 'store_false',
+        help       = '[sim] Run without GUI, single-threaded and without locking.',
+    )
     parser.add_argument( '--cpuID',
         dest       = 'cpuID',
         type       = int,
@@ -75,6 +81,19 @@ def parseCliOptions():
         default    = 2000,	#max value, actually is dynamic. it is expected to finish earlier
         help       = '[sim] Duration of a run, in slotframes.',
     )
+    parser.add_argument('--eventQueue',
+        dest       = 'eventQueue',
+        type       = str,
+        default    = 'heap',
+        choices    = ['heap','calendar'],
+        help       = '[sim] Event queue of the simulation engine: binary heap or calendar queue.',
+    )
+    parser.add_argument( '--seed',
+        dest       = 'seed',
+        type       = int,
+        default    = None,
+        help       = '[sim] Seed of the random generators, run i uses seed+i. Not seeded by default.',
+    )
     parser.add_argument('--simDataDir',
         dest       = 'simDataDir',
         type       = str,
@@ -112,6 +131,12 @@ def parseCliOptions():
         default    = '4',
         help       = '[topology] Choose the max number of hops of the structured mesh topology.',
     )
+    parser.add_argument('--topologyCacheDir',
+        dest       = 'topologyCacheDir',
+        type       = str,
+        default    = 'topologyCache',
+        help       = '[topology] Directory where the topologies of seeded runs are cached, empty to disable.',
+    )
     # app
     parser.add_argument( '--pkPeriod',
         dest       = 'pkPeriod',
@@ -235,6 +260,12 @@ def parseCliOptions():
         default    = 1,
         help       = '[tsch] Multichannel capabilities: Choose the number of radios per node to allow n simultaneous TX/RX.',
     )
+    parser.add_argument('--debugCellHistory',
+        dest       = 'debugCellHistory',
+        type       = int,
+        default    = 0,
+        help       = '[tsch] Number of interference debug entries kept per cell, 0 to disable.',
+    )
     parser.add_argument('--scheduler',
         dest       = 'scheduler',
         nargs      = '+',
@@ -281,7 +312,7 @@ def printOrLog(simParam,output):
     else:
         print output
 
-def runSims(options):
+def runSims(options,gui=None):
     
     
     # record simulation start time
@@ -319,12 +350,15 @@ def runSims(options):
             #print simParam
             printOrLog(simParam,output)
             
-            # create singletons
+            # create the simulation run
             settings         = SimSettings.SimSettings(**simParam)
             settings.setStartTime(runStartTime)
             settings.setCombinationKeys(combinationKeys)
-            simengine        = SimEngine.SimEngine(runNum)
-            simstats         = SimStats.SimStats(runNum)
+            context          = SimContext.SimContext(settings)
+            simengine        = SimEngine.SimEngine(context,runNum)
+            simstats         = SimStats.SimStats(context,runNum)
+            if gui:
+                gui.context  = context
             
             # start simulation run
             simengine.start()
@@ -332,10 +366,8 @@ def runSims(options):
             # wait for simulation run to end
             simengine.join()
             
-            # destroy singletons
-            simstats.destroy()
-            simengine.destroy()
-            settings.destroy()
+            if gui:
+                gui.context  = None
         
         # print
         output  = 'simulation ended after {0:.0f}s.'.format(time.time()-simStartTime)
@@ -355,7 +387,7 @@ def main():
         gui        = SimGui.SimGui()
         
         # run simulations (in separate thread)
-        simThread  = threading.Thread(target=runSims,args=(options,))
+        simThread  = threading.Thread(target=runSims,args=(options,gui))
         simThread.start()
         
         # start GUI's mainloop (in main thread)
@@ -0,0 +1,98 @@
+#!/usr/bin/python
+'''
+\brief Tests of the event queues of the simulation engine.
+
+Run with 'python -m unittest discover tests' from the root of the repository.
+'''
+
+#============================ adjust path =====================================
+
+import os
+import sys
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+#============================ imports =========================================
+
+import random
+import unittest
+
+from SimEngine     import EventQueue
+
+#============================ defines =========================================
+
+WINDOW_SIZE        = 8
+
+#============================ helpers =========================================
+
+def popAll(queue):
+    ''' the (asn,cb) of the remaining events, in dispatch order '''
+    returnVal = []
+    while True:
+        event = queue.pop()
+        if event is None:
+            return returnVal
+        returnVal += [(event[0],event[3])]
+
+#============================ body ============================================
+
+class TestEventQueue(unittest.TestCase):
+
+    def getQueues(self):
+        return [
+            EventQueue.HeapEventQueue(),
+            EventQueue.CalendarEventQueue(WINDOW_SIZE),
+        ]
+
+    def test_pushBelowPeekedHead(self):
+        # the engine peeks at the next event, then the GUI pauses at asn+1
+        for queue in self.getQueues():
+            queue.push(1,0,'a',None)
+            queue.push(50,0,'b',None)
+            self.assertEqual(queue.pop()[0],1)
+            self.assertEqual(queue.peek()[0],50)
+            queue.push(2,0,'c',None)
+            self.assertEqual(queue.peek()[0],2)
+            self.assertEqual(popAll(queue),[(2,'c'),(50,'b')])
+
+    def test_pushBelowPeekedHeadWithinWindow(self):
+        # events left in the buckets past the end of the rewound window
+        for queue in self.getQueues():
+            for asn in [0,10,14,20]:
+                queue.push(asn,0,asn,None)
+            self.assertEqual(queue.pop()[0],0)
+            self.assertEqual(queue.peek()[0],10)
+            queue.push(3,0,3,None)
+            self.assertEqual(popAll(queue),[(3,3),(10,10),(14,14),(20,20)])
+
+    def test_sameOrder(self):
+        # random pushes, peeks and cancellations, both queues dispatch alike
+        rng      = random.Random(1)
+        queues   = self.getQueues()
+        popped   = [[] for _ in queues]
+        asn      = 0
+        for i in range(5000):
+            action = rng.random()
+            if action<0.5:
+                args = (asn+rng.randint(0,3*WINDOW_SIZE),rng.randint(0,2),i,rng.choice([None,'x','y']))
+                for queue in queues:
+                    queue.push(*args)
+            elif action<0.55:
+                tag = rng.choice(['x','y'])
+                for queue in queues:
+                    queue.remove(tag)
+            else:
+                for (queue,events) in zip(queues,popped):
+                    event = queue.pop()
+                    events += [None if event is None else (event[0],event[3])]
+                    queue.peek()
+                if popped[0][-1] is not None:
+                    asn = popped[0][-1][0]
+        for (queue,events) in zip(queues,popped):
+            events += popAll(queue)
+        self.assertEqual(popped[0],popped[1])
+
+#============================ main ============================================
+
+if __name__=='__main__':
+    unittest.main()
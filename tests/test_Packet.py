@@ -0,0 +1,115 @@
+#!/usr/bin/python
+'''
+\brief Tests of the packets and of the TSCH queues of the motes.
+
+Run with 'python -m unittest discover tests' from the root of the repository.
+'''
+
+#============================ adjust path =====================================
+
+import os
+import sys
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+#============================ imports =========================================
+
+import collections
+import unittest
+
+from SimEngine     import Packet
+
+#============================ defines =========================================
+
+#============================ helpers =========================================
+
+def newPacket(dest,type='DATA',asn=0):
+    return Packet.Packet(
+        source       = 'src',
+        dest         = dest,
+        asn          = asn,
+        type         = type,
+        payload      = (0,asn,0),
+        retriesLeft  = 5,
+    )
+
+class RecordingDeque(collections.deque):
+    ''' a deque recording which of popleft and remove was called '''
+    def __init__(self):
+        collections.deque.__init__(self)
+        self.calls = []
+    def popleft(self):
+        self.calls += ['popleft']
+        return collections.deque.popleft(self)
+    def remove(self,item):
+        self.calls += ['remove']
+        return collections.deque.remove(self,item)
+
+#============================ body ============================================
+
+class TestPacketQueue(unittest.TestCase):
+
+    def test_countType(self):
+        queue   = Packet.PacketQueue()
+        packets = [newPacket('a','DATA'),newPacket('b','DIO'),newPacket('a','DATA'),newPacket(None,'DIO')]
+        for packet in packets:
+            queue.append(packet)
+        self.assertEqual(queue.countType('DATA'),2)
+        self.assertEqual(queue.countType('DIO'),2)
+        self.assertEqual(queue.countType('6TOP'),0)
+        queue.remove(packets[0])
+        queue.remove(packets[3])
+        self.assertEqual(queue.countType('DATA'),1)
+        self.assertEqual(queue.countType('DIO'),1)
+        queue.remove(packets[1])
+        self.assertEqual(queue.countType('DIO'),0)
+        self.assertEqual(list(queue),[packets[2]])
+
+    def test_getPacketsTo(self):
+        queue   = Packet.PacketQueue()
+        packets = [newPacket(dest,asn=asn) for (asn,dest) in enumerate(['a','b','a',None,'a','b'])]
+        for packet in packets:
+            queue.append(packet)
+        self.assertEqual(queue.getPacketsTo('a'),[packets[0],packets[2],packets[4]])
+        self.assertEqual(queue.getPacketsTo('b'),[packets[1],packets[5]])
+        self.assertEqual(queue.getPacketsTo(None),[packets[3]])
+        self.assertEqual(queue.getPacketsTo('c'),[])
+        queue.remove(packets[2])
+        self.assertEqual(queue.getPacketsTo('a'),[packets[0],packets[4]])
+        queue.remove(packets[3])
+        self.assertEqual(queue.getPacketsTo(None),[])
+        self.assertEqual(list(queue),[packets[0],packets[1],packets[4],packets[5]])
+
+    def test_identity(self):
+        # two packets with the same fields are still two packets
+        queue   = Packet.PacketQueue()
+        first   = newPacket('a')
+        second  = newPacket('a')
+        queue.append(first)
+        queue.append(second)
+        self.assertEqual(queue.index(first),0)
+        self.assertEqual(queue.index(second),1)
+        queue.remove(second)
+        self.assertTrue(first in queue)
+        self.assertFalse(second in queue)
+        self.assertTrue(queue[0] is first)
+        self.assertRaises(ValueError,queue.index,second)
+        self.assertEqual(len(queue),1)
+
+    def test_removeHead(self):
+        queue         = Packet.PacketQueue()
+        queue.packets = RecordingDeque()
+        packets       = [newPacket('a',asn=asn) for asn in range(3)]
+        for packet in packets:
+            queue.append(packet)
+        queue.remove(packets[0])
+        self.assertEqual(queue.packets.calls,['popleft'])
+        queue.remove(packets[2])
+        self.assertEqual(queue.packets.calls,['popleft','remove'])
+        self.assertEqual(list(queue),[packets[1]])
+        self.assertEqual(queue.getPacketsTo('a'),[packets[1]])
+
+#============================ main ============================================
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/python
+'''
+\brief Tests of the schedule of a mote, of its indexes and of the DEBRAS entries.
+
+Run with 'python -m unittest discover tests' from the root of the repository.
+'''
+
+#============================ adjust path =====================================
+
+import os
+import sys
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+#============================ imports =========================================
+
+import random
+import unittest
+
+import numpy as np
+
+from SimEngine     import Schedule
+
+#============================ defines =========================================
+
+SLOTFRAME_LENGTH   = 11
+NUM_CHANS          = 4
+NUM_MOTES          = 3
+MOTE_ID            = 1
+DIRS               = ['TX','RX','SHARED']
+NEIGHBORS          = [None,'a','b']
+
+#============================ helpers =========================================
+
+def newCell(rng,key):
+    ''' a cell at key (ts,ch), with a random direction, neighbor and counters '''
+    cell = Schedule.Cell(
+        ts             = key[0],
+        ch             = key[1],
+        dir            = rng.choice(DIRS),
+        neighbor       = rng.choice(NEIGHBORS),
+        isDebras       = rng.random()<0.3,
+        sharedCell_id  = 0,
+        createdAsn     = 0,
+        historyLength  = 4,
+    )
+    cell.numTx         = rng.randint(0,5)
+    cell.numTxAck      = rng.randint(0,cell.numTx)
+    return cell
+
+class Settings(object):
+    ''' the settings checkDebrasSettings reads '''
+    def __init__(self,slotframeLength=101,numChans=16,numMotes=50):
+        self.slotframeLength = slotframeLength
+        self.numChans        = numChans
+        self.numMotes        = numMotes
+
+#============================ body ============================================
+
+class TestSchedule(unittest.TestCase):
+
+    def assertIndexes(self,schedule,occupancy):
+        ''' compare the indexes of schedule to a recount of its cells '''
+        cellsByDir      = {}
+        cellsByNeighbor = {}
+        cellsByTs       = {}
+        txCounts        = {}
+        tx              = np.zeros((SLOTFRAME_LENGTH,NUM_CHANS,NUM_MOTES),dtype=bool)
+        rx              = np.zeros((SLOTFRAME_LENGTH,NUM_CHANS,NUM_MOTES),dtype=bool)
+        for (key,cell) in schedule.items():
+            cellsByDir.setdefault(cell.dir,{})[key] = cell
+            cellsByNeighbor.setdefault((cell.dir,cell.neighbor),{})[key] = cell
+            cellsByTs.setdefault(key[0],[]).append((key[1],cell))
+            counts = txCounts.setdefault((cell.dir,cell.neighbor),[0,0])
+            counts[0] += cell.numTx
+            counts[1] += cell.numTxAck
+            if cell.dir=='TX':
+                tx[key[0],key[1],MOTE_ID] = True
+            elif cell.dir=='RX':
+                rx[key[0],key[1],MOTE_ID] = True
+        for dir in DIRS:
+            self.assertEqual(schedule.getCellsByDir(dir),cellsByDir.get(dir,{}))
+            for neighbor in NEIGHBORS:
+                self.assertEqual(schedule.getCellsByNeighbor(dir,neighbor),cellsByNeighbor.get((dir,neighbor),{}))
+                self.assertEqual(schedule.getTxCounts(dir,neighbor),tuple(txCounts.get((dir,neighbor),(0,0))))
+        for ts in range(SLOTFRAME_LENGTH):
+            self.assertEqual(schedule.getCellsAtTs(ts),sorted(cellsByTs.get(ts,[])))
+        self.assertEqual(schedule.getTimeslots(),sorted(cellsByTs.keys()))
+        self.assertEqual(
+            schedule.getDebrasCells(),
+            dict((key,cell) for (key,cell) in schedule.items() if cell.isDebras),
+        )
+        self.assertTrue((occupancy.tx==tx).all())
+        self.assertTrue((occupancy.rx==rx).all())
+
+    def test_indexes(self):
+        # random additions, replacements, deletions and transmissions
+        rng       = random.Random(1)
+        occupancy = Schedule.CellOccupancy(SLOTFRAME_LENGTH,NUM_CHANS,NUM_MOTES)
+        schedule  = Schedule.Schedule(occupancy,MOTE_ID)
+        for _ in range(2000):
+            key    = (rng.randint(0,SLOTFRAME_LENGTH-1),rng.randint(0,NUM_CHANS-1))
+            action = rng.random()
+            if action<0.5:
+                # adds the cell, or replaces the one at key
+                schedule[key] = newCell(rng,key)
+            elif key in schedule:
+                if action<0.8:
+                    del schedule[key]
+                else:
+                    schedule.logTx(key)
+                    schedule.logTxResult(key,rng.random()<0.5)
+            self.assertIndexes(schedule,occupancy)
+
+    def test_getNextTimeslot(self):
+        rng       = random.Random(2)
+        schedule  = Schedule.Schedule()
+        self.assertEqual(schedule.getNextTimeslot(0),None)
+        for _ in range(20):
+            key = (rng.randint(0,SLOTFRAME_LENGTH-1),rng.randint(0,NUM_CHANS-1))
+            if key in schedule:
+                del schedule[key]
+            else:
+                schedule[key] = newCell(rng,key)
+            timeslots = sorted(set(ts for (ts,ch) in schedule.keys()))
+            for ts in range(SLOTFRAME_LENGTH):
+                after = [t for t in timeslots if t>ts]
+                if after:
+                    self.assertEqual(schedule.getNextTimeslot(ts),after[0])
+                elif timeslots:
+                    # wraps around the slotframe
+                    self.assertEqual(schedule.getNextTimeslot(ts),timeslots[0])
+                else:
+                    self.assertEqual(schedule.getNextTimeslot(ts),None)
+
+    def test_unsupported(self):
+        schedule  = Schedule.Schedule()
+        schedule[(0,0)] = newCell(random.Random(3),(0,0))
+        for (name,args) in [('pop',((0,0),)),('popitem',()),('clear',()),('update',({},)),('setdefault',((1,1),))]:
+            self.assertRaises(TypeError,getattr(schedule,name),*args)
+        self.assertEqual(schedule.getTimeslots(),[0])
+
+class TestDebrasCells(unittest.TestCase):
+
+    def test_packAtLimits(self):
+        entries = [
+            (511,15,'TX',1023),
+            (511,15,'RX',1023),
+            (0,  0, 'TX',0),
+            (0,  0, 'RX',0),
+            (511,0, 'RX',0),
+            (0,  15,'TX',1023),
+        ]
+        payload = Schedule.packDebrasCells(entries)
+        self.assertEqual(len(payload),Schedule.DEBRAS_ENTRY_SIZE*len(entries))
+        self.assertEqual(Schedule.unpackDebrasCells(payload),entries)
+
+    def test_packOutOfRange(self):
+        for entry in [(512,0,'TX',0),(0,16,'TX',0),(0,0,'TX',1024),(0,0,'SHARED',0)]:
+            self.assertRaises(AssertionError,Schedule.packDebrasCells,[entry])
+
+    def test_checkDebrasSettings(self):
+        Schedule.checkDebrasSettings(Settings(slotframeLength=512,numChans=16,numMotes=1024))
+        for settings in [
+                Settings(slotframeLength=513),
+                Settings(numChans=17),
+                Settings(numMotes=1025),
+            ]:
+            self.assertRaises(ValueError,Schedule.checkDebrasSettings,settings)
+
+#============================ main ============================================
+
+if __name__=='__main__':
+    unittest.main()